@@ -0,0 +1 @@
+"""Benchmarks für die heißen Pfade (python -m bench.<modul>)."""
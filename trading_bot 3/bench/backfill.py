@@ -0,0 +1,108 @@
+"""
+Backfill gegen einen lokalen Fake-Bybit-Server (kein Netz nötig).
+
+Der Server beantwortet /v5/market/kline mit künstlicher Latenz und einem Anteil
+an HTTP-429-Antworten. Verglichen werden sequentiell (concurrency=1) und parallel;
+geprüft wird, dass danach jeder Ring die erwartete Zahl abgeschlossener Kerzen hat.
+
+    python -m bench.backfill [--symbols 50] [--latency-ms 40] [--error-rate 0.05] [--concurrency 1,8,16]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from core.backfill import Backfill
+from core.shared_state import SharedState
+
+
+def kline_row(start_ts: int) -> list:
+    """Deterministische Kline im Bybit-Format – Tests vergleichen den Ring damit."""
+    base = 100.0 + (start_ts // 60) % 97
+    return [str(start_ts * 1000), f"{base:.1f}", f"{base + 1:.1f}", f"{base - 1:.1f}", f"{base + 0.5:.1f}",
+            f"{10 + (start_ts // 60) % 7:.1f}", "1250"]
+
+
+def make_server(latency_ms: float, error_rate: float, seed: int = 1, statuses=()):
+    """
+    Fake-/v5/market/kline mit start/end/limit wie Bybit (neueste zuerst, laufende Kerze vorn).
+    statuses: HTTP-Codes, die den ersten Requests aufgezwungen werden (z. B. 429, 503).
+    Gezählt wird in srv.calls (Liste der Query-Dicts).
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    forced = list(statuses)
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-Alive, damit der Session-Pool greift
+
+        def log_message(self, *a):
+            pass
+
+        def do_GET(self):
+            u = urlparse(self.path)
+            q = {k: v[0] for k, v in parse_qs(u.query).items()}
+            time.sleep(latency_ms / 1000.0)
+            with lock:
+                calls.append(q)
+                code = forced.pop(0) if forced else (429 if rng.random() < error_rate else 200)
+            if u.path != "/v5/market/kline" or code != 200:
+                body = b'{"retCode":10006,"retMsg":"Too many visits"}'
+                self._send(code if code != 200 else 404, body)
+                return
+            step = int(q.get("interval", "5")) * 60
+            limit = min(1000, int(q.get("limit", "200")))
+            t = int(time.time()) // step * step  # laufende Kerze = erster Eintrag
+            if "end" in q:
+                t = min(t, int(q["end"]) // 1000 // step * step)
+            start = int(q.get("start", "0")) // 1000
+            rows = []
+            while len(rows) < limit and t >= start:
+                rows.append(kline_row(t))
+                t -= step
+            self._send(200, json.dumps({"retCode": 0, "retMsg": "OK", "result": {"list": rows}}).encode())
+
+        def _send(self, code, body):
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.daemon_threads = True
+    srv.calls = calls
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--symbols", type=int, default=50)
+    ap.add_argument("--latency-ms", type=float, default=40.0)
+    ap.add_argument("--error-rate", type=float, default=0.05)
+    ap.add_argument("--concurrency", default="1,8,16")
+    ap.add_argument("--rate", type=float, default=100.0)
+    args = ap.parse_args()
+
+    srv, url = make_server(args.latency_ms, args.error_rate)
+    universe = [f"SYM{i}USDT" for i in range(args.symbols)]
+    print(f"{'conc':>5} {'jobs':>5} {'ok':>5} {'req':>5} {'retry':>6} {'sec':>7} {'jobs/s':>8} {'bars':>5}")
+    for c in (int(x) for x in args.concurrency.split(",")):
+        state = SharedState()
+        bf = Backfill(universe, markets=("futures",), concurrency=c, rate=args.rate, burst=int(args.rate),
+                      base_url=url, state=state)
+        p = bf.run()
+        bars = {state.get_latest_candle_count("futures", s, 300) for s in universe}
+        print(f"{c:>5} {p['total']:>5} {p['ok']:>5} {p['requests']:>5} {p['retried']:>6} "
+              f"{p['elapsed']:>7.2f} {p['total'] / max(1e-9, p['elapsed']):>8.1f} {','.join(map(str, sorted(bars))):>5}")
+    srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Microbenchmark für die Entscheidung: decide_trade pro Kandidat gegen decide_batch über
+dieselben synthetischen Kandidaten (Spalten vorab per to_matrix gebaut, wie im Batch-Scan).
+Prüft nebenbei, dass beide dieselben Trades (Aktion, Hebel, TP/SL, Margin) liefern.
+
+    python -m bench.decision [--sizes 10,100,1000] [--repeat 20]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from core.ai.online_rl import agent
+from core.candle_store import CandleView
+from core.decision_engine.batch_decision import decide_batch, to_matrix
+from core.decision_engine.simple_decision import decide_trade
+
+
+def make_features(n: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    feats = []
+    for i in range(n):
+        bars = int(rng.integers(2, 60))
+        o, c = rng.uniform(99, 101, bars), rng.uniform(99, 101, bars)
+        data = np.vstack([np.arange(bars) * 300.0, o, np.maximum(o, c) + 0.1, np.minimum(o, c) - 0.1, c,
+                          rng.uniform(1, 5, bars)])
+        feats.append({"symbol": f"SYM{i}USDT", "price": float(c[-1]), "trend": float(rng.normal(0, 0.2)),
+                      "vol": float(abs(rng.normal(0, 1))), "atr_pct": 0.3, "mtf_trend": float(rng.normal(0, 0.2)),
+                      "volume_ratio": float(rng.uniform(0, 4)), "rsi": float(rng.uniform(10, 90)),
+                      "sma": float(c[-10:].mean()), "candles": CandleView(data)})
+    return feats
+
+
+def check(feats, strategy):
+    ref = {f["symbol"]: decide_trade(f, agent, strategy) for f in feats}
+    ref = {k: v for k, v in ref.items() if v}
+    got = {d["symbol"]: d for d in decide_batch(feats, strategy, agent=agent)}
+    assert set(ref) == set(got), f"{strategy}: {len(ref)} vs {len(got)} Trades"
+    for sym, d in ref.items():
+        for k in ("action", "leverage", "tp_pct", "sl_pct", "risk_adjusted_margin"):
+            assert d[k] == got[sym][k], f"{strategy} {sym} {k}: {d[k]} != {got[sym][k]}"
+    return len(ref)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default="10,100,1000")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    feats = make_features(max(sizes))
+    for strategy in ("scalper", "conservative"):
+        print(f"[BENCH] {strategy}: {check(feats, strategy)} identische Trades")
+
+    print(f"{'n':>6} {'loop ms':>10} {'batch ms':>10} {'speedup':>8}")
+    for n in sizes:
+        sub = feats[:n]
+        t0 = time.perf_counter()
+        for f in sub:
+            decide_trade(f, agent, "scalper")
+        loop = time.perf_counter() - t0
+        m = to_matrix(sub)
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            decide_batch(m, "scalper", agent=agent)
+        batch = (time.perf_counter() - t0) / args.repeat
+        print(f"{n:>6} {loop * 1e3:>10.2f} {batch * 1e3:>10.3f} {loop / batch:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Durchsatz-Decke von Ingest und Scan gegen die Mock-Börse (bench.mock_exchange).
+
+Startet den Mock als eigenen Prozess (eigener GIL – sonst misst man den Mock mit), füllt die
+Kerzen per Backfill über dessen REST, verbindet die echte FeedRuntime mit den echten Handlern
+(spot_ws/futures_ws.handle_message) und lässt parallel einen Scanner-Zyklus wie in start.py
+laufen (aggregate_ticks + BatchScanner über das ganze Universum). Dann wird die Tick-Rate
+stufenweise über /mock/config erhöht. Pro Stufe: angebotene und verarbeitete Nachrichten/s,
+Drops der Feed-Queue, Rückstau im Mock, Scan-Zyklus p50/p99 und Empfangsverzögerung p99
+(core.metrics, Exchange-ts → Handler, inkl. Feed-Queue). Die Decke ist die erste
+Stufe, in der die Verarbeitung unter 95 % des Angebots fällt oder Nachrichten verloren gehen.
+
+    python -m bench.load_ceiling [--symbols 1000] [--tick-hz 0.5,1,2,5,10,20] [--step-sec 5]
+                                 [--ws ws://… --rest http://…]   # laufenden Mock nutzen
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from core.backfill import Backfill
+from core.metrics import metrics
+from core.ws_client import futures_ws, spot_ws
+from core.ws_client.feed_runtime import FeedRuntime
+from core.time_aggregation import aggregate_ticks
+from core import scanner
+from core.scanner.batch import BatchScanner
+from bench.mock_exchange import mock_symbols
+
+
+def _get(url: str) -> dict:
+    with urllib.request.urlopen(url, timeout=5) as r:
+        return json.loads(r.read())
+
+
+def _spawn_mock(symbols: int, ws_port: int, rest_port: int, extra) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "bench.mock_exchange", "--symbols", str(symbols), "--ws-port", str(ws_port),
+           "--rest-port", str(rest_port), *extra]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            _get(f"http://127.0.0.1:{rest_port}/mock/stats")
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("Mock-Börse startet nicht")
+
+
+def _scan_loop(symbols, stop, cycles):
+    batch = BatchScanner(symbols, min_candles=scanner.MIN_CANDLE_COUNT, volume_period=scanner.VOLUME_AVG_PERIOD,
+                         volatility_threshold=scanner.SCALPER_VOLATILITY_THRESHOLD)
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        aggregate_ticks()
+        scanner._collect_candidates(batch, symbols, 5)
+        cycles.append(time.perf_counter() - t0)
+        time.sleep(0.05)  # wie der Event-Scanner: kurze Pause, dann nächster Durchgang
+
+
+def run(symbols: int, rates, step_sec: float, ws_url: str, rest_url: str, backfill: bool, out) -> list:
+    universe = mock_symbols(symbols)
+    if backfill:
+        bf = Backfill(universe, markets=("futures",), concurrency=16, rate=500, burst=500, base_url=rest_url)
+        p = bf.run()
+        print(f"[LOAD] Backfill: {p['ok']}/{p['total']} in {p['elapsed']:.1f}s", file=out)
+
+    rt = FeedRuntime()
+    rt.add_feed("spot", f"{ws_url}/v5/public/spot", [f"tickers.{s}" for s in universe], spot_ws.handle_message)
+    rt.add_feed("futures", f"{ws_url}/v5/public/linear", [f"tickers.{s}" for s in universe], futures_ws.handle_message)
+    rt.start()
+    stop, cycles = threading.Event(), []
+    threading.Thread(target=_scan_loop, args=(universe, stop, cycles), daemon=True, name="LoadScan").start()
+    time.sleep(2.0)  # Verbindungen + Abos
+
+    rows = []
+    try:
+        for hz in rates:
+            _get(f"{rest_url}/mock/config?tick_hz={hz}")
+            time.sleep(1.0)  # Übergang abwarten
+            m0, s0 = _get(f"{rest_url}/mock/stats"), rt.stats()["queue"]
+            rt.max_depth = 0
+            del cycles[:]
+            metrics.reset()
+            t0 = time.perf_counter()
+            time.sleep(step_sec)
+            dt = time.perf_counter() - t0
+            m1, s1 = _get(f"{rest_url}/mock/stats"), rt.stats()["queue"]
+            cyc = np.array(cycles) * 1000
+            recv = metrics.snapshot()["stages"]["ws_receive"]
+            row = {"tick_hz": hz, "offered": (m1["ticks"] - m0["ticks"]) * 2 / dt,
+                   "sent": (m1["ws_msgs"] - m0["ws_msgs"]) / dt, "processed": (s1["processed"] - s0["processed"]) / dt,
+                   "dropped": s1["dropped"] - s0["dropped"], "max_depth": s1["max_depth"], "mock_queued": m1["queued"],
+                   "scans": len(cyc), "scan_p50_ms": float(np.percentile(cyc, 50)) if len(cyc) else 0.0,
+                   "scan_p99_ms": float(np.percentile(cyc, 99)) if len(cyc) else 0.0,
+                   "recv_p50_ms": recv["p50_ms"], "recv_p99_ms": recv["p99_ms"]}
+            row["saturated"] = bool(row["processed"] < 0.95 * row["offered"] or row["dropped"] > 0)
+            rows.append(row)
+            print(f"{hz:>7g} {row['offered']:>9.0f} {row['sent']:>9.0f} {row['processed']:>9.0f} {row['dropped']:>8} "
+                  f"{row['max_depth']:>7} {row['mock_queued']:>8} {row['scans']:>6} {row['scan_p50_ms']:>8.1f} "
+                  f"{row['scan_p99_ms']:>8.1f} {row['recv_p50_ms']:>8.1f} {row['recv_p99_ms']:>8.1f}"
+                  f"{'  ← gesättigt' if row['saturated'] else ''}", file=out)
+            if row["saturated"] and len(rows) > 1 and rows[-2]["saturated"]:
+                break  # zwei Stufen in Folge gesättigt – mehr bringt keine neue Information
+    finally:
+        stop.set()
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--symbols", type=int, default=1000)
+    ap.add_argument("--tick-hz", default="0.5,1,2,5,10,20", help="Stufen: Ticker-Updates pro Symbol und Sekunde")
+    ap.add_argument("--step-sec", type=float, default=5.0)
+    ap.add_argument("--ws", help="laufender Mock, z. B. ws://127.0.0.1:8766 (sonst wird einer gestartet)")
+    ap.add_argument("--rest", help="REST des laufenden Mocks, z. B. http://127.0.0.1:8767")
+    ap.add_argument("--ws-port", type=int, default=8776)
+    ap.add_argument("--rest-port", type=int, default=8777)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--no-backfill", action="store_true", help="ohne Kerzen scannt der BatchScanner fast nichts")
+    args = ap.parse_args()
+
+    rates = [float(x) for x in args.tick_hz.split(",")]
+    proc = None
+    if not args.ws:
+        proc = _spawn_mock(args.symbols, args.ws_port, args.rest_port, ["--tick-hz", str(rates[0]),
+                                                                       "--latency-ms", str(args.latency_ms)])
+    ws_url = (args.ws or f"ws://127.0.0.1:{args.ws_port}").rstrip("/")
+    rest_url = (args.rest or f"http://127.0.0.1:{args.rest_port}").rstrip("/")
+    out = sys.stdout
+    print(f"[LOAD] {args.symbols} Symbole × 2 Märkte, Mock {ws_url} / {rest_url}", file=out)
+    print(f"{'tick_hz':>7} {'offered':>9} {'sent':>9} {'processed':>9} {'dropped':>8} {'q_max':>7} {'mock_q':>8} "
+          f"{'scans':>6} {'scan p50':>8} {'scan p99':>8} {'recv p50':>8} {'recv p99':>8}", file=out)
+    try:
+        # Handler-/Feed-Logs (Acks, Verbindungen) würden die Tabelle zuschütten
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            rows = run(args.symbols, rates, args.step_sec, ws_url, rest_url, not args.no_backfill, out)
+    finally:
+        if proc is not None:
+            proc.terminate()
+    ok = [r for r in rows if not r["saturated"]]
+    if ok:
+        best = max(ok, key=lambda r: r["processed"])
+        print(f"[LOAD] Höchste ungesättigte Stufe: {best['processed']:.0f} msg/s "
+              f"(tick_hz={best['tick_hz']:g}, Scan p99 {best['scan_p99_ms']:.1f} ms)", file=out)
+    if any(r["saturated"] for r in rows):
+        first = next(r for r in rows if r["saturated"])
+        print(f"[LOAD] Decke erreicht bei tick_hz={first['tick_hz']:g}: angeboten {first['offered']:.0f} msg/s, "
+              f"verarbeitet {first['processed']:.0f} msg/s", file=out)
+    else:
+        print("[LOAD] Keine Sättigung – höhere --tick-hz-Stufen probieren", file=out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,638 @@
+"""
+Lokale Mock-Börse im Bybit-v5-Format – Lasttests ohne Live-Exchange.
+
+    REST  /v5/market/kline, /v5/market/tickers        (+ /mock/config, /mock/stats)
+    WS    /v5/public/spot, /v5/public/linear           tickers.*, kline.*, orderbook.*
+
+Preise sind synthetische Irrfahrten pro Symbol (Startpreis und Volatilität aus crc32 des
+Symbols, also reproduzierbar); unbekannte Symbole entstehen beim ersten Abo/Request. Steuerbar
+sind Symbolzahl, Tick-Rate, Burst-Profile, erzwungene Verbindungsabbrüche und Latenz (WS pro
+Nachricht, REST pro Request) – zur Laufzeit auch über /mock/config?tick_hz=…&latency_ms=….
+
+    python -m bench.mock_exchange [--symbols 1000] [--tick-hz 2] [--burst 60:5:10] [--disconnect-sec 120]
+                                  [--latency-ms 20 --jitter-ms 10] [--symbols-file /tmp/mock_symbols.txt]
+
+Den Bot dagegen starten:
+
+    WSS_URL_SPOT=ws://127.0.0.1:8766/v5/public/spot WSS_URL_FUTURES=ws://127.0.0.1:8766/v5/public/linear \\
+    BYBIT_REST_URL=http://127.0.0.1:8767 UNIVERSE_SYMBOLS=@/tmp/mock_symbols.txt python start.py
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import websockets
+
+from core.ws_client.tape import _ack, _market_for_path
+
+MOCK_HOST = os.getenv("MOCK_HOST", "127.0.0.1")
+MOCK_WS_PORT = int(os.getenv("MOCK_WS_PORT", "8766"))
+MOCK_REST_PORT = int(os.getenv("MOCK_REST_PORT", "8767"))
+MOCK_SYMBOLS = int(os.getenv("MOCK_SYMBOLS", "1000"))
+MOCK_TICK_HZ = float(os.getenv("MOCK_TICK_HZ", "2"))              # Ticker-Updates pro Symbol und Sekunde
+MOCK_BURST = os.getenv("MOCK_BURST", "")                          # "periode:dauer:faktor[,…]" in Sekunden
+MOCK_DISCONNECT_SEC = float(os.getenv("MOCK_DISCONNECT_SEC", "0"))  # mittlere Lebensdauer einer Verbindung, 0 = nie
+MOCK_LATENCY_MS = float(os.getenv("MOCK_LATENCY_MS", "0"))
+MOCK_JITTER_MS = float(os.getenv("MOCK_JITTER_MS", "0"))
+MOCK_REST_LATENCY_MS = float(os.getenv("MOCK_REST_LATENCY_MS", "0"))
+MOCK_REST_ERROR_RATE = float(os.getenv("MOCK_REST_ERROR_RATE", "0"))  # Anteil Antworten mit retCode 10006
+FRAME_SEC = 0.02         # Takt des Preis-Generators
+KLINE_PUSH_SEC = 1.0     # laufende Kerzen wie bei Bybit etwa einmal pro Sekunde
+BOOK_LEVELS = 50         # Snapshot-Tiefe höchstens; Deltas tragen die obersten BOOK_DELTA_LEVELS
+BOOK_DELTA_LEVELS = 5
+CLIENT_QUEUE_MAX = 200000  # ausstehende Nachrichten pro Verbindung, darüber wird die älteste verworfen
+
+_INTERVALS = {"1": 60, "3": 180, "5": 300, "15": 900, "30": 1800, "60": 3600, "120": 7200,
+              "240": 14400, "360": 21600, "720": 43200, "D": 86400}
+_BOOK_DEPTHS = {"spot": (1, 50, 200), "futures": (1, 50, 200, 500)}
+_SPOT_TICKER = ('{"topic":"tickers.%s","ts":%d,"type":"snapshot","cs":%d,"data":{"symbol":"%s","lastPrice":"%.*f",'
+                '"highPrice24h":"%.*f","lowPrice24h":"%.*f","prevPrice24h":"%.*f","volume24h":"%.4f",'
+                '"turnover24h":"%.4f","price24hPcnt":"%.6f"}}')
+_LINEAR_DELTA = ('{"topic":"tickers.%s","ts":%d,"type":"delta","cs":%d,"data":{"symbol":"%s","lastPrice":"%.*f",'
+                 '"markPrice":"%.*f","indexPrice":"%.*f","bid1Price":"%.*f","ask1Price":"%.*f","volume24h":"%.4f",'
+                 '"turnover24h":"%.4f","price24hPcnt":"%.6f"}}')
+
+
+def mock_symbols(n: int) -> list:
+    return [f"MOCK{i:04d}USDT" for i in range(n)]
+
+
+def parse_bursts(spec: str) -> list:
+    """"60:5:10,300:30:4" → [(periode, dauer, faktor), …]."""
+    out = []
+    for part in (spec or "").split(","):
+        if part.strip():
+            period, length, factor = (float(x) for x in part.split(":"))
+            out.append((period, length, factor))
+    return out
+
+
+def _fmt(p: float) -> str:
+    # ~6 signifikante Stellen wie bei Bybit-Preisen
+    return "%.*f" % (max(0, 5 - math.floor(math.log10(p))), p) if p > 0 else "0"
+
+
+def _decimals(p: np.ndarray) -> np.ndarray:
+    """Nachkommastellen wie _fmt, für viele Preise auf einmal."""
+    return np.maximum(0, 5 - np.floor(np.log10(np.maximum(p, 1e-12)))).astype(int)
+
+
+class PricePaths:
+    """Preise, 24h-Statistik und laufende Bars aller Symbole als Arrays; thread-sicher über lock."""
+
+    def __init__(self, symbols, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.Lock()
+        self.symbols, self.index = [], {}
+        self.price = np.zeros(0)
+        self.sigma = np.zeros(0)   # Volatilität pro 5m-Bar
+        self.prev24 = np.zeros(0)
+        self.vol24 = np.zeros(0)
+        self.turnover24 = np.zeros(0)
+        self.bars = {}             # interval_sec → {"start": float, "o"/"h"/"l"/"c"/"v": Array}
+        self.changed = np.zeros(0, dtype=bool)  # seit dem letzten Kline-Push bewegt
+        self.add(symbols)
+
+    def add(self, symbols) -> list:
+        new = [s for s in dict.fromkeys(symbols) if s not in self.index]
+        if not new:
+            return []
+        price, sigma = [], []
+        for s in new:
+            r = np.random.default_rng(zlib.crc32(s.encode()))
+            price.append(float(np.exp(r.uniform(np.log(0.01), np.log(50000)))))
+            sigma.append(r.uniform(0.001, 0.006))
+        price = np.array(price)
+        for s in new:
+            self.index[s] = len(self.symbols)
+            self.symbols.append(s)
+        self.price = np.concatenate([self.price, price])
+        self.sigma = np.concatenate([self.sigma, sigma])
+        self.prev24 = np.concatenate([self.prev24, price])
+        self.vol24 = np.concatenate([self.vol24, 1e5 / np.sqrt(price)])
+        self.turnover24 = np.concatenate([self.turnover24, self.vol24[-len(new):] * price])
+        self.changed = np.concatenate([self.changed, np.ones(len(new), dtype=bool)])
+        for b in self.bars.values():
+            for k in "ohlc":
+                b[k] = np.concatenate([b[k], price])
+            b["v"] = np.concatenate([b["v"], np.zeros(len(new))])
+        return new
+
+    def ensure(self, symbol: str) -> int:
+        if symbol not in self.index:
+            self.add([symbol])
+        return self.index[symbol]
+
+    def track(self, interval: int, now: float):
+        if interval not in self.bars:
+            p = self.price
+            self.bars[interval] = {"start": now // interval * interval, "o": p.copy(), "h": p.copy(),
+                                   "l": p.copy(), "c": p.copy(), "v": np.zeros(len(p))}
+
+    def step(self, idx: np.ndarray, tick_hz: float):
+        """Ein Tick für die Symbole idx (eindeutig); Volatilität pro Tick aus der 5m-Volatilität bei tick_hz."""
+        sig = self.sigma[idx] / math.sqrt(300 * max(tick_hz, 1e-9))
+        ret = sig * self.rng.standard_normal(len(idx))
+        p = self.price[idx] * np.exp(ret)
+        dv = self.rng.lognormal(0, 0.5, len(idx)) * (1 + np.abs(ret) / sig) * 10 / np.sqrt(p)
+        self.price[idx] = p
+        self.vol24[idx] += dv
+        self.turnover24[idx] += dv * p
+        self.changed[idx] = True
+        for b in self.bars.values():
+            b["h"][idx] = np.maximum(b["h"][idx], p)
+            b["l"][idx] = np.minimum(b["l"][idx], p)
+            b["c"][idx] = p
+            b["v"][idx] += dv
+
+    def roll(self, now: float) -> list:
+        """Abgelaufene Bars schließen → [(interval, start, {o,h,l,c,v}), …] und neue Bars öffnen."""
+        closed = []
+        for iv, b in self.bars.items():
+            start = now // iv * iv
+            if start > b["start"]:
+                closed.append((iv, b["start"], {k: b[k].copy() for k in "ohlcv"}))
+                p = self.price
+                b.update({"start": start, "o": p.copy(), "h": p.copy(), "l": p.copy(), "c": p.copy(),
+                          "v": np.zeros(len(p))})
+        return closed
+
+    def history(self, i: int, interval: int, limit: int, now: float, end: float = None) -> list:
+        """Bybit-Kline-Liste (neueste zuerst) rückwärts vom aktuellen Preis; die erste Zeile ist die laufende Bar."""
+        cur = now // interval * interval
+        last = min(cur, end // interval * interval) if end else cur
+        n = max(0, int(limit))
+        r = np.random.default_rng([zlib.crc32(self.symbols[i].encode()), interval])
+        ret = r.normal(0, self.sigma[i] * math.sqrt(interval / 300), n)
+        close = self.price[i] / np.exp(np.concatenate([[0.0], np.cumsum(ret[:-1])])) if n else np.zeros(0)
+        open_ = close / np.exp(ret)
+        wick = np.abs(r.normal(0, self.sigma[i] / 2, (2, n)))
+        high, low = np.maximum(open_, close) * (1 + wick[0]), np.minimum(open_, close) * (1 - wick[1])
+        vol = r.lognormal(3, 0.5, n) * 10 / math.sqrt(self.price[i])
+        rows = []
+        for k in range(n):
+            start = last - k * interval
+            rows.append([str(int(start * 1000)), _fmt(open_[k]), _fmt(high[k]), _fmt(low[k]), _fmt(close[k]),
+                         f"{vol[k]:.4f}", f"{vol[k] * close[k]:.4f}"])
+        return rows
+
+    def ticker(self, i: int, market: str) -> dict:
+        p = self.price[i]
+        d = {"symbol": self.symbols[i], "lastPrice": _fmt(p), "highPrice24h": _fmt(max(p, self.prev24[i]) * 1.01),
+             "lowPrice24h": _fmt(min(p, self.prev24[i]) * 0.99), "prevPrice24h": _fmt(self.prev24[i]),
+             "volume24h": f"{self.vol24[i]:.4f}", "turnover24h": f"{self.turnover24[i]:.4f}",
+             "price24hPcnt": f"{p / self.prev24[i] - 1:.6f}"}
+        if market == "futures":
+            d.update({"markPrice": _fmt(p), "indexPrice": _fmt(p), "fundingRate": "0.0001",
+                      "openInterest": f"{self.vol24[i] / 4:.2f}", "bid1Price": _fmt(p * 0.9999),
+                      "ask1Price": _fmt(p * 1.0001)})
+        return d
+
+    def book(self, i: int, depth: int) -> tuple:
+        p = self.price[i]
+        step = 10 ** (math.floor(math.log10(p)) - 4) if p > 0 else 1e-8
+        mid = round(p / step)
+        n = min(depth, BOOK_LEVELS)
+        size = lambda k: f"{(k + 1) * 100 / math.sqrt(p):.4f}"
+        bids = [[_fmt((mid - 1 - k) * step), size(k)] for k in range(n)]
+        asks = [[_fmt((mid + 1 + k) * step), size(k)] for k in range(n)]
+        return bids, asks
+
+
+class _Client:
+    def __init__(self, ws, market: str, deadline: float):
+        self.ws = ws
+        self.market = market
+        self.topics = set()
+        self.queue = collections.deque()
+        self.wake = asyncio.Event()
+        self.deadline = deadline  # monotonic; 0 = kein erzwungener Abbruch
+        self.due = 0.0
+
+    def push(self, msg: str, due: float, stats: dict):
+        # Zustellzeit monoton halten – Bybit ordnet pro Verbindung nicht um
+        if due > self.due:
+            self.due = due
+        self.queue.append((self.due, msg))
+        if len(self.queue) > CLIENT_QUEUE_MAX:
+            self.queue.popleft()
+            stats["dropped"] += 1
+        self.wake.set()
+
+
+class MockExchange:
+    def __init__(self, n_symbols: int = MOCK_SYMBOLS, tick_hz: float = MOCK_TICK_HZ, bursts=MOCK_BURST,
+                 disconnect_sec: float = MOCK_DISCONNECT_SEC, latency_ms: float = MOCK_LATENCY_MS,
+                 jitter_ms: float = MOCK_JITTER_MS, rest_latency_ms: float = MOCK_REST_LATENCY_MS,
+                 rest_error_rate: float = MOCK_REST_ERROR_RATE, seed: int = 0):
+        self.paths = PricePaths(mock_symbols(n_symbols), seed)
+        self.config = {"tick_hz": float(tick_hz), "bursts": parse_bursts(bursts) if isinstance(bursts, str) else list(bursts),
+                       "disconnect_sec": float(disconnect_sec), "latency_ms": float(latency_ms),
+                       "jitter_ms": float(jitter_ms), "rest_latency_ms": float(rest_latency_ms),
+                       "rest_error_rate": float(rest_error_rate)}
+        self.subs = {}  # (market, topic) → {_Client}
+        self.book_depths = {"spot": set(), "futures": set()}
+        self.clients = set()
+        self.stats = {"connections": 0, "disconnects": 0, "ticks": 0, "ws_msgs": 0, "dropped": 0,
+                      "rest_requests": 0, "rest_errors": 0}
+        self.started = time.time()
+        self.seq = 0
+
+    # ---------- Steuerung ----------
+
+    def burst_factor(self, now: float) -> float:
+        t = now - self.started
+        return max([f for period, length, f in self.config["bursts"] if t % period < length] or [1.0])
+
+    def offered_rate(self, now: float = None) -> float:
+        """Ticker-Updates pro Sekunde über alle Symbole (je Markt)."""
+        return len(self.paths.symbols) * self.config["tick_hz"] * self.burst_factor(now or time.time())
+
+    def update_config(self, params: dict) -> dict:
+        for k, v in params.items():
+            if k == "bursts" or k == "burst":
+                self.config["bursts"] = parse_bursts(v)
+            elif k == "symbols":
+                with self.paths.lock:
+                    self.paths.add(mock_symbols(int(v)))
+            elif k in self.config:
+                self.config[k] = float(v)
+        return self.public_config()
+
+    def public_config(self) -> dict:
+        return dict(self.config, symbols=len(self.paths.symbols))
+
+    def snapshot_stats(self) -> dict:
+        return dict(self.stats, clients=len(self.clients), topics=len(self.subs),
+                    queued=sum(len(c.queue) for c in self.clients),
+                    offered_rate=round(self.offered_rate(), 1), uptime=round(time.time() - self.started, 1))
+
+    # ---------- Nachrichten ----------
+
+    def _delay(self) -> float:
+        c = self.config
+        return (c["latency_ms"] + (random.uniform(0, c["jitter_ms"]) if c["jitter_ms"] else 0.0)) / 1000.0
+
+    def _push(self, c: _Client, msg: str):
+        c.push(msg, time.monotonic() + self._delay(), self.stats)
+
+    def _send(self, clients, msg: str):
+        mono = time.monotonic()
+        for c in clients:
+            c.push(msg, mono + self._delay(), self.stats)
+
+    def _ticker_msg(self, i: int, market: str, now_ms: int) -> str:
+        """Voller Snapshot (nach dem Abo)."""
+        self.seq += 1
+        d = self.paths.ticker(i, market)
+        return json.dumps({"topic": f"tickers.{d['symbol']}", "ts": now_ms, "type": "snapshot", "cs": self.seq,
+                           "data": d})
+
+    def _kline_msg(self, label: str, iv: int, i: int, start: float, bar: dict, confirm: bool, now_ms: int) -> str:
+        o, h, l, c, v = (float(bar[k][i]) for k in "ohlcv")
+        return json.dumps({"topic": f"kline.{label}.{self.paths.symbols[i]}", "ts": now_ms, "type": "snapshot",
+                           "data": [{"start": int(start * 1000), "end": int((start + iv) * 1000) - 1,
+                                     "interval": label, "open": _fmt(o), "close": _fmt(c), "high": _fmt(h),
+                                     "low": _fmt(l), "volume": f"{v:.4f}", "turnover": f"{v * c:.4f}",
+                                     "confirm": confirm, "timestamp": now_ms}]})
+
+    def _book_msg(self, depth: int, i: int, now_ms: int, snapshot: bool) -> str:
+        self.seq += 1
+        bids, asks = self.paths.book(i, depth if snapshot else min(depth, BOOK_DELTA_LEVELS))
+        return json.dumps({"topic": f"orderbook.{depth}.{self.paths.symbols[i]}", "ts": now_ms,
+                           "type": "snapshot" if snapshot or depth == 1 else "delta",
+                           "data": {"s": self.paths.symbols[i], "b": bids, "a": asks, "u": self.seq, "seq": self.seq},
+                           "cts": now_ms})
+
+    def _parse_topic(self, topic: str):
+        """→ (art, label, symbol) oder None."""
+        parts = topic.split(".")
+        if len(parts) == 2 and parts[0] == "tickers":
+            return "tickers", None, parts[1].upper()
+        if len(parts) == 3 and parts[0] == "kline" and parts[1] in _INTERVALS:
+            return "kline", parts[1], parts[2].upper()
+        if len(parts) == 3 and parts[0] == "orderbook" and parts[1].isdigit():
+            return "orderbook", parts[1], parts[2].upper()
+        return None
+
+    def _subscribe(self, c: _Client, topics) -> list:
+        bad, now = [], time.time()
+        now_ms = int(now * 1000)
+        for topic in topics:
+            parsed = self._parse_topic(topic)
+            if parsed is None or (parsed[0] == "orderbook" and int(parsed[1]) not in _BOOK_DEPTHS[c.market]):
+                bad.append(topic)
+                continue
+            kind, label, sym = parsed
+            topic = f"{kind}.{label}.{sym}" if label else f"{kind}.{sym}"
+            with self.paths.lock:
+                i = self.paths.ensure(sym)
+                if kind == "kline":
+                    self.paths.track(_INTERVALS[label], now)
+            self.subs.setdefault((c.market, topic), set()).add(c)
+            c.topics.add(topic)
+            # Erstes Bild sofort, wie Bybit nach dem Abo
+            if kind == "tickers":
+                self._push(c, self._ticker_msg(i, c.market, now_ms))
+            elif kind == "orderbook":
+                self.book_depths[c.market].add(int(label))
+                self._push(c, self._book_msg(int(label), i, now_ms, True))
+            else:
+                iv = _INTERVALS[label]
+                b = self.paths.bars[iv]
+                self._push(c, self._kline_msg(label, iv, i, b["start"], b, False, now_ms))
+        return bad
+
+    def _unsubscribe(self, c: _Client, topics):
+        for topic in topics:
+            parsed = self._parse_topic(topic)
+            if parsed:
+                kind, label, sym = parsed
+                topic = f"{kind}.{label}.{sym}" if label else f"{kind}.{sym}"
+            subs = self.subs.get((c.market, topic))
+            if subs is not None:
+                subs.discard(c)
+                if not subs:
+                    del self.subs[(c.market, topic)]
+            c.topics.discard(topic)
+
+    def _publish_ticks(self, idx: np.ndarray, now: float):
+        now_ms = int(now * 1000)
+        subs, symbols, P = self.subs, self.paths.symbols, self.paths
+        # Pro Tick nur Strings formatieren – json.dumps über dicts wäre hier der Flaschenhals des Mocks
+        price, prev, vol, turnover = (a[idx].tolist() for a in (P.price, P.prev24, P.vol24, P.turnover24))
+        decs = _decimals(P.price[idx]).tolist()
+        for k, i in enumerate(idx.tolist()):
+            sym = symbols[i]
+            spot, fut = subs.get(("spot", "tickers." + sym)), subs.get(("futures", "tickers." + sym))
+            if spot or fut:
+                p, p0, d = price[k], prev[k], decs[k]
+                if spot:
+                    self.seq += 1
+                    self._send(spot, _SPOT_TICKER % (sym, now_ms, self.seq, sym, d, p, d, max(p, p0) * 1.01, d,
+                                                     min(p, p0) * 0.99, d, p0, vol[k], turnover[k], p / p0 - 1))
+                if fut:
+                    # Linear schickt nach dem Snapshot nur Deltas mit den geänderten Feldern
+                    self.seq += 1
+                    self._send(fut, _LINEAR_DELTA % (sym, now_ms, self.seq, sym, d, p, d, p, d, p, d, p * 0.9999,
+                                                     d, p * 1.0001, vol[k], turnover[k], p / p0 - 1))
+            for market in ("spot", "futures"):
+                for depth in self.book_depths[market]:
+                    clients = subs.get((market, f"orderbook.{depth}.{sym}"))
+                    if clients:
+                        self._send(clients, self._book_msg(depth, i, now_ms, False))
+
+    def _publish_klines(self, now: float, closed):
+        now_ms = int(now * 1000)
+        labels = {iv: label for label, iv in _INTERVALS.items()}
+        symbols = self.paths.symbols
+        for iv, start, bar in closed:
+            for i, sym in enumerate(symbols):
+                for market in ("spot", "futures"):
+                    clients = self.subs.get((market, f"kline.{labels[iv]}.{sym}"))
+                    if clients:
+                        self._send(clients, self._kline_msg(labels[iv], iv, i, start, bar, True, now_ms))
+        changed = np.flatnonzero(self.paths.changed)
+        self.paths.changed[:] = False
+        for iv, b in self.paths.bars.items():
+            for i in changed:
+                for market in ("spot", "futures"):
+                    clients = self.subs.get((market, f"kline.{labels[iv]}.{symbols[i]}"))
+                    if clients:
+                        self._send(clients, self._kline_msg(labels[iv], iv, i, b["start"], b, False, now_ms))
+
+    # ---------- Loops ----------
+
+    async def _generator(self):
+        rng = np.random.default_rng(1)
+        last = last_kline = time.time()
+        carry = 0.0
+        while True:
+            now = time.time()
+            cfg = self.config
+            with self.paths.lock:
+                n_sym = len(self.paths.symbols)
+                expected = self.offered_rate(now) * (now - last) + carry
+                n = int(expected)
+                carry = expected - n
+                rounds, rest = divmod(n, max(1, n_sym))
+                moved = []
+                for r in range(rounds + (1 if rest else 0)):
+                    idx = np.arange(n_sym) if r < rounds else rng.choice(n_sym, rest, replace=False)
+                    self.paths.step(idx, cfg["tick_hz"])
+                    moved.append(idx)
+                closed = self.paths.roll(now)
+            last = now
+            for idx in moved:
+                self.stats["ticks"] += len(idx)
+                self._publish_ticks(idx, now)
+            if closed or now - last_kline >= KLINE_PUSH_SEC:
+                self._publish_klines(now, closed)
+                last_kline = now
+            mono = time.monotonic()
+            for c in [c for c in self.clients if c.deadline and c.deadline <= mono]:
+                self._drop(c)
+            await asyncio.sleep(max(0.0, FRAME_SEC - (time.time() - now)))
+
+    def _drop(self, c: _Client):
+        """Erzwungener Abbruch ohne Close-Frame (wie ein Netzwerkausfall)."""
+        c.deadline = 0.0
+        self.stats["disconnects"] += 1
+        transport = getattr(c.ws, "transport", None)
+        if transport is not None:
+            transport.abort()
+        else:
+            asyncio.ensure_future(c.ws.close())
+
+    async def _sender(self, c: _Client):
+        n = 0
+        while True:
+            if not c.queue:
+                c.wake.clear()
+                await c.wake.wait()
+                continue
+            due, msg = c.queue[0]
+            wait = due - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            c.queue.popleft()
+            await c.ws.send(msg)
+            self.stats["ws_msgs"] += 1
+            n += 1
+            if n % 500 == 0:
+                await asyncio.sleep(0)  # andere Verbindungen und den Generator nicht aushungern
+
+    async def _handler(self, ws, *legacy):
+        path = legacy[0] if legacy else getattr(getattr(ws, "request", None), "path", "/")
+        d = self.config["disconnect_sec"]
+        c = _Client(ws, _market_for_path(path), time.monotonic() + random.expovariate(1.0 / d) if d > 0 else 0.0)
+        self.clients.add(c)
+        self.stats["connections"] += 1
+        conn_id = f"mock-{id(ws):x}"
+        sender = asyncio.ensure_future(self._sender(c))
+        try:
+            async for raw in ws:
+                try:
+                    req = json.loads(raw)
+                except ValueError:
+                    continue
+                op = req.get("op")
+                if op == "subscribe":
+                    bad = self._subscribe(c, req.get("args") or ())
+                    if bad:
+                        self._push(c, json.dumps({"success": False, "ret_msg": f"error:handler not found,topic:{bad[0]}",
+                                                  "conn_id": conn_id, "req_id": req.get("req_id", ""), "op": op}))
+                        continue
+                elif op == "unsubscribe":
+                    self._unsubscribe(c, req.get("args") or ())
+                elif op != "ping":
+                    continue
+                self._push(c, _ack(op, req, conn_id))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            self.clients.discard(c)
+            self._unsubscribe(c, list(c.topics))
+
+    async def serve_ws(self, host: str = MOCK_HOST, port: int = MOCK_WS_PORT, report_sec: float = 10.0):
+        # ohne permessage-deflate: Kompression kostet hier mehr CPU als das Erzeugen der Nachrichten
+        async with websockets.serve(self._handler, host, port, max_queue=None, max_size=None, compression=None):
+            gen = asyncio.ensure_future(self._generator())
+            print(f"[MOCK] WS auf ws://{host}:{port}/v5/public/{{spot,linear}} – {len(self.paths.symbols)} Symbole, "
+                  f"{self.config['tick_hz']:g} Ticks/s pro Symbol")
+            sent = 0
+            try:
+                while True:
+                    await asyncio.sleep(report_sec)
+                    if gen.done():
+                        gen.result()
+                    s = self.snapshot_stats()
+                    print(f"[MOCK] {(s['ws_msgs'] - sent) / report_sec:.0f} msg/s an {s['clients']} Verbindungen, "
+                          f"{s['topics']} Topics, queued={s['queued']} dropped={s['dropped']} "
+                          f"disconnects={s['disconnects']} rest={s['rest_requests']}")
+                    sent = s["ws_msgs"]
+            finally:
+                gen.cancel()
+
+    # ---------- REST ----------
+
+    def rest(self, path: str, q: dict) -> tuple:
+        """→ (HTTP-Status, JSON-dict) für einen GET-Request."""
+        self.stats["rest_requests"] += 1
+        cfg = self.config
+        if path.startswith("/mock/"):
+            if path == "/mock/config":
+                return 200, self.update_config(q)
+            if path == "/mock/stats":
+                return 200, self.snapshot_stats()
+            return 404, {"error": "not found"}
+        if cfg["rest_latency_ms"]:
+            time.sleep(cfg["rest_latency_ms"] / 1000.0)
+        now = time.time()
+        if cfg["rest_error_rate"] and random.random() < cfg["rest_error_rate"]:
+            self.stats["rest_errors"] += 1
+            return 200, {"retCode": 10006, "retMsg": "Too many visits!", "result": {}, "time": int(now * 1000)}
+        category = q.get("category", "")
+        market = {"spot": "spot", "linear": "futures"}.get(category)
+        if market is None:
+            return 200, {"retCode": 10001, "retMsg": f"Illegal category: {category}", "result": {}}
+        if path == "/v5/market/tickers":
+            with self.paths.lock:
+                idx = [self.paths.ensure(q["symbol"].upper())] if q.get("symbol") else range(len(self.paths.symbols))
+                rows = [self.paths.ticker(i, market) for i in idx]
+            result = {"category": category, "list": rows}
+        elif path == "/v5/market/kline":
+            iv = _INTERVALS.get(q.get("interval", ""))
+            if iv is None or not q.get("symbol"):
+                return 200, {"retCode": 10001, "retMsg": "params error", "result": {}}
+            end = float(q["end"]) / 1000.0 if q.get("end") else None
+            with self.paths.lock:
+                i = self.paths.ensure(q["symbol"].upper())
+                rows = self.paths.history(i, iv, min(1000, int(q.get("limit", 200))), now, end)
+            result = {"category": category, "symbol": q["symbol"].upper(), "list": rows}
+        else:
+            return 404, {"retCode": 10001, "retMsg": "route not found", "result": {}}
+        return 200, {"retCode": 0, "retMsg": "OK", "result": result, "retExtInfo": {}, "time": int(now * 1000)}
+
+    def serve_rest(self, host: str = MOCK_HOST, port: int = MOCK_REST_PORT) -> ThreadingHTTPServer:
+        ex = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-Alive wie die requests.Session des Bots
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                status, payload = ex.rest(url.path, {k: v[-1] for k, v in parse_qs(url.query).items()})
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        server.handle_error = lambda request, client_address: None  # Verbindungsabbrüche der Clients sind normal
+        threading.Thread(target=server.serve_forever, daemon=True, name="MockREST").start()
+        print(f"[MOCK] REST auf http://{host}:{port} (/v5/market/kline, /v5/market/tickers, /mock/config, /mock/stats)")
+        return server
+
+
+def start_in_thread(host: str = MOCK_HOST, ws_port: int = MOCK_WS_PORT, rest_port: int = MOCK_REST_PORT,
+                    **kwargs) -> MockExchange:
+    """Mock im eigenen Thread samt Event-Loop starten (für Benchmarks im selben Prozess)."""
+    ex = MockExchange(**kwargs)
+    ex.serve_rest(host, rest_port)
+    threading.Thread(target=lambda: asyncio.run(ex.serve_ws(host, ws_port)), daemon=True, name="MockWS").start()
+    return ex
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default=MOCK_HOST)
+    ap.add_argument("--ws-port", type=int, default=MOCK_WS_PORT)
+    ap.add_argument("--rest-port", type=int, default=MOCK_REST_PORT)
+    ap.add_argument("--symbols", type=int, default=MOCK_SYMBOLS)
+    ap.add_argument("--tick-hz", type=float, default=MOCK_TICK_HZ, help="Ticker-Updates pro Symbol und Sekunde")
+    ap.add_argument("--burst", default=MOCK_BURST, help="periode:dauer:faktor[,…], z. B. 60:5:10")
+    ap.add_argument("--disconnect-sec", type=float, default=MOCK_DISCONNECT_SEC,
+                    help="mittlere Lebensdauer einer WS-Verbindung (0 = nie trennen)")
+    ap.add_argument("--latency-ms", type=float, default=MOCK_LATENCY_MS)
+    ap.add_argument("--jitter-ms", type=float, default=MOCK_JITTER_MS)
+    ap.add_argument("--rest-latency-ms", type=float, default=MOCK_REST_LATENCY_MS)
+    ap.add_argument("--rest-error-rate", type=float, default=MOCK_REST_ERROR_RATE)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--symbols-file", help="Symbolliste für UNIVERSE_SYMBOLS=@datei schreiben")
+    args = ap.parse_args()
+
+    ex = MockExchange(args.symbols, args.tick_hz, args.burst, args.disconnect_sec, args.latency_ms, args.jitter_ms,
+                      args.rest_latency_ms, args.rest_error_rate, args.seed)
+    if args.symbols_file:
+        with open(args.symbols_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(ex.paths.symbols) + "\n")
+        print(f"[MOCK] Symbolliste → {args.symbols_file} (UNIVERSE_SYMBOLS=@{args.symbols_file})")
+    ex.serve_rest(args.host, args.rest_port)
+    try:
+        asyncio.run(ex.serve_ws(args.host, args.ws_port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
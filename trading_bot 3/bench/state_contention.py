@@ -0,0 +1,97 @@
+"""
+Contention-Benchmark für SharedState: ein globaler Lock vs. Lock-Striping.
+
+Zwei Feed-Threads (spot/futures) schreiben Ticks und schließen regelmäßig Kerzen,
+parallel lesen ein Scanner-Thread (Kerzen + Indikatoren pro Symbol) und ein
+Dashboard-Thread (snapshot()). Gemessen: Ticks/s und p99-Latenz von upsert_tick.
+
+    python -m bench.state_contention [--seconds 3] [--symbols 50,500] [--stripes 0,16]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+
+from core.shared_state import SharedState
+
+INTERVAL = 300
+TICKS_PER_CANDLE = 20
+
+
+def _feed(state, market, symbols, stop, lat, counts):
+    rng = random.Random(hash(market))
+    price = {s: 100.0 for s in symbols}
+    n = 0
+    while not stop.is_set():
+        sym = symbols[rng.randrange(len(symbols))]
+        p = price[sym] = price[sym] * (1.0 + rng.uniform(-0.001, 0.001))
+        t0 = time.perf_counter()
+        state.upsert_tick(market, sym, p, time.time())
+        lat.append(time.perf_counter() - t0)
+        n += 1
+        if n % TICKS_PER_CANDLE == 0:
+            state.add_candle(market, sym, INTERVAL, {"start_ts": n, "open": p, "high": p * 1.001,
+                                                      "low": p * 0.999, "close": p, "volume": 1.0})
+    counts[market] = n
+
+
+def _scanner(state, symbols, stop, counts):
+    n = 0
+    while not stop.is_set():
+        for sym in symbols:
+            state.get_candle_view("futures", sym, INTERVAL, 20)
+            state.get_indicators("futures", sym, INTERVAL)
+        n += 1
+    counts["scan"] = n
+
+
+def _reader(state, stop, counts):
+    n = 0
+    while not stop.is_set():
+        state.snapshot()
+        n += 1
+        time.sleep(0.01)
+    counts["snapshot"] = n
+
+
+def run(n_symbols: int, stripes: int, seconds: float) -> dict:
+    state = SharedState(lock_stripes=stripes)
+    symbols = [f"SYM{i}USDT" for i in range(n_symbols)]
+    stop = threading.Event()
+    lat, counts = [], {}
+    threads = [threading.Thread(target=_feed, args=(state, m, symbols, stop, lat, counts)) for m in ("spot", "futures")]
+    threads += [threading.Thread(target=_scanner, args=(state, symbols, stop, counts)),
+                threading.Thread(target=_reader, args=(state, stop, counts))]
+    for th in threads:
+        th.start()
+    time.sleep(seconds)
+    stop.set()
+    for th in threads:
+        th.join()
+    ticks = counts.get("spot", 0) + counts.get("futures", 0)
+    arr = np.array(lat) * 1e6
+    return {"symbols": n_symbols, "stripes": stripes, "ticks_per_s": ticks / seconds,
+            "p50_us": float(np.percentile(arr, 50)) if arr.size else 0.0,
+            "p99_us": float(np.percentile(arr, 99)) if arr.size else 0.0,
+            "scans": counts.get("scan", 0), "snapshots": counts.get("snapshot", 0)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--symbols", default="50,500")
+    ap.add_argument("--stripes", default="0,16")
+    args = ap.parse_args()
+    print(f"{'symbols':>8} {'stripes':>8} {'ticks/s':>10} {'p50 µs':>8} {'p99 µs':>8} {'scans':>7} {'snaps':>6}")
+    for n in (int(x) for x in args.symbols.split(",")):
+        for s in (int(x) for x in args.stripes.split(",")):
+            r = run(n, s, args.seconds)
+            print(f"{r['symbols']:>8} {r['stripes']:>8} {r['ticks_per_s']:>10.0f} {r['p50_us']:>8.1f} "
+                  f"{r['p99_us']:>8.1f} {r['scans']:>7} {r['snapshots']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+Benchmark-Suite für die Hot Paths – wiederholbare Zahlen mit gespeicherter Baseline.
+
+Gemessen (Minimum über --repeat Proben – das Minimum ist auf geteilten Maschinen am stabilsten, alles in µs pro Aufruf bzw. pro Symbol):
+
+    upsert_tick                   ein Tick inkl. Scan-Trigger und Exit-Engine-Listener
+    aggregate_ticks               ein Aufruf nach einer Tick-Runde über das Universum (inkl. Bar-Schluss)
+    features_from_ticks           scanner._features_from_ticks pro Symbol
+    scan_cycle                    aggregate_ticks + Batch-Scan + Entscheidung/Eröffnung + Timeouts
+    decide_trade                  simple_decision.decide_trade pro Kandidat
+    check_and_close_all           Timeout-Pfad (Exit-Engine) / _full mit Sweep über alle offenen Trades
+    publish_snapshot              SharedState.publish() mit allen Ticks geändert (Basis von snapshot())
+    api_snapshot                  GET /api/snapshot (Serialisierung + gzip, Cache-Miss) über Flask
+
+Parametrisiert über Universumsgröße, Kerzen-Historie und Zahl offener Trades; jeder Benchmark
+trägt nur die Dimensionen im Schlüssel, von denen er abhängt. Läuft isoliert wie der Backtest
+(SimClock, State/Engines zurückgesetzt, keine Agent-Snapshots, kein Candle-Cache).
+
+    python -m bench.suite                          # messen + mit bench/baselines/default.json vergleichen
+    python -m bench.suite --save                   # Ergebnis als Baseline speichern (ergänzt vorhandene)
+    python -m bench.suite --only scan_cycle,decide_trade --sizes 500 --threshold 0.1
+
+Exit-Code 1, wenn ein Wert mehr als --threshold über der Baseline liegt.
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from core import clock, scanner
+from core.ai import online_rl
+from core.backtest.data import synthetic
+from core.backtest.engine import _reset
+from core.candle_store import CandleStore, CandleView
+from core.decision_engine.simple_decision import decide_trade
+from core.paper_trader import check_and_close_all, open_position
+from core.scanner.batch import BatchScanner
+from core.shared_state import shared_state, CANDLE_HISTORY_LEN
+from core.time_aggregation import aggregate_ticks
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+INTERVAL = 300
+T0 = 1704067200.0 + 240  # eine Minute vor einer Bar-Grenze – aggregate_ticks schließt dann im Lauf eine Bar
+CAPITAL = 150.0
+TRADE_MARGIN = 0.01
+MIN_SAMPLE_SEC = float(os.getenv("BENCH_MIN_SAMPLE_SEC", "0.1"))
+MAX_SAMPLE_SEC = float(os.getenv("BENCH_MAX_SAMPLE_SEC", "2.0"))
+
+
+def _measure(once, repeat: int) -> float:
+    """
+    once() → (Sekunden gemessen, Operationen). Jede Probe sammelt mindestens MIN_SAMPLE_SEC
+    gemessene Zeit (höchstens MAX_SAMPLE_SEC Wanduhr inkl. Vorbereitung). Ergebnis ist die
+    schnellste Probe in µs pro Operation (Störungen machen nur langsamer). GC ist während der Messung aus (wie timeit).
+    """
+    once()  # Aufwärmen
+    samples = []
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            spent = ops = 0
+            wall = time.perf_counter()
+            while spent < MIN_SAMPLE_SEC and (not ops or time.perf_counter() - wall < MAX_SAMPLE_SEC):
+                e, o = once()
+                spent += e
+                ops += o
+            samples.append(spent / max(1, ops))
+    finally:
+        if gc_was:
+            gc.enable()
+    return round(min(samples) * 1e6, 3)
+
+
+class Case:
+    """Ein Parameter-Satz: Universum mit Historie, Ticks auf beiden Märkten und n_open offenen Trades."""
+
+    def __init__(self, n: int, hist: int, n_open: int, sim: clock.SimClock, seed: int = 1):
+        self.n, self.hist, self.n_open, self.sim = n, hist, n_open, sim
+        self.symbols = [f"SYM{i:04d}USDT" for i in range(n)]
+        self.rng = np.random.default_rng(seed)
+        _reset(CAPITAL, seed, None)
+        shared_state.candles_history = CandleStore(capacity=max(hist, CANDLE_HISTORY_LEN))
+        data = synthetic(self.symbols, hist, INTERVAL, seed, start_ts=int(T0 // INTERVAL * INTERVAL) - hist * INTERVAL)
+        for sym in self.symbols:
+            shared_state.merge_candles("futures", sym, INTERVAL, CandleView(data[sym]), prefer_new=True)
+        self.prices = np.array([data[s][4, -1] for s in self.symbols])
+        sim.set(T0)
+        self.tick_all()
+        for sym in self.symbols:
+            scanner._features_from_ticks(sym)  # erste Bewertung setzt nur 'prev' – danach volle Features
+        shared_state.daycap_total = CAPITAL + n_open * TRADE_MARGIN
+        for i in range(n_open):
+            sym = self.symbols[i % n]
+            # weite TP/SL, "conservative" ohne Timeout – die Trades bleiben während der Messung offen
+            open_position(sym, "buy" if i % 2 else "sell", "futures", float(self.prices[i % n]), margin=TRADE_MARGIN,
+                          leverage=1.0, tp_pct=50.0, sl_pct=50.0, features={}, strategy="conservative")
+
+    def move(self, scale: float = 0.001):
+        self.prices = self.prices * np.exp(self.rng.normal(0, scale, self.n))
+
+    def tick_all(self):
+        items = list(zip(self.symbols, self.prices.tolist()))
+        now = clock.now()
+        shared_state.upsert_ticks("futures", items, now)
+        shared_state.upsert_ticks("spot", items, now)
+
+
+# ---------- Benchmarks: (case, repeat) → µs ----------
+
+def bench_upsert_tick(c: Case, repeat: int) -> float:
+    def once():
+        c.move()
+        now, items = clock.now(), list(zip(c.symbols, c.prices.tolist()))
+        t0 = time.perf_counter()
+        for sym, price in items:
+            shared_state.upsert_tick("futures", sym, price, now)
+        return time.perf_counter() - t0, c.n
+    return _measure(once, repeat)
+
+
+def bench_aggregate_ticks(c: Case, repeat: int) -> float:
+    # alle 2.5 s eine Tick-Runde – über eine Probe hinweg fallen anteilig auch Bar-Schlüsse in die Messung
+    def once():
+        c.sim.advance(2.5)
+        c.move()
+        c.tick_all()
+        t0 = time.perf_counter()
+        aggregate_ticks()
+        return time.perf_counter() - t0, 1
+    return _measure(once, repeat)
+
+
+def bench_features_from_ticks(c: Case, repeat: int) -> float:
+    def once():
+        c.move()
+        c.tick_all()
+        t0 = time.perf_counter()
+        for sym in c.symbols:
+            scanner._features_from_ticks(sym)
+        return time.perf_counter() - t0, c.n
+    return _measure(once, repeat)
+
+
+def bench_scan_cycle(c: Case, repeat: int) -> float:
+    batch = BatchScanner(c.symbols, min_candles=scanner.MIN_CANDLE_COUNT, volume_period=scanner.VOLUME_AVG_PERIOD,
+                         volatility_threshold=scanner.SCALPER_VOLATILITY_THRESHOLD)
+
+    def once():
+        c.sim.advance(1.0)
+        c.move(0.003)
+        c.tick_all()
+        t0 = time.perf_counter()
+        aggregate_ticks()
+        scalper_coins, conservative_coins = scanner._collect_candidates(batch, c.symbols, 5)
+        scanner._trade_candidates(scalper_coins, conservative_coins, 5, scanner.MARGIN_PER_TRADE)
+        check_and_close_all()
+        return time.perf_counter() - t0, 1
+    return _measure(once, repeat)
+
+
+def bench_decide_trade(c: Case, repeat: int) -> float:
+    c.move(0.003)
+    c.tick_all()
+    feats = []
+    for sym in c.symbols:
+        f = scanner._features_from_ticks(sym)
+        if f:
+            f["symbol"] = sym
+            feats.append(f)
+    agent = online_rl.agent
+
+    def once():
+        t0 = time.perf_counter()
+        for f in feats:
+            decide_trade(f, agent, "scalper")
+        return time.perf_counter() - t0, len(feats)
+    return _measure(once, repeat)
+
+
+def _bench_check_and_close(c: Case, repeat: int, full_sweep: bool) -> float:
+    def once():
+        t0 = time.perf_counter()
+        for _ in range(100):
+            check_and_close_all(full_sweep)
+        return time.perf_counter() - t0, 100
+    return _measure(once, repeat)
+
+
+def bench_check_and_close_all(c: Case, repeat: int) -> float:
+    return _bench_check_and_close(c, repeat, False)
+
+
+def bench_check_and_close_all_full(c: Case, repeat: int) -> float:
+    return _bench_check_and_close(c, repeat, True)
+
+
+def bench_publish_snapshot(c: Case, repeat: int) -> float:
+    def once():
+        c.move()
+        c.tick_all()
+        t0 = time.perf_counter()
+        shared_state.publish()
+        return time.perf_counter() - t0, 1
+    return _measure(once, repeat)
+
+
+def bench_api_snapshot(c: Case, repeat: int) -> float:
+    from dashboard import webapp
+    client = webapp.server.test_client()
+
+    def once():
+        c.move()
+        c.tick_all()
+        shared_state.publish()  # neue Version → Cache-Miss, die Antwort wird neu serialisiert
+        t0 = time.perf_counter()
+        r = client.get("/api/snapshot", headers={"Accept-Encoding": "gzip"})
+        elapsed = time.perf_counter() - t0
+        assert r.status_code == 200, r.status_code
+        return elapsed, 1
+    return _measure(once, repeat)
+
+
+# name → (Funktion, Dimensionen im Schlüssel)
+BENCHES = {
+    "upsert_tick": (bench_upsert_tick, ("n",)),
+    "aggregate_ticks": (bench_aggregate_ticks, ("n",)),
+    "features_from_ticks": (bench_features_from_ticks, ("n", "hist")),
+    "scan_cycle": (bench_scan_cycle, ("n", "hist")),
+    "decide_trade": (bench_decide_trade, ("n", "hist")),
+    "check_and_close_all": (bench_check_and_close_all, ("open",)),
+    "check_and_close_all_full": (bench_check_and_close_all_full, ("open",)),
+    "publish_snapshot": (bench_publish_snapshot, ("n", "open")),
+    "api_snapshot": (bench_api_snapshot, ("n", "open")),
+}
+
+
+def key_for(name: str, params: dict) -> str:
+    dims = BENCHES[name][1]
+    return f"{name}[{','.join(f'{d}={params[d]}' for d in dims)}]"
+
+
+@contextlib.contextmanager
+def _isolated():
+    """Wie Backtest.run: SimClock, keine Persistenz/Listener, Logs der Trades unterdrückt; danach Live-Zustand zurück."""
+    persist, listeners = online_rl.RL_PERSIST, shared_state.candle_listeners
+    try:
+        online_rl.RL_PERSIST = False
+        shared_state.candle_listeners = []
+        with clock.use_clock(clock.SimClock(T0)) as sim, open(os.devnull, "w") as devnull, \
+                contextlib.redirect_stdout(devnull):
+            yield sim
+    finally:
+        online_rl.RL_PERSIST = persist
+        shared_state.candle_listeners = listeners
+        _reset(CAPITAL, 0, None)
+
+
+def run(sizes, histories, opens, only=None, repeat: int = 5, out=sys.stdout) -> dict:
+    names = [n for n in BENCHES if not only or n in only]
+    results = {}
+    with _isolated() as sim:
+        for n in sizes:
+            for hist in histories:
+                for n_open in opens:
+                    params = {"n": n, "hist": hist, "open": n_open}
+                    todo = [name for name in names if key_for(name, params) not in results]
+                    if not todo:
+                        continue
+                    for name in todo:
+                        # jeder Benchmark auf frischem State – Trades/Bars eines Laufs verfälschen sonst den nächsten
+                        case = Case(n, hist, n_open, sim)
+                        key = key_for(name, params)
+                        try:
+                            results[key] = BENCHES[name][0](case, repeat)
+                        except ImportError as e:
+                            print(f"[BENCH] {key} übersprungen: {e}", file=out)
+                            continue
+                        print(f"[BENCH] {key:<48} {results[key]:>12.2f} µs", file=out)
+    return results
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: dict):
+    base = load_baseline(path)
+    merged = dict(base.get("results", {}), **results)
+    meta = {"created": datetime.datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+            "numpy": np.__version__, "machine": platform.machine(), "cpus": os.cpu_count(), "unit": "us"}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": dict(sorted(merged.items()))}, f, indent=1)
+        f.write("\n")
+
+
+def compare(results: dict, baseline: dict, threshold: float, out=sys.stdout) -> list:
+    """Tabelle gegen die Baseline; liefert die Schlüssel mit Regression (> threshold langsamer)."""
+    base = baseline.get("results", {})
+    regressions = []
+    print(f"\n{'benchmark':<48} {'baseline':>12} {'jetzt':>12} {'Δ':>8}", file=out)
+    for key, val in results.items():
+        ref = base.get(key)
+        if not ref:
+            print(f"{key:<48} {'–':>12} {val:>12.2f} {'neu':>8}", file=out)
+            continue
+        delta = val / ref - 1
+        flag = ""
+        if delta > threshold:
+            flag = "  ← REGRESSION"
+            regressions.append(key)
+        elif delta < -threshold:
+            flag = "  ← schneller"
+        print(f"{key:<48} {ref:>12.2f} {val:>12.2f} {delta * 100:>+7.1f}%{flag}", file=out)
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default="50,500,2000", help="Universumsgrößen")
+    ap.add_argument("--history", default="200,1000", help="Kerzen pro Symbol (5m) – mehrere Längen, damit Historien-Abhängigkeit sichtbar wird")
+    ap.add_argument("--open-trades", default="0,500", help="offene Trades")
+    ap.add_argument("--only", help="kommagetrennte Benchmark-Namen")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--baseline", default="default", help="Name unter bench/baselines/ oder Pfad zu einer JSON-Datei")
+    ap.add_argument("--threshold", type=float, default=0.25, help="erlaubte Verlangsamung (0.25 = 25 %%)")
+    ap.add_argument("--save", action="store_true", help="Ergebnis als Baseline speichern")
+    args = ap.parse_args()
+
+    only = set(args.only.split(",")) if args.only else None
+    unknown = (only or set()) - set(BENCHES)
+    if unknown:
+        ap.error(f"unbekannte Benchmarks: {', '.join(sorted(unknown))} (verfügbar: {', '.join(BENCHES)})")
+    path = args.baseline if args.baseline.endswith(".json") else os.path.join(BASELINE_DIR, f"{args.baseline}.json")
+    results = run([int(x) for x in args.sizes.split(",")], [int(x) for x in args.history.split(",")],
+                  [int(x) for x in args.open_trades.split(",")], only, args.repeat)
+
+    if args.save:
+        save_baseline(path, results)
+        print(f"\n[BENCH] Baseline gespeichert: {path} ({len(results)} Werte)")
+        return
+    baseline = load_baseline(path)
+    if not baseline:
+        print(f"\n[BENCH] Keine Baseline unter {path} – mit --save anlegen")
+        return
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n[BENCH] {len(regressions)} Regression(en) über {args.threshold * 100:.0f} %")
+        sys.exit(1)
+    print(f"\n[BENCH] Keine Regression über {args.threshold * 100:.0f} %")
+
+
+if __name__ == "__main__":
+    main()
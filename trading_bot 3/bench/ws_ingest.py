@@ -0,0 +1,71 @@
+"""
+Microbenchmark für den WS-Ingest: synthetische Bybit-v5-Ticker-Nachrichten durch
+spot_ws._on_message / futures_ws._on_message (Decode → parse → upsert_ticks).
+Berichtet Nachrichten/s pro Feed und Decoder (json / orjson, falls installiert).
+
+    python -m bench.ws_ingest [--messages 200000] [--symbols 300] [--unchanged 0.5]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from core.shared_state import shared_state
+from core.ws_client import codec, common, futures_ws, spot_ws
+
+
+def make_messages(n: int, n_symbols: int, unchanged: float, futures: bool, seed: int = 1):
+    rng = random.Random(seed)
+    symbols = [f"SYM{i}USDT" for i in range(n_symbols)]
+    price = {s: 100.0 for s in symbols}
+    out = []
+    for k in range(n):
+        sym = symbols[rng.randrange(n_symbols)]
+        if rng.random() >= unchanged:
+            price[sym] = round(price[sym] * (1.0 + rng.uniform(-0.002, 0.002)), 4)
+        data = {"symbol": sym, "lastPrice": str(price[sym]), "volume24h": "12345.6", "turnover24h": "999999.1",
+                "highPrice24h": "110.0", "lowPrice24h": "90.0", "prevPrice24h": "100.0", "price24hPcnt": "0.01"}
+        if futures:
+            data.update({"markPrice": str(price[sym]), "indexPrice": str(price[sym]), "fundingRate": "0.0001",
+                         "openInterest": "5000", "bid1Price": str(price[sym]), "ask1Price": str(price[sym])})
+        out.append(json.dumps({"topic": f"tickers.{sym}", "ts": 1700000000000 + k, "type": "snapshot",
+                               "cs": k, "data": data}))
+    return out
+
+
+def run(feed: str, messages, decoder) -> float:
+    mod = spot_ws if feed == "spot" else futures_ws
+    orig = common.loads  # beide Feeds decodieren in ws_client.common
+    common.loads = decoder
+    shared_state.ticks.clear()
+    try:
+        on_message = mod._on_message
+        t0 = time.perf_counter()
+        for msg in messages:
+            on_message(None, msg)
+        dt = time.perf_counter() - t0
+    finally:
+        common.loads = orig
+    return len(messages) / dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--messages", type=int, default=200000)
+    ap.add_argument("--symbols", type=int, default=300)
+    ap.add_argument("--unchanged", type=float, default=0.5, help="Anteil Nachrichten ohne Preisänderung")
+    args = ap.parse_args()
+
+    decoders = {"json": json.loads}
+    if codec.DECODER == "orjson":
+        decoders["orjson"] = codec.loads
+    print(f"{'feed':>8} {'decoder':>8} {'msgs/s':>10}")
+    for feed in ("spot", "futures"):
+        msgs = make_messages(args.messages, args.symbols, args.unchanged, futures=(feed == "futures"))
+        for name, dec in decoders.items():
+            print(f"{feed:>8} {name:>8} {run(feed, msgs, dec):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
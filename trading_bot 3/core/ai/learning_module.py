@@ -1,7 +1,7 @@
 import os, pickle, json, hashlib, time, random
 import numpy as np
-import talib 
-import pandas as pd
+from core import clock
+from core.pattern_engine import pattern_signals, candle_signal
 
 MODEL_PATH = "models/rl_model.pkl"
 STATE_PATH = "data/curriculum_state.json"
@@ -24,34 +24,19 @@ class RLAgent:
     def get_mtf_trend_placeholder(self):
         return random.uniform(-0.1, 0.3)
 
-    def get_candlestick_signal(self, candles: list):
-        if len(candles) < 2:
-            return 0
-        
-        df_candles = pd.DataFrame(candles)
-        
-        opens = np.array(df_candles['open'].tolist())
-        highs = np.array(df_candles['high'].tolist())
-        lows = np.array(df_candles['low'].tolist())
-        closes = np.array(df_candles['close'].tolist())
-
-        engulfing = talib.CDLENGULFING(opens, highs, lows, closes)
-        harami = talib.CDLHARAMI(opens, highs, lows, closes)
-        
-        if engulfing[-1] > 0:
-            return 2 
-        if harami[-1] > 0:
-            return 1 
-        if engulfing[-1] < 0:
-            return -2
-            
-        return 0
+    def get_candlestick_signal(self, candles: list, patterns: dict = None):
+        # Gleiche Muster wie die Decision-Engine (Pattern Engine), nur die letzte Bar
+        if patterns is None:
+            if len(candles) < 2:
+                return 0
+            patterns = pattern_signals(candles, ("engulfing", "harami"))
+        return candle_signal(patterns)
 
     def get_action_and_leverage(self, features: dict):
         trend = float(features.get("trend", 0.0))
         vol = float(features.get("vol", 0.0))
         
-        candle_signal = self.get_candlestick_signal(features.get("candles", []))
+        candle_signal = self.get_candlestick_signal(features.get("candles", []), features.get("patterns"))
 
         # 1. EXPLORATION (Zufall)
         if self.knowledge < 50.0 and random.random() < self.exploration_chance:
@@ -71,13 +56,19 @@ class RLAgent:
             return None, None
 
         # 3. RISIKOBEWERTUNG (Leverage)
-        base_leverage = 2.0
-        performance_boost = max(0.0, self.performance_ewm * 5.0)
-        volatility_penalty = 0.03 * vol
-        
-        opt_leverage = max(1.0, min(10.0, base_leverage + performance_boost - volatility_penalty))
+        opt_leverage = float(self.dynamic_leverage(vol, base_leverage=2.0))
         
         return action, round(opt_leverage, 2)
+
+    def dynamic_leverage(self, vol, base_leverage: float = 2.0):
+        """Basis + Performance-Boost - Volatilitäts-Abschlag, begrenzt auf 1..10. vol: Zahl oder NumPy-Array."""
+        performance_boost = max(0.0, self.performance_ewm * 5.0)
+        volatility_penalty = 0.03 * np.asarray(vol, dtype=float)
+        return np.clip(base_leverage + performance_boost - volatility_penalty, 1.0, 10.0)
+
+    def get_dynamic_leverage(self, features: dict, base_leverage: float = 2.0) -> float:
+        # Von simple_decision.decide_trade aufgerufen (fehlte bisher → AttributeError bei jedem Signal)
+        return float(self.dynamic_leverage(float(features.get("vol", 0.0)), base_leverage))
     
     def get_dynamic_margin(self, strategy: str, current_total_cap: float) -> float:
         """
@@ -134,7 +125,7 @@ class RLAgent:
             self.xp_to_next = min(1000.0, self.xp_to_next * 1.25)
         self.performance_ewm = (1-self.alpha)*self.performance_ewm + self.alpha * r
         self.knowledge = min(100.0, self.knowledge + xp_gain*0.05)
-        self.last_learn_ts = time.time()
+        self.last_learn_ts = clock.now()
 
     def save(self):
         os.makedirs("models", exist_ok=True)
@@ -1,7 +1,10 @@
 import os, json, time, threading
+from core import clock
 from core.ai.learning_module import RLAgent
 
 EXPERIENCE_PATH = "data/experience.jsonl"
+# Backtests schalten das Schreiben von Agent-Snapshot und Experience-Log ab
+RL_PERSIST = os.getenv("RL_PERSIST", "1") == "1"
 agent = RLAgent.load()
 _buffer = []
 _last_save = 0.0
@@ -9,12 +12,13 @@ _last_save = 0.0
 def add_experience(symbol, market, action, reward, features):
     global _last_save
     exp = {
-        "ts": time.time(),
+        "ts": clock.now(),
         "symbol": symbol,
         "market": market,
         "action": action,
         "reward": float(reward),
-        "features": {k: (features or {}).get(k) for k in ("trend","vol","atr_pct")}
+        "features": {k: (features or {}).get(k) for k in ("trend","vol","atr_pct")},
+        "bar": (features or {}).get("bar") or {}  # Feature-Vektor der Pipeline zum Einstieg
     }
     _buffer.append(exp)
     if len(_buffer) > 500:
@@ -22,14 +26,15 @@ def add_experience(symbol, market, action, reward, features):
 
     agent.consider_xp(reward=float(reward), features={"symbol":symbol,"market":market, **exp["features"]})
 
-    now = time.time()
-    if now - _last_save > 10:
-        agent.save()
-        _last_save = now
+    if RL_PERSIST:
+        now = clock.now()
+        if now - _last_save > 10:
+            agent.save()
+            _last_save = now
 
-    os.makedirs("data", exist_ok=True)
-    with open(EXPERIENCE_PATH, "a") as f:
-        json.dump(exp, f); f.write("\n")
+        os.makedirs("data", exist_ok=True)
+        with open(EXPERIENCE_PATH, "a") as f:
+            json.dump(exp, f); f.write("\n")
 
     print(f"[ONLINE_RL] learn reward={reward:+.3f} xp={agent.xp:.1f}/{agent.xp_to_next:.0f} lvl={agent.level}")
 
@@ -1,7 +1,11 @@
 import numpy as np
+from core.candle_store import as_candle_view
+
 def zscore_from_close(bars, n=60):
-    if not bars or len(bars)<30: return None
-    close = np.array([b["c"] for b in list(bars)[-n:]], dtype=float)
+    # bars: CandleView/CandleRing (z. B. shared_state.get_candle_view) oder Liste von Kerzen-Dicts
+    view = as_candle_view(bars)
+    if len(view)<30: return None
+    close = view.close[-n:]
     rets = np.diff(close)
     if len(rets)<10: return None
     mu, sd = rets.mean(), rets.std()+1e-9
@@ -0,0 +1,241 @@
+"""
+Backfill – lädt historische Klines für das Universum parallel, während die WS-Feeds schon laufen.
+
+- eine requests.Session mit Keep-Alive-Pool (Größe = Parallelität)
+- begrenzte Parallelität (ThreadPoolExecutor) + Token-Bucket für Bybits IP-Limit
+  (öffentliche Market-Endpoints: 600 Requests / 5 s; Default bleibt weit darunter)
+- Retry mit exponentiellem Backoff + Jitter bei Netzwerkfehlern, HTTP 429/5xx und retCode 10006
+- Spot und Futures; Kerzen werden per merge_candles eingepflegt, weil Live-Kerzen
+  schon vor dem Backfill im Ring liegen können
+- Intervalle aus BACKFILL_INTERVALS: 5m für den Scanner, 15m/1h für den MTF-Trend
+  (bar_engine.MTF_TREND_TFS) – aus Ticks allein stünde mtf_trend nach dem Kaltstart stundenlang auf 0
+- nur die Lücke laden: liegen schon Kerzen im Ring (Candle-Cache), wird limit auf die Bars ab
+  der ältesten fehlenden Kerze im Fenster begrenzt bzw. der Request ganz übersprungen
+- mehr Bars als eine Seite (Bybit: höchstens 1000 pro Request) werden über 'end' rückwärts geblättert
+- Fortschritt alle ~10 % im Log und über Backfill.progress()
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.shared_state import shared_state
+
+BYBIT_REST_URL = os.getenv("BYBIT_REST_URL", "https://api.bybit.com").rstrip("/")
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "8"))
+BACKFILL_RATE_PER_SEC = float(os.getenv("BACKFILL_RATE_PER_SEC", "20"))
+BACKFILL_BURST = int(os.getenv("BACKFILL_BURST", "40"))
+BACKFILL_RETRIES = int(os.getenv("BACKFILL_RETRIES", "4"))
+BACKFILL_MARKETS = tuple(m.strip() for m in os.getenv("BACKFILL_MARKETS", "futures").split(",") if m.strip())
+BACKFILL_PAGE_LIMIT = int(os.getenv("BACKFILL_PAGE_LIMIT", "1000"))  # Bybit-Maximum für /v5/market/kline
+LIMIT = 200
+INTERVAL_SEC = 300
+BACKFILL_INTERVALS = tuple(int(x) for x in os.getenv("BACKFILL_INTERVALS", "300,900,3600").split(",") if x.strip())
+
+_CATEGORY = {"futures": "linear", "spot": "spot"}
+_RETRY_CODES = {10006, 10016}  # Too many visits / Server-Fehler
+
+
+class TokenBucket:
+    """Thread-sicherer Token-Bucket: rate Tokens/s, höchstens burst auf Vorrat."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.burst = float(max(1, burst))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _RetryableError(Exception):
+    pass
+
+
+def make_session(pool_size: int) -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def parse_klines(rows, interval_sec: int, now: float = None) -> list:
+    """
+    Bybit-Kline-Liste (neueste zuerst) → Kerzen-Dicts alt → neu.
+    Die noch laufende Kerze (start_ts + interval > now) wird verworfen – die kommt vom Live-Feed.
+    """
+    now = time.time() if now is None else now
+    out = []
+    for item in reversed(rows or []):
+        # Format: [timestamp_ms, open, high, low, close, volume, turnover]
+        if len(item) < 6:
+            continue
+        start_ts = int(item[0]) // 1000
+        if start_ts + interval_sec > now:
+            continue
+        out.append({"start_ts": start_ts, "open": float(item[1]), "high": float(item[2]),
+                    "low": float(item[3]), "close": float(item[4]), "volume": float(item[5])})
+    return out
+
+
+class Backfill:
+    def __init__(self, universe, markets=BACKFILL_MARKETS, intervals=BACKFILL_INTERVALS, limit=LIMIT,
+                 concurrency=BACKFILL_CONCURRENCY, rate=BACKFILL_RATE_PER_SEC, burst=BACKFILL_BURST,
+                 retries=BACKFILL_RETRIES, base_url=None, state=None, page_limit=BACKFILL_PAGE_LIMIT):
+        # Basis-Intervall zuerst – der Scanner braucht es vor den MTF-Timeframes
+        self.jobs = [(m, s, int(iv)) for iv in intervals for m in markets for s in universe]
+        self.limit = limit
+        self.page_limit = max(2, int(page_limit))
+        self.concurrency = max(1, int(concurrency))
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.base_url = (base_url or BYBIT_REST_URL).rstrip("/")
+        self.state = state or shared_state
+        self.session = make_session(self.concurrency)
+        self.done = 0
+        self.ok = 0
+        self.failed = []
+        self.requests = 0
+        self.retried = 0
+        self.skipped = 0
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self._lock = threading.Lock()
+
+    def progress(self) -> dict:
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {"total": len(self.jobs), "done": self.done, "ok": self.ok, "failed": len(self.failed),
+                    "requests": self.requests, "retried": self.retried, "skipped": self.skipped,
+                    "elapsed": round(end - self.started_at, 3) if self.started_at else 0.0,
+                    "finished": bool(self.finished_at)}
+
+    def _gap(self, market: str, symbol: str, interval: int) -> int:
+        """
+        Anzahl Bars ab der ältesten fehlenden Kerze im Fenster der letzten 'limit' abgeschlossenen
+        Bars bis jetzt (0 = vollständig). Löcher mitten im Ring zählen mit, nicht nur die Lücke
+        hinter der neuesten Kerze – der Scanner braucht das ganze Fenster lückenlos.
+        """
+        step = interval
+        last_closed = int(time.time()) // step * step - step
+        first = last_closed - (self.limit - 1) * step
+        have = set(self.state.get_candle_view(market, symbol, step).start_ts.astype(int).tolist())
+        for i, ts in enumerate(range(first, last_closed + step, step)):
+            if ts not in have:
+                return self.limit - i
+        return 0
+
+    def _fetch(self, market: str, symbol: str, interval: int = INTERVAL_SEC, limit: int = None) -> list:
+        """
+        Die letzten 'limit' abgeschlossenen Kerzen (alt → neu). Größere Fenster als page_limit
+        werden seitenweise rückwärts geladen (end = älteste Kerze der Vorseite - 1 ms).
+        """
+        limit = limit or self.limit
+        out, end_ms = [], None
+        while len(out) < limit:
+            # erste Seite: +1 für die laufende Kerze, die parse_klines wieder verwirft
+            want = min(self.page_limit, limit - len(out) + (1 if end_ms is None else 0))
+            params = {"category": _CATEGORY[market], "symbol": symbol,
+                      "interval": str(interval // 60), "limit": want}
+            if end_ms is not None:
+                params["end"] = end_ms
+            rows = self._request(params)
+            if not rows:
+                break
+            out = parse_klines(rows, interval) + out
+            if len(rows) < want:
+                break  # Anfang der Historie erreicht
+            end_ms = min(int(r[0]) for r in rows) - 1
+        return out[-limit:]
+
+    def _request(self, params: dict) -> list:
+        """Ein Kline-Request mit Token-Bucket und Retry; liefert die rohe Liste (neueste zuerst)."""
+        url = f"{self.base_url}/v5/market/kline"
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            with self._lock:
+                self.requests += 1
+            try:
+                r = self.session.get(url, params=params, timeout=10)
+                if r.status_code == 429 or r.status_code >= 500:
+                    raise _RetryableError(f"HTTP {r.status_code}")
+                r.raise_for_status()
+                data = r.json()
+                code = data.get("retCode")
+                if code in _RETRY_CODES:
+                    raise _RetryableError(f"retCode {code}: {data.get('retMsg')}")
+                if code != 0:
+                    raise ValueError(f"retCode {code}: {data.get('retMsg', 'Unbekannter Fehler')}")
+                return data.get("result", {}).get("list") or []
+            except (_RetryableError, requests.exceptions.RequestException) as e:
+                if attempt >= self.retries:
+                    raise
+                with self._lock:
+                    self.retried += 1
+                time.sleep(random.uniform(0, min(8.0, 0.25 * (2 ** attempt))) + 0.05)
+
+    def _job(self, market: str, symbol: str, interval: int) -> int:
+        gap = self._gap(market, symbol, interval)
+        if gap == 0:
+            with self._lock:
+                self.skipped += 1
+            return 0
+        candles = self._fetch(market, symbol, interval, gap)
+        if candles:
+            self.state.merge_candles(market, symbol, interval, candles)
+        return len(candles)
+
+    def run(self) -> dict:
+        total = len(self.jobs)
+        self.started_at = time.time()
+        print(f"[BACKFILL] Starte {total} Jobs ({self.concurrency} parallel, "
+              f"{self.bucket.rate:.0f} req/s, {self.base_url})")
+        step = max(1, total // 10)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="Backfill") as ex:
+            futs = {ex.submit(self._job, *job): job for job in self.jobs}
+            for fut in as_completed(futs):
+                m, s, iv = futs[fut]
+                try:
+                    fut.result()
+                    ok = True
+                except Exception as e:
+                    ok = False
+                    print(f"[BACKFILL] ❌ {s} ({m}, {iv // 60}m): {e}")
+                with self._lock:
+                    self.done += 1
+                    if ok:
+                        self.ok += 1
+                    else:
+                        self.failed.append((m, s, iv))
+                    done = self.done
+                if done % step == 0 or done == total:
+                    p = self.progress()
+                    print(f"[BACKFILL] {done}/{total} ({done * 100 // max(1, total)}%) ok={p['ok']} "
+                          f"fail={p['failed']} retries={p['retried']} {p['elapsed']:.1f}s")
+        self.finished_at = time.time()
+        self.session.close()
+        return self.progress()
+
+
+def start_backfill_thread(universe, **kw) -> Backfill:
+    """Backfill im Hintergrund starten (Feeds laufen parallel weiter)."""
+    bf = Backfill(universe, **kw)
+    threading.Thread(target=bf.run, daemon=True, name="Backfill").start()
+    return bf
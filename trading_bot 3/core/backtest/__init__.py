@@ -0,0 +1,2 @@
+from .engine import Backtest, align, summarize
+from .data import load_cache, synthetic
@@ -0,0 +1,46 @@
+"""
+Backtest über den Live-Pfad (Scanner → Paper-Trader) mit simulierter Uhr.
+
+    python -m core.backtest [--source synthetic|cache] [--symbols 50] [--days 30] [--per-symbol]
+"""
+
+import argparse
+
+from core.backtest import Backtest, load_cache, synthetic
+from core.scanner import BASE_UNIVERSE
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--source", choices=("synthetic", "cache"), default="synthetic")
+    ap.add_argument("--symbols", type=int, default=50)
+    ap.add_argument("--days", type=float, default=30.0, help="nur für --source synthetic")
+    ap.add_argument("--interval", type=int, default=300)
+    ap.add_argument("--capital", type=float, default=150.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--per-symbol", action="store_true", help="Scanner ohne BatchScanner (Einzelpfad pro Symbol)")
+    ap.add_argument("--trades", type=int, default=10, help="so viele letzte Trades ausgeben")
+    ap.add_argument("--verbose", action="store_true", help="Ausgaben von Scanner/Paper-Trader zeigen")
+    args = ap.parse_args()
+
+    symbols = BASE_UNIVERSE[:args.symbols]
+    if args.source == "cache":
+        data = load_cache(symbols, interval=args.interval)
+    else:
+        data = synthetic(symbols, int(args.days * 86400 / args.interval), args.interval, seed=args.seed)
+    if not data:
+        print("[BACKTEST] Keine Daten gefunden")
+        return
+
+    res = Backtest(data, interval=args.interval, capital=args.capital, batch_mode=not args.per_symbol,
+                   seed=args.seed, verbose=args.verbose).run()
+    for t in res["trades"][-args.trades:] if args.trades > 0 else ():
+        print(f"[TRADE] {t['id']} {t['market']:<7} {t['side']:<4} {t['symbol']:<10} {t['strategy']:<12} "
+              f"{t['exit_reason']:<7} pnl={t['pnl']:+.4f}")
+    print("[BACKTEST] Ergebnis:")
+    for k, v in res["stats"].items():
+        print(f"  {k:<18} {v}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Backtest-Engine – spielt historische Kerzen so schnell wie möglich durch den echten Live-Pfad.
+
+Pro Bar und Symbol werden vier Ticks erzeugt (Open, Low/High bzw. High/Low je nach
+Richtung, Close) und gebündelt über shared_state.upsert_ticks eingespielt; das Bar-Volumen
+kommt als steigender 24h-Stand über upsert_volumes. Der erste Markt ist der Feed (alle
+Symbole, daraus entstehen die Bars); weitere Märkte (spot) bekommen ihre Ticks nur für
+Symbole mit offenem Trade dort – mehr braucht die Exit-Engine nicht. Die BarEngine baut im
+Backtest nur das Daten-Intervall und die Vielfachen davon (5m/15m/1h) – 1m/3m liest weder
+Scanner noch Entscheidung, und ohne sie halbiert sich die Zahl der Kerzen pro Bar. Damit laufen exakt die Live-Komponenten:
+BarEngine (aggregate_ticks) → Indikatoren/Features → Scanner (_collect_candidates,
+decide_batch) → open_position, Exits tickgetrieben über die Exit-Engine und Timeouts über
+check_and_close_all. Die Zeit liefert eine SimClock – es wird nie gewartet.
+
+State, Bar-/Exit-Engine, Caches und der RL-Agent werden vor jedem Lauf zurückgesetzt;
+Agent-Snapshots und Experience-Log werden im Backtest nicht geschrieben.
+"""
+
+import contextlib
+import itertools
+import math
+import os
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+from core import clock
+from core.shared_state import shared_state
+from core.candle_store import CandleStore
+from core.indicator_engine import IndicatorEngine
+from core.scan_trigger import ScanTrigger
+from core.ai import online_rl
+from core.ai.learning_module import RLAgent
+from core import paper_trader
+from core.paper_trader import check_and_close_all, exit_engine
+from core.time_aggregation import aggregate_ticks, bar_engine, TIMEFRAMES
+from core.time_aggregation.bar_engine import BAR_CLOSE_GRACE_SEC
+from core.features.pipeline import feature_pipeline
+from core.pattern_engine import pattern_engine
+from core import scanner
+from core.scanner.batch import BatchScanner
+
+TICK_OFFSETS = (0.0, 0.3, 0.6, 0.99)  # Tick-Zeitpunkte innerhalb der Bar (Anteil des Intervalls)
+TRADE_FIELDS = ("id", "market", "symbol", "side", "strategy", "entry_price", "exit_price", "qty", "leverage",
+                "margin_used", "tp", "sl", "pnl", "timestamp", "close_ts", "exit_reason")
+
+
+def _reset(capital: float, seed: int, timeframes):
+    s = shared_state
+    with s.all_locks():
+        s.ticks.clear()
+        s._dirty_ticks = [set() for _ in s._stripes]  # sonst sucht der nächste publish() gelöschte Ticks
+        s.candles_history = CandleStore(capacity=s.candles_history.capacity)
+        s.indicators = IndicatorEngine()
+        s.scan_trigger = ScanTrigger()
+        s.open_trades.clear()
+        s.closed_trades = deque()  # unbegrenzt – der Backtest braucht jeden Trade
+        s.hot_coins = []
+        s.latency_ms = 0
+        s.feed_latency_ms = {m: 0 for m in s.feed_latency_ms}
+        s.total_profit = s.total_loss = 0.0
+        s.daycap_total, s.daycap_used = float(capital), 0.0
+    bar_engine.reset(timeframes)
+    exit_engine.reset()
+    feature_pipeline.clear()
+    pattern_engine.clear()
+    online_rl.agent.__dict__.update(RLAgent().__dict__)
+    online_rl._buffer.clear()
+    paper_trader._id_counter = itertools.count(1)
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def _unrealized(prices: dict) -> float:
+    total = 0.0
+    with shared_state.trade_lock:
+        for t in shared_state.open_trades.values():
+            price = prices.get(t["symbol"])
+            if price is None:
+                continue
+            entry = float(t["entry_price"])
+            diff = price - entry if t["side"] == "buy" else entry - price
+            total += diff * float(t["qty"])
+    return total
+
+
+def summarize(trades: list, equity: np.ndarray, capital: float, interval: int) -> dict:
+    pnl = np.array([t["pnl"] for t in trades], dtype=float)
+    wins, losses = pnl[pnl > 0], pnl[pnl < 0]
+    eq = equity[:, 1] if len(equity) else np.array([capital])
+    peak = np.maximum.accumulate(eq)
+    rets = np.diff(eq) / np.maximum(eq[:-1], 1e-9) if len(eq) > 1 else np.zeros(0)
+    sharpe = float(rets.mean() / rets.std() * math.sqrt(365 * 86400 / interval)) if len(rets) and rets.std() > 0 else 0.0
+    reasons = {}
+    for t in trades:
+        reasons[t.get("exit_reason")] = reasons.get(t.get("exit_reason"), 0) + 1
+    return {
+        "trades": len(trades),
+        "win_rate": round(len(wins) / len(pnl), 4) if len(pnl) else 0.0,
+        "pnl_total": round(float(pnl.sum()), 4),
+        "pnl_avg": round(float(pnl.mean()), 4) if len(pnl) else 0.0,
+        "profit_factor": round(float(wins.sum() / -losses.sum()), 4) if len(losses) and losses.sum() < 0 else None,
+        "max_drawdown": round(float((peak - eq).max()), 4),
+        "max_drawdown_pct": round(float(((peak - eq) / np.maximum(peak, 1e-9)).max() * 100), 4),
+        "final_equity": round(float(eq[-1]), 4),
+        "return_pct": round(float((eq[-1] / capital - 1) * 100), 4),
+        "sharpe": round(sharpe, 4),
+        "exit_reasons": reasons,
+    }
+
+
+def align(data: dict) -> tuple:
+    """{symbol: (6, N)} → (symbole, zeitachse (T,), ohlcv (5, S, T)); fehlende Bars eines Symbols bleiben NaN."""
+    symbols = sorted(data)
+    timeline = np.unique(np.concatenate([data[s][0] for s in symbols])) if symbols else np.zeros(0)
+    ohlcv = np.full((5, len(symbols), len(timeline)), np.nan)
+    for i, sym in enumerate(symbols):
+        rows = data[sym]
+        ohlcv[:, i, np.searchsorted(timeline, rows[0])] = rows[1:6]
+    return symbols, timeline, ohlcv
+
+
+class Backtest:
+    def __init__(self, data: dict, interval: int = 300, capital: float = 150.0, markets=("futures", "spot"),
+                 max_open_per_scan: int = 5, margin_per_trade: float = scanner.MARGIN_PER_TRADE,
+                 batch_mode: bool = True, timeframes=None, seed: int = 0, verbose: bool = False):
+        """
+        data: {symbol: (6, N)-Array (start_ts, open, high, low, close, volume)} – siehe core.backtest.data –
+              oder schon ausgerichtet als align()-Tupel (z. B. per mmap geteilt, wird nur gelesen).
+        markets: Feed-Markt zuerst; weitere Märkte bekommen Ticks nur für offene Trades (der Scanner
+        eröffnet auf spot und futures).
+        batch_mode: Scanner wie in start.py über den BatchScanner, sonst der Einzelpfad pro Symbol.
+        """
+        if interval not in TIMEFRAMES:
+            raise ValueError(f"Intervall {interval}s wird von der BarEngine nicht gebaut ({TIMEFRAMES})")
+        self.interval = int(interval)
+        self.timeframes = tuple(timeframes or (tf for tf in TIMEFRAMES if tf % interval == 0))
+        self.capital = float(capital)
+        self.markets = tuple(markets)
+        self.max_open_per_scan = max_open_per_scan
+        self.margin_per_trade = margin_per_trade
+        self.batch_mode = batch_mode
+        self.seed = seed
+        self.verbose = verbose
+        self.symbols, self.timeline, self.ohlcv = data if isinstance(data, tuple) else align(data)
+        self.symbols = list(self.symbols)
+
+    def _tick_path(self, t: int) -> np.ndarray:
+        """(4, S)-Preise der vier Ticks von Bar t: Open, Extrem gegen die Richtung, Extrem mit der Richtung, Close."""
+        o, h, l, c = self.ohlcv[0, :, t], self.ohlcv[1, :, t], self.ohlcv[2, :, t], self.ohlcv[3, :, t]
+        up = c >= o
+        return np.vstack([o, np.where(up, l, h), np.where(up, h, l), c])
+
+    def run(self) -> dict:
+        """Ganzen Zeitraum abspielen. Liefert {"trades", "equity" ((T, 2): ts, equity), "stats"}."""
+        persist, listeners, tfs = online_rl.RL_PERSIST, shared_state.candle_listeners, bar_engine.timeframes
+        sim = clock.SimClock(self.timeline[0] if len(self.timeline) else 0.0)
+        t0 = time.perf_counter()
+        try:
+            online_rl.RL_PERSIST = False
+            shared_state.candle_listeners = []  # kein Candle-Cache o. Ä. im Backtest
+            with contextlib.ExitStack() as stack:
+                stack.enter_context(clock.use_clock(sim))
+                if not self.verbose:
+                    stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+                _reset(self.capital, self.seed, self.timeframes)
+                equity, ticks = self._replay(sim)
+        finally:
+            online_rl.RL_PERSIST = persist
+            shared_state.candle_listeners = listeners
+            bar_engine.reset(tfs)
+        elapsed = time.perf_counter() - t0
+
+        trades = [{k: t.get(k) for k in TRADE_FIELDS} for t in shared_state.closed_trades]
+        stats = summarize(trades, equity, self.capital, self.interval)
+        stats.update({"open_at_end": len(shared_state.open_trades), "symbols": len(self.symbols),
+                      "bars": len(self.timeline), "ticks": ticks, "elapsed_s": round(elapsed, 3),
+                      "bars_per_s": round(len(self.timeline) * len(self.symbols) / max(elapsed, 1e-9), 1)})
+        return {"trades": trades, "equity": equity, "stats": stats}
+
+    def _replay(self, sim):
+        syms, iv, feed = self.symbols, self.interval, self.markets[0]
+        batch = BatchScanner(syms, min_candles=scanner.MIN_CANDLE_COUNT, volume_period=scanner.VOLUME_AVG_PERIOD,
+                             volatility_threshold=scanner.SCALPER_VOLATILITY_THRESHOLD) if self.batch_mode else None
+        cum_vol = np.zeros(len(syms))
+        equity = np.zeros((len(self.timeline), 2))
+        ticks = 0
+        if len(self.timeline):
+            # Erster 24h-Stand ist nur die Basis – danach trägt jede Bar ihr Volumen als Delta bei
+            shared_state.upsert_volumes(feed, [(s, 0.0, math.nan) for s in syms], float(self.timeline[0]))
+
+        for t, ts in enumerate(self.timeline):
+            ts = float(ts)
+            path = self._tick_path(t)
+            live = np.flatnonzero(~np.isnan(path[0]))
+            present = [syms[i] for i in live]
+            with shared_state.trade_lock:
+                held = {(t["market"], t["symbol"]) for t in shared_state.open_trades.values()}
+            mirror = [(m, [i for i in live if (m, syms[i]) in held]) for m in self.markets[1:]]
+            for k, off in enumerate(TICK_OFFSETS):
+                tts = ts + off * iv
+                sim.set(tts)
+                prices = path[k]
+                ticks += shared_state.upsert_ticks(feed, list(zip(present, prices[live].tolist())), tts)
+                for market, rows in mirror:
+                    if rows:
+                        ticks += shared_state.upsert_ticks(market, [(syms[i], float(prices[i])) for i in rows], tts)
+            vol = self.ohlcv[4, live, t]
+            ok = ~np.isnan(vol)
+            cum_vol[live[ok]] += vol[ok]
+            shared_state.upsert_volumes(feed, [(syms[i], float(cum_vol[i]), math.nan) for i in live[ok]], tts)
+
+            # Bar-Ende: BarEngine schließt die Bars, dann ein Scanner-Zyklus wie im Live-Betrieb
+            sim.set(ts + iv + BAR_CLOSE_GRACE_SEC)
+            exit_engine.drain()  # Exits der Bar schließen, bevor der Scanner neue Margin vergibt
+            aggregate_ticks()
+            scalper_coins, conservative_coins = scanner._collect_candidates(batch, present, self.max_open_per_scan)
+            scanner._trade_candidates(scalper_coins, conservative_coins, self.max_open_per_scan, self.margin_per_trade)
+            check_and_close_all()
+
+            close = dict(zip(present, path[3, live].tolist()))
+            realized = shared_state.total_profit + shared_state.total_loss
+            equity[t] = (ts + iv, self.capital + realized + _unrealized(close))
+        return equity, ticks
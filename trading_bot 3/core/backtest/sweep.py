@@ -0,0 +1,289 @@
+"""
+Parameter-Sweep – viele isolierte Backtests über die Strategie-Konstanten, parallel im Prozess-Pool.
+
+- Suchraum: pro Parameter eine Werteliste (Grid: kartesisches Produkt) oder ein Bereich
+  [lo, hi] (Random-Search: gleichverteilt, ganzzahlig wenn beide Grenzen int sind; Listen
+  werden dort zufällig gewählt). Die Stichprobe hängt nur vom Seed ab – ein Neustart zieht
+  dieselben Konfigurationen.
+- Daten: einmal ausgerichtet (engine.align) als .npy ins Sweep-Verzeichnis geschrieben; die
+  Worker öffnen sie per mmap (read-only) – nichts davon wird an die Worker gepickelt.
+- Jede Konfiguration läuft in einem Worker-Prozess mit eigenem State; die Parameter werden als
+  Modul-Globals gesetzt und danach zurückgesetzt.
+- Ergebnisse landen zeilenweise in results.jsonl (sofort nach jedem Lauf); resume überspringt
+  alles, was dort schon steht. ranking.csv ist die nach --metric sortierte Tabelle.
+
+    python -m core.backtest.sweep --param TRADING_THRESHOLD=0.1,0.2,0.3 --param BASE_LEVERAGE=3,5
+    python -m core.backtest.sweep --random 200 --param TRADING_THRESHOLD=0.05:0.5 --param VOLUME_AVG_PERIOD=10:40
+"""
+
+import argparse
+import csv
+import hashlib
+import importlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+
+import numpy as np
+
+from core.backtest.data import load_cache, synthetic
+from core.backtest.engine import Backtest, align
+
+SWEEP_DIR = os.getenv("SWEEP_DIR", "data/sweeps")
+
+# Parametername → (Modul, Global)
+PARAMS = {
+    "TRADING_THRESHOLD": ("core.decision_engine.simple_decision", "TRADING_THRESHOLD"),
+    "BASE_LEVERAGE": ("core.decision_engine.simple_decision", "BASE_LEVERAGE"),
+    "MIN_PROFIT_THRESHOLD_PCT": ("core.decision_engine.simple_decision", "MIN_PROFIT_THRESHOLD_PCT"),
+    "SCALPER_VOLATILITY_THRESHOLD": ("core.scanner", "SCALPER_VOLATILITY_THRESHOLD"),
+    "VOLUME_AVG_PERIOD": ("core.scanner", "VOLUME_AVG_PERIOD"),
+    "TRAILING_STOP_OFFSET_PCT": ("core.paper_trader", "TRAILING_STOP_OFFSET_PCT"),
+}
+# Kennzahlen, bei denen kleiner besser ist
+LOWER_IS_BETTER = {"max_drawdown", "max_drawdown_pct"}
+
+
+# ---------- Suchraum ----------
+
+def grid(space: dict) -> list:
+    names = sorted(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+
+
+def sample(space: dict, n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        cfg = {}
+        for name in sorted(space):
+            spec = space[name]
+            if isinstance(spec, tuple):
+                lo, hi = spec
+                cfg[name] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else round(rng.uniform(lo, hi), 6)
+            else:
+                cfg[name] = rng.choice(spec)
+        out.append(cfg)
+    return out
+
+
+def config_id(params: dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _num(s: str):
+    try:
+        return int(s)
+    except ValueError:
+        return float(s)
+
+
+def parse_param(arg: str) -> tuple:
+    """'NAME=a,b,c' → Werteliste, 'NAME=lo:hi' → Bereich (nur Random-Search)."""
+    name, _, spec = arg.partition("=")
+    name = name.strip().upper()
+    if name not in PARAMS:
+        raise ValueError(f"Unbekannter Parameter {name} (bekannt: {', '.join(PARAMS)})")
+    if ":" in spec:
+        lo, hi = (_num(x) for x in spec.split(":", 1))
+        return name, (lo, hi)
+    return name, [_num(x) for x in spec.split(",") if x.strip()]
+
+
+# ---------- Worker ----------
+
+_DATA = None  # (symbole, zeitachse, ohlcv) – pro Worker einmal per mmap geöffnet
+
+
+def _init_worker(data_dir: str):
+    global _DATA
+    with open(os.path.join(data_dir, "symbols.json")) as f:
+        symbols = json.load(f)
+    _DATA = (symbols, np.load(os.path.join(data_dir, "timeline.npy")),
+             np.load(os.path.join(data_dir, "ohlcv.npy"), mmap_mode="r"))
+
+
+def apply_params(params: dict) -> dict:
+    """Modul-Globals setzen; liefert die vorherigen Werte (zum Zurücksetzen)."""
+    old = {}
+    for name, value in params.items():
+        mod_name, attr = PARAMS[name]
+        mod = importlib.import_module(mod_name)
+        old[name] = getattr(mod, attr)
+        setattr(mod, attr, value)
+    return old
+
+
+def _run_one(job: dict) -> dict:
+    params = job["params"]
+    t0 = time.perf_counter()
+    old = apply_params(params)
+    try:
+        stats = Backtest(_DATA, **job["backtest"]).run()["stats"]
+        error = None
+    except Exception as e:
+        stats, error = {}, f"{type(e).__name__}: {e}"
+    finally:
+        apply_params(old)
+    return {"id": job["id"], "params": params, "stats": stats, "error": error,
+            "elapsed_s": round(time.perf_counter() - t0, 3), "pid": os.getpid()}
+
+
+# ---------- Runner ----------
+
+class Sweep:
+    def __init__(self, out_dir: str, data: dict, data_spec: dict, backtest: dict = None,
+                 metric: str = "pnl_total", workers: int = None):
+        """
+        out_dir: Sweep-Verzeichnis (Daten, results.jsonl, ranking.csv, meta.json).
+        data_spec: Beschreibung der Daten (Quelle, Symbole, Tage, Seed) – resume nur bei gleicher Spec.
+        backtest: zusätzliche Argumente für Backtest (capital, batch_mode, ...).
+        """
+        self.out_dir = out_dir
+        self.data = data
+        self.data_spec = dict(data_spec)
+        self.backtest = dict(backtest or {})
+        self.metric = metric
+        self.workers = workers or os.cpu_count() or 1
+        self.results_path = os.path.join(out_dir, "results.jsonl")
+
+    def _prepare(self, resume: bool) -> dict:
+        os.makedirs(self.out_dir, exist_ok=True)
+        meta_path = os.path.join(self.out_dir, "meta.json")
+        meta = {"data": self.data_spec, "backtest": self.backtest}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                prev = json.load(f)
+            if resume and prev != meta:
+                raise SystemExit(f"[SWEEP] {self.out_dir} gehört zu anderen Daten/Backtest-Argumenten – "
+                                 f"neuen --name nehmen oder mit --no-resume neu starten")
+        if not resume and os.path.exists(self.results_path):
+            os.remove(self.results_path)
+        with open(meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+
+        symbols, timeline, ohlcv = align(self.data)
+        np.save(os.path.join(self.out_dir, "timeline.npy"), timeline)
+        np.save(os.path.join(self.out_dir, "ohlcv.npy"), ohlcv)
+        with open(os.path.join(self.out_dir, "symbols.json"), "w") as f:
+            json.dump(symbols, f)
+        return self.load_results()
+
+    def load_results(self) -> dict:
+        done = {}
+        if os.path.exists(self.results_path):
+            with open(self.results_path) as f:
+                for line in f:
+                    try:
+                        r = json.loads(line)
+                    except ValueError:
+                        continue  # abgebrochene letzte Zeile
+                    if not r.get("error"):
+                        done[r["id"]] = r  # Fehlläufe werden beim resume wiederholt
+        return done
+
+    def run(self, configs: list, resume: bool = True) -> list:
+        done = self._prepare(resume)
+        jobs, seen = [], set(done)
+        for params in configs:
+            cid = config_id(params)
+            if cid in seen:
+                continue
+            seen.add(cid)
+            jobs.append({"id": cid, "params": params, "backtest": self.backtest})
+        print(f"[SWEEP] {len(configs)} Konfigurationen, {len(configs) - len(jobs)} schon erledigt, "
+              f"{len(jobs)} laufen auf {self.workers} Prozessen")
+
+        t0 = time.perf_counter()
+        if jobs:
+            with mp.get_context("spawn").Pool(min(self.workers, len(jobs)), initializer=_init_worker,
+                                              initargs=(self.out_dir,)) as pool, \
+                    open(self.results_path, "a") as out:
+                for i, r in enumerate(pool.imap_unordered(_run_one, jobs), 1):
+                    out.write(json.dumps(r) + "\n")
+                    out.flush()
+                    done[r["id"]] = r
+                    val = r["stats"].get(self.metric) if not r["error"] else r["error"]
+                    print(f"[SWEEP] {i}/{len(jobs)} {r['id']} {self.metric}={val} ({r['elapsed_s']:.1f}s)")
+        wanted = {config_id(p) for p in configs}
+        ranked = self.rank([r for cid, r in done.items() if cid in wanted])
+        self.write_table(ranked)
+        print(f"[SWEEP] fertig in {time.perf_counter() - t0:.1f}s → {os.path.join(self.out_dir, 'ranking.csv')}")
+        return ranked
+
+    def rank(self, results: list) -> list:
+        sign = 1.0 if self.metric in LOWER_IS_BETTER else -1.0
+        ok = [r for r in results if not r.get("error") and r["stats"].get(self.metric) is not None]
+        return sorted(ok, key=lambda r: sign * r["stats"][self.metric])
+
+    def write_table(self, ranked: list):
+        if not ranked:
+            return
+        names = sorted({k for r in ranked for k in r["params"]})
+        cols = ("pnl_total", "return_pct", "sharpe", "max_drawdown_pct", "win_rate", "profit_factor", "trades")
+        with open(os.path.join(self.out_dir, "ranking.csv"), "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["rank", "id", *names, *cols])
+            for i, r in enumerate(ranked, 1):
+                w.writerow([i, r["id"], *(r["params"].get(n) for n in names), *(r["stats"].get(c) for c in cols)])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--param", action="append", default=[], help="NAME=a,b,c (Werte) oder NAME=lo:hi (Bereich)")
+    ap.add_argument("--space", help="JSON-Datei {NAME: [werte] | {\"lo\": x, \"hi\": y}}")
+    ap.add_argument("--random", type=int, default=0, help="N zufällige Konfigurationen statt Grid")
+    ap.add_argument("--seed", type=int, default=0, help="Seed für Random-Search und synthetische Daten")
+    ap.add_argument("--name", default="default", help=f"Sweep-Verzeichnis unter {SWEEP_DIR}")
+    ap.add_argument("--no-resume", action="store_true", help="vorhandene Ergebnisse verwerfen")
+    ap.add_argument("--workers", type=int, default=None, help="Prozesse (Default: alle Kerne)")
+    ap.add_argument("--metric", default="pnl_total", help="Rang-Kennzahl aus den Backtest-Stats")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--source", choices=("synthetic", "cache"), default="synthetic")
+    ap.add_argument("--symbols", type=int, default=50)
+    ap.add_argument("--days", type=float, default=30.0)
+    ap.add_argument("--capital", type=float, default=150.0)
+    args = ap.parse_args()
+
+    space = {}
+    if args.space:
+        with open(args.space) as f:
+            for name, spec in json.load(f).items():
+                if name.upper() not in PARAMS:
+                    raise SystemExit(f"[SWEEP] Unbekannter Parameter {name}")
+                space[name.upper()] = (spec["lo"], spec["hi"]) if isinstance(spec, dict) else list(spec)
+    for arg in args.param:
+        name, spec = parse_param(arg)
+        space[name] = spec
+    if not space:
+        raise SystemExit(f"[SWEEP] Kein Suchraum – --param oder --space angeben ({', '.join(PARAMS)})")
+    if args.random:
+        configs = sample(space, args.random, args.seed)
+    else:
+        ranges = [n for n, s in space.items() if isinstance(s, tuple)]
+        if ranges:
+            raise SystemExit(f"[SWEEP] Bereiche ({', '.join(ranges)}) nur mit --random")
+        configs = grid(space)
+
+    from core.scanner import BASE_UNIVERSE
+    symbols = BASE_UNIVERSE[:args.symbols]
+    spec = {"source": args.source, "symbols": symbols, "days": args.days, "seed": args.seed}
+    data = load_cache(symbols) if args.source == "cache" else synthetic(symbols, int(args.days * 86400 / 300), seed=args.seed)
+    if not data:
+        raise SystemExit("[SWEEP] Keine Daten gefunden")
+
+    sweep = Sweep(os.path.join(SWEEP_DIR, args.name), data, spec, backtest={"capital": args.capital},
+                  metric=args.metric, workers=args.workers)
+    ranked = sweep.run(configs, resume=not args.no_resume)
+    for i, r in enumerate(ranked[:args.top], 1):
+        params = " ".join(f"{k}={v}" for k, v in sorted(r["params"].items()))
+        st = r["stats"]
+        print(f"{i:>3}. {params} | pnl={st['pnl_total']:+.2f} ret={st['return_pct']:+.1f}% "
+              f"sharpe={st['sharpe']:.2f} dd={st['max_drawdown_pct']:.1f}% trades={st['trades']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
-def platt_scale(conf: float)->float:
-    conf = max(0.0, min(1.0, conf))
+import numpy as np
+
+def platt_scale(conf):
+    # Skalar oder NumPy-Array (decide_batch)
+    conf = np.clip(conf, 0.0, 1.0)
     return 0.05 + 0.9*conf
@@ -0,0 +1,178 @@
+"""
+Candle Cache – persistente Kerzen auf der Platte, eine memory-mapped Datei pro (market, symbol, interval).
+
+Layout (little endian):
+  Header  4 × uint64: MAGIC, VERSION, capacity, count (= insgesamt geschriebene Kerzen)
+  Daten   6 × capacity float64, spaltenweise wie im CandleStore (start_ts, open, high, low, close, volume),
+          Ring: Kerze Nr. k liegt an Position k % capacity
+
+Abgeschlossene Kerzen (add_candle / merge_candles) kommen über SharedState.candle_listeners
+herein und werden angehängt, sofern sie neuer als die letzte gespeicherte sind. Beim Boot
+lädt attach() alle Dateien per merge_candles (inkl. Indikator-Aufbau); der Backfill fragt
+danach nur noch die Lücke bis jetzt ab.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from core.candle_store import FIELDS, rows_to_array
+
+CANDLE_CACHE_DIR = os.getenv("CANDLE_CACHE_DIR", "data/candles")
+CANDLE_CACHE_CAPACITY = int(os.getenv("CANDLE_CACHE_CAPACITY", "1000"))
+
+MAGIC = 0x4C444E43  # "CNDL"
+VERSION = 1
+_HDR = 4
+_HDR_BYTES = _HDR * 8
+
+
+class _CacheFile:
+    __slots__ = ("path", "hdr", "data", "capacity", "last_ts")
+
+    def __init__(self, path: str, capacity: int):
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(np.array((MAGIC, VERSION, capacity, 0), dtype="<u8").tobytes())
+                f.truncate(_HDR_BYTES + len(FIELDS) * capacity * 8)
+        self.path = path
+        self._map()
+        rows = self.rows()
+        self.last_ts = float(rows[0, -1]) if rows.shape[1] else float("-inf")
+
+    def _map(self):
+        self.hdr = np.memmap(self.path, dtype="<u8", mode="r+", shape=(_HDR,))
+        if int(self.hdr[0]) != MAGIC or int(self.hdr[1]) != VERSION:
+            raise ValueError(f"Ungültige Cache-Datei: {self.path}")
+        self.capacity = int(self.hdr[2])
+        self.data = np.memmap(self.path, dtype="<f8", mode="r+", offset=_HDR_BYTES, shape=(len(FIELDS), self.capacity))
+
+    @property
+    def count(self) -> int:
+        return int(self.hdr[3])
+
+    def rows(self) -> np.ndarray:
+        """Gespeicherte Kerzen alt → neu als (6, n)-Kopie."""
+        count, cap = self.count, self.capacity
+        if count <= cap:
+            return np.array(self.data[:, :count])
+        h = count % cap
+        return np.concatenate([self.data[:, h:], self.data[:, :h]], axis=1)
+
+    def append(self, arr: np.ndarray) -> int:
+        """
+        Schreibt Kerzen (arr: (6, n), nach start_ts sortiert). Neuere werden angehängt;
+        liegt etwas vor der letzten gespeicherten Kerze (Backfill einer Lücke), wird die
+        Datei einmal sortiert neu geschrieben – bei gleichem start_ts gewinnt die neue Kerze
+        (SharedState meldet nur Kerzen, die auch im Ring stehen, z. B. ersetzte Tick-Bars durch Klines).
+        Der Normalfall dafür – bestätigte Kline mit dem start_ts der letzten Tick-Bar – überschreibt
+        nur deren Slot; neu geschrieben wird nur bei echten Lücken-Fills in der Vergangenheit.
+        """
+        count, cap = self.count, self.capacity
+        if count and arr.shape[1] and arr[0, 0] == self.last_ts:
+            self.data[:, (count - 1) % cap] = arr[:, 0]
+            arr = arr[:, 1:]
+        if arr.shape[1] and arr[0, 0] <= self.last_ts:
+            return self._rewrite(arr)
+        n = arr.shape[1]
+        if not n:
+            return 0
+        pos = (count + np.arange(n)) % cap
+        self.data[:, pos] = arr
+        self.hdr[3] = count + n  # Zähler erst nach den Daten – ein Abbruch hinterlässt keine halbe Kerze
+        self.last_ts = float(arr[0, -1])
+        return n
+
+    def _rewrite(self, arr: np.ndarray) -> int:
+        old = self.rows()
+        both = np.concatenate([arr, old], axis=1)
+        _, idx = np.unique(both[0], return_index=True)
+        rows = both[:, idx][:, -self.capacity:]
+        n, cap = rows.shape[1], self.capacity
+        # In eine Nachbardatei schreiben und per os.replace tauschen – ein Abbruch lässt die alte Datei stehen
+        data = np.full((len(FIELDS), cap), np.nan, dtype="<f8")
+        data[:, :n] = rows
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(np.array((MAGIC, VERSION, cap, n), dtype="<u8").tobytes())
+            f.write(data.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._map()  # alte Maps zeigen noch auf die ersetzte Datei
+        self.last_ts = float(rows[0, -1])
+        return max(0, n - old.shape[1])
+
+
+class CandleCache:
+    def __init__(self, root: str = CANDLE_CACHE_DIR, capacity: int = CANDLE_CACHE_CAPACITY):
+        self.root = root
+        self.capacity = int(capacity)
+        self.lock = threading.Lock()
+        self._files = {}
+        self.appended = 0
+
+    def _path(self, market, symbol, interval):
+        return os.path.join(self.root, f"{market}_{symbol}_{int(interval)}.bin")
+
+    def _file(self, market, symbol, interval) -> _CacheFile:
+        key = (market, symbol, int(interval))
+        f = self._files.get(key)
+        if f is None:
+            os.makedirs(self.root, exist_ok=True)
+            f = self._files[key] = _CacheFile(self._path(*key), self.capacity)
+        return f
+
+    def append(self, market: str, symbol: str, interval: int, candles) -> int:
+        """Listener-Signatur von SharedState.candle_listeners."""
+        arr = rows_to_array(candles)
+        arr = arr[:, ~np.isnan(arr[0])]
+        if not arr.shape[1]:
+            return 0
+        arr = arr[:, np.argsort(arr[0], kind="stable")]
+        with self.lock:
+            n = self._file(market, symbol, interval).append(arr)
+            self.appended += n
+        return n
+
+    def load(self, market: str, symbol: str, interval: int) -> np.ndarray:
+        with self.lock:
+            if not os.path.exists(self._path(market, symbol, interval)):
+                return np.empty((len(FIELDS), 0))
+            return self._file(market, symbol, interval).rows()
+
+    def keys(self):
+        if not os.path.isdir(self.root):
+            return []
+        out = []
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith(".bin"):
+                continue
+            try:
+                market, symbol, interval = name[:-4].split("_")
+                out.append((market, symbol, int(interval)))
+            except ValueError:
+                continue
+        return out
+
+    def attach(self, state) -> int:
+        """Lädt alle gecachten Kerzen in den State und hängt sich als Kerzen-Listener an."""
+        loaded = 0
+        for market, symbol, interval in self.keys():
+            try:
+                rows = self.load(market, symbol, interval)
+            except Exception as e:
+                print(f"[CACHE] ⚠ {market}:{symbol}:{interval} nicht lesbar: {e}")
+                continue
+            if rows.shape[1]:
+                tail = rows[:, -state.candles_history.capacity:]
+                state.merge_candles(market, symbol, interval,
+                                    [dict(zip(FIELDS, col)) for col in tail.T.tolist()])
+                loaded += 1
+        state.candle_listeners.append(self.append)
+        print(f"[CACHE] {loaded} Kerzen-Reihen aus {self.root} geladen")
+        return loaded
+
+
+candle_cache = CandleCache()
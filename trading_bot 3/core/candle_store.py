@@ -0,0 +1,208 @@
+"""
+Candle Store – spaltenorientierter Kerzen-Speicher.
+
+Pro (market, symbol, interval) ein Ring fester Kapazität aus zusammenhängenden
+float64-Spalten (start_ts, open, high, low, close, volume). Der Puffer fasst
+2 × capacity Kerzen und wird nur nach vorne beschrieben; ist er voll, wandern die
+neuesten capacity Kerzen in einen frisch angelegten Puffer (eine Kopie pro capacity
+Appends – so viele Schreibzugriffe wie früher die Doppelt-Schreibweise). Die geordnete
+Sicht (alt → neu) ist damit immer ein zusammenhängender Slice ohne Kopie, und eine
+einmal ausgegebene Sicht wird nie überschrieben: spätere Appends landen hinter ihr
+oder in einem neuen Puffer.
+"""
+
+import math
+import numpy as np
+
+FIELDS = ("start_ts", "open", "high", "low", "close", "volume")
+_IDX = {f: i for i, f in enumerate(FIELDS)}
+DEFAULT_CAPACITY = 200
+
+
+class CandleView:
+    """
+    Geordnete Zero-Copy-Sicht auf die Kerzen eines Rings (alt → neu).
+    Die Spalten sind NumPy-Views auf einen Pufferbereich, den der Ring nicht mehr
+    beschreibt – die Sicht ist ein stabiler Schnappschuss, auch außerhalb des Locks.
+    copy() löst sie vom (2 × capacity großen) Puffer, z. B. bevor sie lange gehalten wird.
+    Verhält sich zusätzlich wie eine Liste von Kerzen-Dicts (len, Index, Iteration).
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self, data: np.ndarray):
+        self._data = data
+
+    @property
+    def start_ts(self): return self._data[0]
+    @property
+    def open(self): return self._data[1]
+    @property
+    def high(self): return self._data[2]
+    @property
+    def low(self): return self._data[3]
+    @property
+    def close(self): return self._data[4]
+    @property
+    def volume(self): return self._data[5]
+
+    def column(self, field: str) -> np.ndarray:
+        return self._data[_IDX[field]]
+
+    def tail(self, n: int) -> "CandleView":
+        n = max(0, min(int(n), len(self)))
+        return CandleView(self._data[:, len(self) - n:])
+
+    def copy(self) -> "CandleView":
+        return CandleView(self._data.copy())
+
+    def __len__(self):
+        return self._data.shape[1]
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return CandleView(self._data[:, i])
+        return _row_to_dict(self._data[:, i])
+
+    def __iter__(self):
+        for j in range(len(self)):
+            yield _row_to_dict(self._data[:, j])
+
+    def to_dicts(self) -> list:
+        """Kompatibilitäts-Adapter: Liste von Kerzen-Dicts wie früher im deque."""
+        return [_row_to_dict(row) for row in self._data.T.tolist()]
+
+    def __repr__(self):
+        return f"CandleView(n={len(self)})"
+
+
+def _row_to_dict(row) -> dict:
+    # Fehlende Felder (NaN) werden weggelassen – wie bei den alten Dicts ohne 'volume'
+    d = {}
+    for f, v in zip(FIELDS, row):
+        v = float(v)
+        if math.isnan(v):
+            continue
+        d[f] = int(v) if f == "start_ts" else v
+    return d
+
+
+class CandleRing:
+    """Ring fester Kapazität für die Kerzen eines (market, symbol, interval)."""
+    __slots__ = ("capacity", "_buf", "_pos", "_size", "version")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = int(capacity)
+        self._buf = self._new_buf()
+        self._pos = 0   # nächste freie Spalte; die Kerzen liegen in [_pos - _size, _pos)
+        self._size = 0
+        self.version = 0  # zählt jede Änderung (append/merge/clear) – Cache-Schlüssel für abgeleitete Werte
+
+    def _new_buf(self) -> np.ndarray:
+        return np.full((len(FIELDS), 2 * self.capacity), np.nan, dtype=np.float64)
+
+    def append_row(self, start_ts, open_, high, low, close, volume=math.nan):
+        p = self._pos
+        if p == self._buf.shape[1]:
+            # Puffer voll: neueste Kerzen in einen frischen Puffer, ausgegebene Views behalten den alten
+            buf = self._new_buf()
+            n = min(self._size, self.capacity - 1)
+            buf[:, :n] = self._buf[:, p - n:p]
+            self._buf, p = buf, n
+        self._buf[:, p] = (start_ts, open_, high, low, close, volume)
+        self._pos = p + 1
+        if self._size < self.capacity:
+            self._size += 1
+        self.version += 1
+
+    def append(self, cndl: dict):
+        """Dict-kompatibles append (wie deque.append)."""
+        g = cndl.get
+        self.append_row(g("start_ts", math.nan), g("open", math.nan), g("high", math.nan),
+                        g("low", math.nan), g("close", math.nan), g("volume", math.nan))
+
+    def view(self, n: int = None) -> CandleView:
+        n = self._size if n is None else max(0, min(int(n), self._size))
+        end = self._pos
+        return CandleView(self._buf[:, end - n:end])
+
+    def last_ts(self) -> float:
+        """start_ts der neuesten Kerze (NaN bei leerem Ring)."""
+        if not self._size:
+            return math.nan
+        return float(self._buf[0, self._pos - 1])
+
+    def last(self):
+        if not self._size:
+            return None
+        return _row_to_dict(self._buf[:, self._pos - 1])
+
+    def merge(self, data: np.ndarray, prefer_new: bool = False) -> int:
+        """
+        Fügt Kerzen (6, n) außerhalb der Reihenfolge ein (z. B. REST-Backfill neben dem Live-Feed).
+        Sortiert nach start_ts, bei gleichem start_ts gewinnt die vorhandene Kerze (prefer_new: die neue),
+        Zeilen ohne start_ts entfallen. Behält die neuesten 'capacity' Kerzen. Rückgabe: neue Länge.
+        """
+        parts = [self.view()._data, np.asarray(data, dtype=np.float64)]
+        if prefer_new:
+            parts.reverse()
+        both = np.concatenate(parts, axis=1)
+        both = both[:, ~np.isnan(both[0])]
+        _, idx = np.unique(both[0], return_index=True)  # sortiert, erstes Vorkommen (= vorhanden)
+        rows = both[:, idx][:, -self.capacity:]
+        n = rows.shape[1]
+        # in einen frischen Puffer schreiben und tauschen – gehaltene Views sehen weiter den alten Stand
+        buf = self._new_buf()
+        buf[:, :n] = rows
+        self._buf, self._pos, self._size = buf, n, n
+        self.version += 1
+        return n
+
+    def clear(self):
+        self._buf, self._pos, self._size = self._new_buf(), 0, 0
+        self.version += 1
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self.view())
+
+    def __getitem__(self, i):
+        return self.view()[i]
+
+
+class CandleStore(dict):
+    """(market, symbol, interval) → CandleRing; legt fehlende Ringe wie ein defaultdict an."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        super().__init__()
+        self.capacity = int(capacity)
+
+    def __missing__(self, key):
+        ring = CandleRing(self.capacity)
+        self[key] = ring
+        return ring
+
+
+def rows_to_array(candles) -> np.ndarray:
+    """Liste von Kerzen-Dicts → (6, n)-Array in FIELDS-Reihenfolge (fehlende Felder = NaN)."""
+    return as_candle_view(candles)._data
+
+
+def as_candle_view(candles) -> CandleView:
+    """Nimmt CandleView, CandleRing oder eine Liste von Kerzen-Dicts und liefert eine CandleView."""
+    if isinstance(candles, CandleView):
+        return candles
+    if isinstance(candles, CandleRing):
+        return candles.view()
+    candles = list(candles or [])
+    data = np.full((len(FIELDS), len(candles)), np.nan, dtype=np.float64)
+    for j, c in enumerate(candles):
+        for i, f in enumerate(FIELDS):
+            v = c.get(f)
+            if v is not None:
+                data[i, j] = v
+    return CandleView(data)
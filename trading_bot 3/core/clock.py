@@ -0,0 +1,77 @@
+"""
+Clock – austauschbare Zeitquelle für die Handelslogik.
+
+Scanner, Paper-Trader, Exit-Engine, Bar-Aggregation und State lesen die Zeit über
+clock.now() / clock.sleep() statt time.time() / time.sleep(). Live läuft die
+SystemClock; Backtests setzen eine SimClock, deren Zeit der Replay vorgibt – sleep()
+springt dort nur vorwärts, statt zu warten.
+
+Reine Infrastruktur-Threads (WS-Runtime, Snapshot-Publisher, Bar-Clock, REST-Fallback)
+bleiben bewusst auf der Wanduhr.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SystemClock:
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        time.sleep(max(0.0, seconds))
+
+
+class SimClock:
+    """Simulierte Zeit: steht still, bis set()/advance()/sleep() sie weiterschiebt."""
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        return self._now
+
+    def set(self, ts: float):
+        with self._lock:
+            if ts > self._now:
+                self._now = float(ts)
+
+    def advance(self, seconds: float):
+        with self._lock:
+            self._now += max(0.0, seconds)
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+
+_clock = SystemClock()
+
+
+def now() -> float:
+    return _clock.time()
+
+
+def sleep(seconds: float):
+    _clock.sleep(seconds)
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock):
+    """Zeitquelle global tauschen; gibt die vorherige zurück."""
+    global _clock
+    prev, _clock = _clock, clock
+    return prev
+
+
+@contextmanager
+def use_clock(clock):
+    prev = set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(prev)
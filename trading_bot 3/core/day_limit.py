@@ -1,10 +1,11 @@
 import datetime
+from core import clock
 
 # Tageslimit-Startwert
 DAY_CAP_DEFAULT = 175.0
 
 def _today_key():
-    return datetime.date.today().isoformat()
+    return datetime.date.fromtimestamp(clock.now()).isoformat()
 
 def _ensure_bucket(shared_state, market: str):
     """
@@ -14,7 +15,7 @@ def _ensure_bucket(shared_state, market: str):
       - used: heute bereits verwendeter Betrag
       - cap : aktuelles Tageslimit
     """
-    with shared_state.lock:
+    with shared_state.trade_lock:
         limits = shared_state.accounts.setdefault("limits", {})
         bucket = limits.setdefault(market, {})
         # Tageswechsel → reset used und setze Basis-Cap, falls nicht vorhanden
@@ -41,7 +42,7 @@ def register_spend_today(shared_state, market: str, amount: float):
     Erhöht 'used' um amount (z. B. eingesetztes Kapital des Trades).
     """
     bucket = _ensure_bucket(shared_state, market)
-    with shared_state.lock:
+    with shared_state.trade_lock:
         bucket["used"] = float(bucket["used"]) + float(amount)
 
 def remaining_today(shared_state, market: str, _cap_param: float) -> float:
@@ -60,7 +61,7 @@ def adjust_day_cap(shared_state, market: str, _base_cap: float, profit: float):
     bucket = _ensure_bucket(shared_state, market)
     if float(profit) > 0.0:
         bonus = 0.5 * float(profit)  # +50% des Gewinns auf das Limit
-        with shared_state.lock:
+        with shared_state.trade_lock:
             bucket["cap"] = float(bucket["cap"]) + bonus
             # optionale Entlastung (kannst du entfernen, wenn du das nicht willst)
             bucket["used"] = max(0.0, float(bucket["used"]) - 0.5 * bonus)
@@ -68,7 +69,7 @@ def adjust_day_cap(shared_state, market: str, _base_cap: float, profit: float):
 # (Optional) Helper, um Status für Dashboard/Snapshots zu lesen
 def get_daycap_status(shared_state, market: str):
     bucket = _ensure_bucket(shared_state, market)
-    with shared_state.lock:
+    with shared_state.trade_lock:
         return {
             "date": bucket.get("date"),
             "used": float(bucket.get("used", 0.0)),
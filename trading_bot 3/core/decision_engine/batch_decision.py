@@ -0,0 +1,181 @@
+"""
+Batch-Entscheidung – decide_trade für alle Kandidaten einer Strategie auf einmal.
+
+decide_batch(features_matrix, strategy) rechnet dieselben Regeln wie
+simple_decision.decide_trade als Array-Operationen: RSI-/SMA-/Muster-/Volumen-Score,
+MTF-Filter, Hebel (RLAgent.dynamic_leverage), TP/SL, Margin und Pattern-Stacking.
+Zusätzlich wird pro Zeile die Fusion aus fusion_core (context_weights je Regime,
+multi_objective_adjust, platt_scale) berechnet und als fusion_confidence/fusion_action
+mitgegeben. Die Kosten sind bis auf die Ausgabe-Dicts unabhängig von der Kandidatenzahl.
+
+features_matrix: dict von Spalten (gleich lange Arrays, siehe COLUMNS) – z. B. per
+to_matrix() aus den Feature-Dicts des Scanners.
+"""
+
+import numpy as np
+import pandas as pd
+import ta.momentum as tam
+
+from core.ai.online_rl import agent as default_agent
+from core.candle_store import as_candle_view
+from core.pattern_engine import pattern_signals
+from core.decision_engine import simple_decision as sd
+from core.decision_engine.context_switch import context_weights
+from core.decision_engine.latency_guard import allow
+from core.decision_engine.meta_decision import permitted
+from core.decision_engine.objectives import multi_objective_adjust
+from core.calibration.confidence_calibrator import platt_scale
+
+MIN_CANDLES_RSI = 15
+MIN_CANDLES_SMA = 11
+MIN_CANDLES_ENGULF = 2
+
+# Spalte → Default, falls sie fehlt
+COLUMNS = {
+    "price": np.nan, "trend": 0.0, "vol": 0.0, "atr_pct": 0.01, "mtf_trend": 0.0, "volume_ratio": 1.0,
+    "rsi": np.nan, "sma": np.nan, "close": np.nan, "bars": 0, "candles_ok": False,
+    "engulfing": 0, "harami": 0,
+    # Bar-Features der Feature-Pipeline (für die Fusion)
+    "regime_flag": 0.0, "ret1": 0.0, "ret5": 0.0, "bar_vol": 0.0,
+}
+
+
+def to_matrix(feats) -> dict:
+    """Feature-Dicts (Scanner) → Spalten für decide_batch."""
+    n = len(feats)
+    cols = {k: np.full(n, v, dtype=bool if isinstance(v, bool) else float) for k, v in COLUMNS.items()}
+    cols["symbol"] = [f.get("symbol") for f in feats]
+    for i, f in enumerate(feats):
+        for k in ("price", "trend", "vol", "atr_pct", "mtf_trend", "volume_ratio", "rsi", "sma"):
+            v = f.get(k)
+            if v is not None:
+                cols[k][i] = v
+        candles = f.get("candles")
+        if candles is not None and len(candles):
+            view = as_candle_view(candles)
+            cols["bars"][i] = len(view)
+            cols["close"][i] = view.close[-1]
+            if len(view) >= MIN_CANDLES_ENGULF:
+                cols["candles_ok"][i] = not (np.isnan(view.open[-2:]).any() or np.isnan(view.close[-2:]).any())
+                # Fallbacks wie in _analyze_features, falls der Scanner RSI/SMA nicht mitgeliefert hat
+                if np.isnan(cols["rsi"][i]) and len(view) >= MIN_CANDLES_RSI:
+                    cols["rsi"][i] = tam.rsi(pd.Series(view.close), window=14).iloc[-1]
+                if np.isnan(cols["sma"][i]) and len(view) >= MIN_CANDLES_SMA:
+                    cols["sma"][i] = view.close[-10:].mean()
+                pat = f.get("patterns") or pattern_signals(view, ("engulfing", "harami"))
+                cols["engulfing"][i] = pat.get("engulfing", 0)
+                cols["harami"][i] = pat.get("harami", 0)
+        bar = f.get("bar") or {}
+        cols["regime_flag"][i] = bar.get("regime_flag", 0.0)
+        cols["ret1"][i] = bar.get("ret1", 0.0)
+        cols["ret5"][i] = bar.get("ret5", 0.0)
+        cols["bar_vol"][i] = bar.get("vol", 0.0)
+    return cols
+
+
+def _col(m, name, n):
+    v = m.get(name)
+    return np.full(n, COLUMNS[name]) if v is None else np.asarray(v)
+
+
+def score_batch(m: dict) -> np.ndarray:
+    """Analyse-Score wie simple_decision._analyze_features, NaN = keine Entscheidung möglich."""
+    n = len(m["symbol"])
+    bars = _col(m, "bars", n)
+    rsi, sma, close = _col(m, "rsi", n), _col(m, "sma", n), _col(m, "close", n)
+    eng, har = _col(m, "engulfing", n), _col(m, "harami", n)
+    vr = _col(m, "volume_ratio", n)
+
+    with np.errstate(invalid="ignore"):
+        has_rsi = (bars >= MIN_CANDLES_RSI) & ~np.isnan(rsi)
+        t = np.where(has_rsi & (rsi < 35), 0.3, 0.0) - np.where(has_rsi & (rsi > 65), 0.3, 0.0)
+        has_sma = (bars >= MIN_CANDLES_SMA) & ~np.isnan(sma)
+        t += np.where(has_sma, np.where(close > sma, 0.1, -0.1), 0.0)
+    p = np.where(eng != 0, 0.6 * eng, 0.3 * har)
+    score = (t + p) * np.maximum(1.0, vr * 0.5)
+    ok = (bars >= MIN_CANDLES_ENGULF) & _col(m, "candles_ok", n).astype(bool)
+    return np.where(ok, score, np.nan)
+
+
+def fusion_batch(m: dict, tech_signal, market_type="futures", latency_ms=0, agent=None) -> tuple:
+    """fusion_core.decide pro Zeile: (confidence, action) als Arrays."""
+    agent = agent or default_agent
+    n = len(m["symbol"])
+    if not allow(latency_ms) or not permitted():
+        return np.zeros(n), np.full(n, "HOLD", dtype=object)
+    regime = _col(m, "regime_flag", n)
+    w_hi, w_lo = context_weights(market_type, 1.0), context_weights(market_type, 0.0)
+    hi = regime >= 0.5
+    w = {k: np.where(hi, w_hi[k], w_lo[k]) for k in w_hi}
+    ai_conf = agent.get_confidence() / 100.0
+    rl01 = 0.5 + 0.5 * max(-1.0, min(1.0, agent.performance_ewm))
+    raw = (w["w_ai"] * ai_conf + w["w_rl"] * rl01 + w["w_ta"] * tech_signal
+           + w["w_se"] * 0.0 + w["w_rg"] * regime)
+    pnl_pen = np.clip(np.abs(_col(m, "ret5", n)) * 10, 0.0, 1.0)
+    vol_spike = (_col(m, "bar_vol", n) > 0.01).astype(float)
+    conf = platt_scale(multi_objective_adjust(raw, pnl_pen, vol_spike))
+    ret1 = _col(m, "ret1", n)
+    action = np.where(conf > 0.65, np.where(ret1 >= 0, "BUY", "SELL"), "HOLD").astype(object)
+    return conf, action
+
+
+def decide_batch(features_matrix, strategy: str, agent=None, market_type="futures", latency_ms=0, top_k=None) -> list:
+    """
+    Entscheidungen für alle Zeilen, absteigend nach |Score| sortiert (nur Zeilen mit Aktion).
+    Jeder Eintrag hat die Felder von decide_trade plus score/fusion_confidence/fusion_action.
+    """
+    agent = agent or default_agent
+    m = features_matrix if isinstance(features_matrix, dict) else to_matrix(features_matrix)
+    syms = m["symbol"]
+    n = len(syms)
+    if not n:
+        return []
+
+    score = score_batch(m)
+    with np.errstate(invalid="ignore"):
+        buy = score > sd.TRADING_THRESHOLD
+        sell = score < -sd.TRADING_THRESHOLD
+    # MTF-Filter
+    trend, mtf = _col(m, "trend", n), _col(m, "mtf_trend", n)
+    against = (np.abs(trend) > 0.05) & (trend * mtf < 0)
+    act = (buy | sell) & ~against
+    rows = np.flatnonzero(act)
+    if not rows.size:
+        return []
+
+    strength = np.abs(score[rows])
+    vol = _col(m, "vol", n)[rows].astype(float)
+    lev = agent.dynamic_leverage(vol, base_leverage=sd.BASE_LEVERAGE if strategy == 'conservative' else 3.0)
+    if strategy == "scalper":
+        sl_pct, tp_pct = 1.0, max(1.5, sd.MIN_PROFIT_THRESHOLD_PCT)
+        lev = np.where(vol > sd.EXTREME_VOLATILITY_THRESHOLD, 10.0, lev)
+    else:
+        sl_pct, tp_pct = 1.5, 2.5
+
+    conf = agent.get_confidence()
+    margin = np.full(rows.size, agent.get_dynamic_margin(strategy, current_total_cap=150.0))
+    # Pattern-Stacking
+    stack = (strength >= 0.8) & (conf > 70)
+    if stack.any():
+        margin = np.where(stack, margin * 1.5, margin)
+        lev = np.where(stack, np.minimum(10.0, lev * 1.2), lev)
+        print(f"[STACKING] {int(stack.sum())} Signale ≥0.8 & Konfidenz {conf:.0f} -> Boost!")
+
+    sub = {k: _col(m, k, n)[rows] for k in ("regime_flag", "ret1", "ret5", "bar_vol")}
+    sub["symbol"] = [syms[r] for r in rows]
+    f_conf, f_action = fusion_batch(sub, np.clip(strength, 0.0, 1.0), market_type, latency_ms, agent)
+
+    order = np.argsort(-strength, kind="stable")
+    if top_k is not None:
+        order = order[:top_k]
+    out = []
+    for j in order:
+        r = rows[j]
+        out.append({
+            "symbol": syms[r], "action": "buy" if buy[r] else "sell", "leverage": round(float(lev[j]), 2),
+            "tp_pct": tp_pct, "sl_pct": sl_pct, "confidence": round(conf, 3),
+            "strategy": strategy, "risk_adjusted_margin": round(float(margin[j]), 2),
+            "score": round(float(score[r]), 4), "row": int(r),
+            "fusion_confidence": round(float(f_conf[j]), 4), "fusion_action": f_action[j],
+        })
+    return out
@@ -11,6 +11,8 @@ def decide(latency_ms:int, market_type:str, features:dict,
         return {"action":"HOLD","confidence":0.0,"reason":"latency_guard"}
     if not permitted():
         return {"action":"HOLD","confidence":0.0,"reason":"meta_block"}
+    # Bar-Features aus der Feature-Pipeline (Scanner hängt sie als "bar" an), sonst flache Features
+    features = features.get("bar") or features
 
     w = context_weights(market_type, features.get("regime_flag",0.0))
     rl01 = 0.5 + 0.5*max(-1.0, min(1.0, rl_score))  # map -1..1 → 0..1
@@ -25,4 +27,4 @@ def decide(latency_ms:int, market_type:str, features:dict,
     action = "HOLD"
     if conf>0.65 and features.get("ret1",0.0)>=0: action="BUY"
     elif conf>0.65 and features.get("ret1",0.0)<0: action="SELL"
-    return {"action":action,"confidence":conf,"reason":"fusion_v1"}
+    return {"action":action,"confidence":float(conf),"reason":"fusion_v1"}
@@ -1,3 +1,6 @@
-def multi_objective_adjust(score: float, pnl_penalty: float, vol_spike_risk: float)->float:
+import numpy as np
+
+def multi_objective_adjust(score, pnl_penalty, vol_spike_risk):
+    # Skalar oder NumPy-Array (decide_batch)
     s = score - 0.2*pnl_penalty - 0.1*vol_spike_risk
-    return max(0.0, min(1.0, s))
+    return np.clip(s, 0.0, 1.0)
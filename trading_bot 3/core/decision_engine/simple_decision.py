@@ -3,6 +3,8 @@ import numpy as np
 import pandas as pd
 import ta.momentum as tam
 from core.shared_state import shared_state
+from core.candle_store import as_candle_view
+from core.pattern_engine import pattern_signals
 from core.ai.online_rl import agent, RLAgent
 
 TRADING_THRESHOLD = 0.2 
@@ -21,38 +23,35 @@ def _analyze_features(features: dict, strategy: str) -> dict:
     if len(candles) < MIN_CANDLES_ENGULF:
         return {"action": None, "score": 0.0, "details": "Not enough candles"}
 
-    df = pd.DataFrame(candles)
-    if not all(col in df.columns for col in ['open', 'high', 'low', 'close']):
+    view = as_candle_view(candles)
+    o, h, l, c = view.open, view.high, view.low, view.close
+    if np.isnan(o[-2:]).any() or np.isnan(c[-2:]).any():
          return {"action": None, "score": 0.0, "details": "Candle data incomplete"}
-         
-    df.rename(columns={'open':'Open', 'high':'High', 'low':'Low', 'close':'Close'}, inplace=True) 
 
     t_score = 0.0
     p_score = 0.0
     
     try:
-        if len(df) >= MIN_CANDLES_RSI:
-            df['RSI'] = tam.rsi(df['Close'], window=14)
-            rsi_val = df['RSI'].iloc[-1]
+        if len(view) >= MIN_CANDLES_RSI:
+            # Vom Scanner aus der Indicator-Engine geliefert; sonst (Tests, Alt-Aufrufer) neu rechnen
+            rsi_val = features.get("rsi")
+            if rsi_val is None or rsi_val != rsi_val:
+                rsi_val = tam.rsi(pd.Series(c), window=14).iloc[-1]
             if rsi_val < 35: t_score += 0.3
             if rsi_val > 65: t_score -= 0.3
             
-        if len(df) >= MIN_CANDLES_SMA:
-            df['SMA_10'] = df['Close'].rolling(window=10).mean()
-            if df['Close'].iloc[-1] > df['SMA_10'].iloc[-1]: t_score += 0.1
+        if len(view) >= MIN_CANDLES_SMA:
+            sma_val = features.get("sma")
+            if sma_val is None or sma_val != sma_val:
+                sma_val = c[-10:].mean()
+            if c[-1] > sma_val: t_score += 0.1
             else: t_score -= 0.1
 
-        if len(df) >= MIN_CANDLES_ENGULF:
-            o, h, l, c = df['Open'].values, df['High'].values, df['Low'].values, df['Close'].values
-            bull_eng = (o[-2] > c[-2]) and (o[-1] < c[-1]) and (c[-1] > o[-2]) and (o[-1] < c[-2])
-            bear_eng = (o[-2] < c[-2]) and (o[-1] > c[-1]) and (c[-1] < o[-2]) and (o[-1] > c[-2])
-            if bull_eng: p_score = 0.6
-            elif bear_eng: p_score = -0.6
-            else:
-                bull_har = (o[-2] < c[-2]) and (o[-1] > c[-1]) and (o[-1] > c[-2]) and (c[-1] < o[-2])
-                bear_har = (o[-2] > c[-2]) and (o[-1] < c[-1]) and (o[-1] < c[-2]) and (c[-1] > o[-2])
-                if bull_har: p_score = 0.3
-                elif bear_har: p_score = -0.3
+        if len(view) >= MIN_CANDLES_ENGULF:
+            # Vom Scanner aus der Pattern Engine geliefert (pro Bar gecacht); sonst für die letzte Bar auswerten
+            sig = features.get("patterns") or pattern_signals(view, ("engulfing", "harami"))
+            if sig.get("engulfing", 0): p_score = 0.6 * sig["engulfing"]
+            elif sig.get("harami", 0): p_score = 0.3 * sig["harami"]
                 
     except Exception as e:
          print(f"[ANALYZE_ERROR] {symbol}: {e}")
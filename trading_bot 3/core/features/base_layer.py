@@ -1,4 +1,14 @@
 class FeatureLayer:
     name = "base"
-    def compute(self, market:str, symbol:str, tf:int, shared_state)->dict:
+    requires = ()  # Namen der Layer, deren Ergebnis compute() als deps bekommt (FeaturePipeline)
+
+    def compute(self, market:str, symbol:str, tf:int, shared_state, view=None, deps=None)->dict:
+        """
+        view: CandleView des Schlüssels (von der Pipeline einmal geholt); ohne view liest der Layer selbst.
+        deps: {layer_name: ergebnis} der in requires genannten Layer.
+        Schlüssel mit führendem '_' sind Zwischenergebnisse für abhängige Layer, nicht Teil des Feature-Vektors.
+        """
         return {}
+
+    def _view(self, market, symbol, tf, shared_state, view):
+        return view if view is not None else shared_state.get_candle_view(market, symbol, tf)
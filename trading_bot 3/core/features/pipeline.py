@@ -0,0 +1,150 @@
+"""
+Feature-Pipeline – die Layer aus core/features als DAG, einmal pro Bar berechnet.
+
+- Layer sind Knoten; FeatureLayer.requires nennt die Layer, deren Ergebnis sie als deps
+  bekommen. Die Reihenfolge steht nach register() fest (topologisch sortiert).
+- Pro (market, symbol, tf) wird die CandleView einmal unter dem Stripe-Lock geholt
+  (Zero-Copy) und an alle Layer gereicht – kein Layer liest oder kopiert selbst.
+- Ergebnis ist ein flacher Feature-Vektor (dict), gecacht pro (market, symbol, tf,
+  start_ts der letzten Bar, Ring-Version) in einem LRU mit fester Größe. Solange keine neue
+  Bar kommt, teilen sich Scanner, fusion_core.decide und der RL-Agent denselben Vektor.
+  Der Vektor ist geteilt – Aufrufer dürfen ihn nicht verändern.
+- Laufzeit pro Layer (Aufrufe, Summe, Maximum) über timings().
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from core.shared_state import shared_state
+from core.features.price_layer import PriceLayer
+from core.features.volatility_layer import VolatilityLayer
+from core.features.regime_layer import RegimeLayer
+
+FEATURE_CACHE_SIZE = int(os.getenv("FEATURE_CACHE_SIZE", "4096"))
+FEATURE_INTERVAL = 300
+
+
+class FeaturePipeline:
+    def __init__(self, layers=(), cache_size=FEATURE_CACHE_SIZE, state=None):
+        self.state = state or shared_state
+        self.cache_size = max(1, int(cache_size))
+        self._layers = {}
+        self._order = []
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._timing = {}  # name → [aufrufe, summe_s, max_s]
+        self.hits = 0
+        self.misses = 0
+        for layer in layers:
+            self.register(layer)
+
+    # ---------- DAG ----------
+
+    def register(self, layer):
+        """Layer als Knoten aufnehmen; Abhängigkeiten müssen (spätestens später) registriert werden."""
+        with self._lock:
+            self._layers[layer.name] = layer
+            self._timing.setdefault(layer.name, [0, 0.0, 0.0])
+            self._order = self._toposort()
+            self._cache.clear()
+        return layer
+
+    def _toposort(self):
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Zyklus in der Feature-Pipeline: {' → '.join(path + [name])}")
+            layer = self._layers.get(name)
+            if layer is None:
+                return  # noch nicht registriert – der Layer bekommt dann keine deps dafür
+            state[name] = 1
+            for dep in layer.requires:
+                visit(dep, path + [name])
+            state[name] = 2
+            order.append(layer)
+
+        for name in self._layers:
+            visit(name, [])
+        return order
+
+    @property
+    def layers(self):
+        return [layer.name for layer in self._order]
+
+    # ---------- Berechnung ----------
+
+    def compute(self, market: str, symbol: str, tf: int = FEATURE_INTERVAL) -> dict:
+        """Feature-Vektor für die letzte abgeschlossene Bar (aus dem Cache, solange sie sich nicht ändert)."""
+        state = self.state
+        with state.stripe_lock(symbol):
+            ring = state.candles_history.get((market, symbol, tf))
+            if ring is None or not len(ring):
+                return {}
+            key = (market, symbol, tf, ring.last_ts(), ring.version)
+            view = ring.view()
+        with self._lock:
+            vec = self._cache.get(key)
+            if vec is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vec
+            self.misses += 1
+            order = self._order
+
+        vec, outs, timing = {}, {}, []
+        for layer in order:
+            deps = {d: outs[d] for d in layer.requires if d in outs}
+            t0 = time.perf_counter()
+            try:
+                out = layer.compute(market, symbol, tf, state, view=view, deps=deps) or {}
+            except Exception as e:
+                print(f"[FEATURES] Layer '{layer.name}' Fehler ({symbol}): {e}")
+                out = {}
+            timing.append((layer.name, time.perf_counter() - t0))
+            outs[layer.name] = out
+            for k, v in out.items():
+                if not k.startswith("_"):
+                    vec[k] = v
+
+        with self._lock:
+            for name, dt in timing:
+                t = self._timing[name]
+                t[0] += 1
+                t[1] += dt
+                if dt > t[2]:
+                    t[2] = dt
+            self._cache[key] = vec
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vec
+
+    def compute_batch(self, market: str, symbols, tf: int = FEATURE_INTERVAL) -> dict:
+        """Feature-Vektoren für eine Symbolliste: {symbol: vektor}."""
+        return {sym: self.compute(market, sym, tf) for sym in symbols}
+
+    # ---------- Metriken ----------
+
+    def timings(self) -> dict:
+        """Pro Layer: Aufrufe, Mittel und Maximum in ms (nur Cache-Misses rechnen)."""
+        with self._lock:
+            return {name: {"calls": n, "avg_ms": round(total / n * 1000, 4) if n else 0.0,
+                           "max_ms": round(mx * 1000, 4), "total_ms": round(total * 1000, 3)}
+                    for name, (n, total, mx) in self._timing.items()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache),
+                    "hit_rate": round(self.hits / total, 4) if total else 0.0, "layers": self.layers}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+feature_pipeline = FeaturePipeline([PriceLayer(), VolatilityLayer(), RegimeLayer()])
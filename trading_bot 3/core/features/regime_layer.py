@@ -1,14 +1,16 @@
 import numpy as np
 from .base_layer import FeatureLayer
 
+WINDOW = 20
+# Steigung der Regressionsgeraden über feste x = 0..WINDOW-1 als Skalarprodukt (statt np.polyfit pro Aufruf)
+_X = np.arange(WINDOW, dtype=float)
+_SLOPE_W = (_X - _X.mean()) / ((_X - _X.mean()) ** 2).sum()
+
 class RegimeLayer(FeatureLayer):
     name = "regime"
-    def compute(self, market, symbol, tf, shared_state):
-        with shared_state.lock:
-            bars = shared_state.bars[tf].get((market,symbol))
-        if not bars or len(bars)<20: return {}
-        close = np.array([b["c"] for b in list(bars)[-20:]], dtype=float)
-        x = np.arange(len(close))
-        slope = float(np.polyfit(x, close, 1)[0])
+    def compute(self, market, symbol, tf, shared_state, view=None, deps=None):
+        close = self._view(market, symbol, tf, shared_state, view).close[-WINDOW:]
+        if len(close)<WINDOW: return {}
+        slope = float(_SLOPE_W @ close)
         regime_flag = 1.0 if abs(slope)>0 else 0.0
         return {"trend": slope, "regime_flag": regime_flag}
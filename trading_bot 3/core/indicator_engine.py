@@ -0,0 +1,178 @@
+"""
+Indicator Engine – inkrementelle Indikatoren pro (market, symbol, interval).
+
+Jede abgeschlossene Kerze aktualisiert Wilder-ATR, RSI, SMA (Close) sowie
+SMA/EMA des Volumens in O(1). Die Formeln entsprechen der `ta`-Bibliothek
+(average_true_range, rsi, ema_indicator, rolling mean) auf derselben Kerzenfolge.
+"""
+
+import math
+import os
+from collections import deque
+
+ATR_PERIOD = int(os.getenv("IND_ATR_PERIOD", "14"))
+RSI_PERIOD = int(os.getenv("IND_RSI_PERIOD", "14"))
+SMA_PERIOD = int(os.getenv("IND_SMA_PERIOD", "10"))
+VOLUME_PERIOD = int(os.getenv("IND_VOLUME_PERIOD", "20"))
+
+_NAN = math.nan
+
+
+class _RollingMean:
+    """Gleitender Mittelwert über ein festes Fenster; NaN im Fenster → NaN (wie pandas rolling)."""
+    __slots__ = ("period", "_win", "_sum", "_nans", "_since_resum")
+
+    def __init__(self, period: int):
+        self.period = period
+        self._win = deque(maxlen=period)
+        self._sum = 0.0
+        self._nans = 0
+        self._since_resum = 0
+
+    def push(self, x: float):
+        win = self._win
+        if len(win) == self.period:
+            old = win[0]
+            if old != old: self._nans -= 1
+            else: self._sum -= old
+        win.append(x)
+        if x != x: self._nans += 1
+        else: self._sum += x
+        # Rundungsdrift der laufenden Summe regelmäßig verwerfen (amortisiert O(1))
+        self._since_resum += 1
+        if self._since_resum >= self.period:
+            self._sum = math.fsum(v for v in win if v == v)
+            self._since_resum = 0
+
+    @property
+    def value(self) -> float:
+        if len(self._win) < self.period or self._nans:
+            return _NAN
+        return self._sum / self.period
+
+
+class IndicatorState:
+    """Zustand aller Indikatoren einer Kerzenreihe."""
+    __slots__ = ("atr_period", "rsi_period", "bars", "prev_close", "_tr_sum", "atr",
+                 "_up", "_dn", "_close_sma", "_vol_sma", "_vol_alpha", "_vol_ema", "_vol_n",
+                 "close", "volume", "start_ts")
+
+    def __init__(self, atr_period=ATR_PERIOD, rsi_period=RSI_PERIOD,
+                 sma_period=SMA_PERIOD, volume_period=VOLUME_PERIOD):
+        self.atr_period = atr_period
+        self.rsi_period = rsi_period
+        self.bars = 0
+        self.prev_close = _NAN
+        self._tr_sum = 0.0
+        self.atr = 0.0
+        self._up = 0.0
+        self._dn = 0.0
+        self._close_sma = _RollingMean(sma_period)
+        self._vol_sma = _RollingMean(volume_period)
+        self._vol_alpha = 2.0 / (volume_period + 1.0)
+        self._vol_ema = _NAN
+        self._vol_n = 0
+        self.close = _NAN
+        self.volume = _NAN
+        self.start_ts = _NAN
+
+    def update(self, start_ts, high, low, close, volume=_NAN):
+        n = self.bars
+        pc = self.prev_close
+
+        # True Range: erste Kerze nur high-low (ta: close.shift(1) ist NaN)
+        tr = high - low
+        if n:
+            tr = max(tr, abs(high - pc), abs(low - pc))
+        p = self.atr_period
+        if n < p:
+            self._tr_sum += tr
+            if n == p - 1:
+                self.atr = self._tr_sum / p
+        else:
+            self.atr = (self.atr * (p - 1) + tr) / p
+
+        # RSI: ewm(alpha=1/n, adjust=False) über Auf-/Abwärtsbewegungen, erste Differenz = 0
+        diff = close - pc if n else 0.0
+        a = 1.0 / self.rsi_period
+        up = diff if diff > 0 else 0.0
+        dn = -diff if diff < 0 else 0.0
+        if n:
+            self._up = (1.0 - a) * self._up + a * up
+            self._dn = (1.0 - a) * self._dn + a * dn
+        else:
+            self._up, self._dn = up, dn
+
+        self._close_sma.push(close)
+
+        # Volumen: SMA wie pandas rolling, EMA wie ta.trend.ema_indicator (span=n, adjust=False)
+        self._vol_sma.push(volume)
+        if volume == volume:
+            if self._vol_n:
+                self._vol_ema = (1.0 - self._vol_alpha) * self._vol_ema + self._vol_alpha * volume
+            else:
+                self._vol_ema = volume
+            self._vol_n += 1
+
+        self.prev_close = close
+        self.close = close
+        self.volume = volume
+        self.start_ts = start_ts
+        self.bars = n + 1
+
+    @property
+    def rsi(self) -> float:
+        if self.bars < self.rsi_period:
+            return _NAN
+        if self._dn == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self._up / self._dn)
+
+    def values(self) -> dict:
+        atr = self.atr if self.bars >= self.atr_period else 0.0
+        close = self.close
+        vol_sma = self._vol_sma.value
+        vol_ema = self._vol_ema if self._vol_n >= self._vol_sma.period else _NAN
+        return {
+            "bars": self.bars,
+            "start_ts": self.start_ts,
+            "close": close,
+            "atr": atr,
+            "atr_pct": (atr / close * 100.0) if close > 0 else 0.0,
+            "rsi": self.rsi,
+            "sma": self._close_sma.value,
+            "volume": self.volume,
+            "vol_sma": vol_sma,
+            "vol_ema": vol_ema,
+        }
+
+
+class IndicatorEngine:
+    """
+    Hält einen IndicatorState pro Schlüssel (market, symbol, interval).
+    Ohne eigenen Lock: der Aufrufer synchronisiert pro Symbol (SharedState: Stripe-Lock).
+    """
+
+    def __init__(self, **params):
+        self.params = params
+        self._states = {}
+
+    def update(self, key, start_ts, high, low, close, volume=_NAN):
+        st = self._states.get(key)
+        if st is None:
+            st = self._states[key] = IndicatorState(**self.params)
+        st.update(start_ts, high, low, close, volume)
+
+    def get(self, key):
+        st = self._states.get(key)
+        return st.values() if st else None
+
+    def reset(self, key):
+        self._states.pop(key, None)
+
+    def rebuild(self, key, view):
+        """Verwirft den Zustand und spielt die Kerzen einer CandleView neu ein."""
+        st = self._states[key] = IndicatorState(**self.params)
+        for row in zip(view.start_ts.tolist(), view.high.tolist(), view.low.tolist(),
+                       view.close.tolist(), view.volume.tolist()):
+            st.update(*row)
@@ -0,0 +1,194 @@
+"""
+Latenz-Histogramme pro Pipeline-Stufe und Zähler – ohne Abhängigkeiten, billig genug für den Tick-Pfad.
+
+Histogramme im HDR-Stil: Zweier-Oktaven mit je SUB_BUCKETS linearen Unterteilungen (bei 32
+≈ 3 % relative Auflösung), feste Größe, record() in O(1). Werte in Sekunden, intern in µs
+von 0 bis ~71 min (darüber landet alles im letzten Bucket). Quantile liefern wie HdrHistogram
+die Obergrenze ihres Buckets, gedeckelt auf das beobachtete Maximum.
+
+Stufen (STAGES), in Pipeline-Reihenfolge:
+    ws_receive    Alter einer WS-Nachricht beim Handler: Exchange-"ts" → clock.now() (Netz + Feed-Queue)
+    decode        JSON-Decode der Nachricht
+    upsert        SharedState.upsert_ticks einer WS-Nachricht inkl. Scan-Trigger und Tick-Listener
+                  (gemessen im Handler – der Einzel-Tick-Pfad für Backtest/Benchmarks bleibt ohne Messung)
+    candle_close  Verzögerung Bar-Ende → Kerze im CandleStore
+    feature       Kandidatensuche eines Scans (Features über die bewerteten Symbole)
+    decision      decide_batch pro Strategie und Scan
+    paper_open    open_position
+    paper_close   Schließen eines Trades (State, Exit-Engine, RL-Erfahrung)
+
+ws_receive und candle_close sind Verzögerungen, die übrigen Rechenzeit der Stufe.
+Zähler: messages_total, ticks_total, scans_total, decisions_total, trades_opened_total, trades_closed_total.
+"""
+
+import math
+import os
+import threading
+from collections import deque
+
+SUB_BUCKETS = 32
+MAX_EXP = 32  # 2^32 µs ≈ 71 min
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+LAG_BASELINE_SEC = float(os.getenv("LAG_BASELINE_SEC", "300"))
+
+_frexp = math.frexp
+_TWO_SUB = 2 * SUB_BUCKETS
+_LAST = (MAX_EXP + 1) * SUB_BUCKETS - 1
+
+STAGES = ("ws_receive", "decode", "upsert", "candle_close", "feature", "decision", "paper_open", "paper_close")
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "min", "max", "_lock")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * ((MAX_EXP + 1) * SUB_BUCKETS)
+            self.count = 0
+            self.sum = 0.0
+            self.min = math.inf
+            self.max = 0.0
+
+    def record(self, seconds: float):
+        us = seconds * 1e6
+        if us < 1.0:
+            if us < 0.0:
+                us = 0.0  # Uhrversatz zur Börse – negativ zählt als 0
+            idx = int(us * SUB_BUCKETS)
+        else:
+            m, e = _frexp(us)  # us = m · 2^e, m ∈ [0.5, 1)
+            idx = e * SUB_BUCKETS + int((m - 0.5) * _TWO_SUB) if e <= MAX_EXP else _LAST
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.sum += us
+            if us > self.max: self.max = us
+            if us < self.min: self.min = us
+
+    @staticmethod
+    def _upper_us(idx: int) -> float:
+        e, k = divmod(idx, SUB_BUCKETS)
+        if e == 0:
+            return (k + 1) / SUB_BUCKETS
+        return (0.5 + (k + 1) / (2 * SUB_BUCKETS)) * 2.0 ** e
+
+    def quantiles(self, qs=QUANTILES) -> list:
+        """Quantile in Sekunden (0.0 ohne Werte)."""
+        with self._lock:
+            counts, total, vmax = list(self.counts), self.count, self.max
+        if not total:
+            return [0.0] * len(qs)
+        out, targets = [], [max(1, math.ceil(q * total)) for q in qs]
+        seen, ti = 0, 0
+        for idx, c in enumerate(counts):
+            if not c:
+                continue
+            seen += c
+            while ti < len(targets) and seen >= targets[ti]:
+                out.append(min(self._upper_us(idx), vmax) / 1e6)
+                ti += 1
+            if ti == len(targets):
+                break
+        return out
+
+    def summary(self) -> dict:
+        """count, mean/min/max und Quantile in ms – für Dashboard und JSON."""
+        ps = self.quantiles()
+        with self._lock:
+            n, s, lo, hi = self.count, self.sum, self.min, self.max
+        out = {"count": n, "mean_ms": round(s / n / 1000, 4) if n else 0.0,
+               "min_ms": round(lo / 1000, 4) if n else 0.0, "max_ms": round(hi / 1000, 4)}
+        for q, v in zip(QUANTILES, ps):
+            out[f"p{q * 100:g}_ms".replace(".", "")] = round(v * 1000, 4)
+        return out
+
+
+class RelativeLag:
+    """
+    Empfangsverzögerung ohne Uhrversatz: aktuelle Verzögerung minus deren Minimum der letzten
+    window Sekunden. Ein konstanter Versatz zwischen Host- und Börsenuhr fällt heraus, Rückstau
+    in Netz oder Feed-Queue bleibt sichtbar (gleitendes Minimum über eine monotone Deque, O(1)).
+    """
+
+    def __init__(self, window: float = LAG_BASELINE_SEC):
+        self.window = float(window)
+        self._mins = deque()  # (zeit, lag), lag aufsteigend
+
+    def update(self, now: float, lag: float) -> float:
+        mins = self._mins
+        if mins and now < mins[-1][0]:
+            mins.clear()  # Uhrwechsel (z. B. SimClock im Replay) – altes Fenster gilt nicht mehr
+        while mins and mins[-1][1] >= lag:
+            mins.pop()
+        mins.append((now, lag))
+        while mins[0][0] < now - self.window:
+            mins.popleft()
+        return lag - mins[0][1]
+
+
+class Metrics:
+    """Registry: ein Histogramm pro Stufe (weitere Namen werden bei Bedarf angelegt) + Zähler mit Labels."""
+
+    def __init__(self, stages=STAGES):
+        self._lock = threading.Lock()
+        self.histograms = {s: Histogram() for s in stages}
+        self.counters = {}  # (name, ((label, wert), ...)) → int
+
+    def observe(self, stage: str, seconds: float):
+        h = self.histograms.get(stage)
+        if h is None:
+            with self._lock:
+                h = self.histograms.setdefault(stage, Histogram())
+        h.record(seconds)
+
+    def inc(self, name: str, n: int = 1, **labels):
+        key = (name, tuple(labels.items()))  # Label-Reihenfolge ist pro Aufrufstelle fest
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def reset(self):
+        for h in list(self.histograms.values()):
+            h.reset()
+        with self._lock:
+            self.counters.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        out = {}
+        for (name, labels), v in sorted(counters.items()):
+            out[name + ("{" + ",".join(f"{k}={lv}" for k, lv in labels) + "}" if labels else "")] = v
+        return {"stages": {s: h.summary() for s, h in list(self.histograms.items())}, "counters": out}
+
+    def prometheus_text(self, prefix: str = "trading", gauges: dict = None) -> str:
+        """Prometheus-Textformat 0.0.4: Stufen als summary (Quantile, _sum, _count), Zähler, optionale Gauges."""
+        name = f"{prefix}_stage_latency_seconds"
+        lines = [f"# HELP {name} Latenz pro Pipeline-Stufe (HDR-Histogramm seit Start)", f"# TYPE {name} summary"]
+        for stage, h in list(self.histograms.items()):
+            for q, v in zip(QUANTILES, h.quantiles()):
+                lines.append(f'{name}{{stage="{stage}",quantile="{q:g}"}} {v:.9g}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {h.sum / 1e6:.9g}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+        with self._lock:
+            counters = sorted(self.counters.items())
+        typed = set()
+        for (cname, labels), v in counters:
+            full = f"{prefix}_{cname}"
+            if full not in typed:
+                lines.append(f"# TYPE {full} counter")
+                typed.add(full)
+            lbl = "{" + ",".join(f'{k}="{lv}"' for k, lv in labels) + "}" if labels else ""
+            lines.append(f"{full}{lbl} {v}")
+        for gname, v in (gauges or {}).items():
+            lines.append(f"# TYPE {prefix}_{gname} gauge")
+            lines.append(f"{prefix}_{gname} {float(v):.9g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+observe = metrics.observe
+inc = metrics.inc
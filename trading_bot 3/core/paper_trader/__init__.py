@@ -1,6 +1,9 @@
-import time, itertools
+import itertools, threading, time
+from core import clock, metrics
 from core.shared_state import shared_state
+from core.candle_store import CandleView
 from core.ai import online_rl
+from .exit_engine import ExitEngine
 
 _id_counter = itertools.count(1)
 MAX_LATENCY_MS = 500
@@ -10,7 +13,7 @@ def _new_id():
     return f"T{next(_id_counter):08d}"
 
 def open_position(symbol:str, side:str, market:str, entry_price:float, margin:float, leverage:float, tp_pct:float, sl_pct:float, features:dict, strategy:str="conservative"):
-    
+    t0 = time.perf_counter()
     if shared_state.latency_ms > MAX_LATENCY_MS:
         print(f"[PAPER] Trade abgelehnt: Latenz ({shared_state.latency_ms} ms) ist zu hoch.")
         return None
@@ -20,6 +23,12 @@ def open_position(symbol:str, side:str, market:str, entry_price:float, margin:fl
         return None
     
     qty = (margin * leverage) / max(1e-9, entry_price)
+
+    # Zero-Copy-Kerzen aus dem Scan vom Ring lösen, bevor sie im Trade landen (eine Array-Kopie,
+    # keine 200 Dicts – die CandleView verhält sich für Leser weiter wie eine Kerzenliste)
+    features = dict(features or {})
+    if isinstance(features.get("candles"), CandleView):
+        features["candles"] = features["candles"].copy()
     
     t = {
         "id": _new_id(),
@@ -31,14 +40,17 @@ def open_position(symbol:str, side:str, market:str, entry_price:float, margin:fl
         "leverage": float(leverage),
         "tp": float(tp_pct),
         "sl": float(sl_pct),
-        "timestamp": time.time(),
+        "timestamp": clock.now(),
         "margin_used": float(margin),
-        "features": features or {},
+        "features": features,
         "strategy": strategy,
         "max_price": entry_price, # [NEU] Verfolgt den höchsten Preis für Trailing
     }
     shared_state.open_trade(t)
+    exit_engine.add(t)
     print(f"[PAPER-OPEN] ({strategy.upper()}) {market.upper()} {side.upper()} {symbol} | margin={margin:.2f} lev={leverage:.2f} tp={tp_pct:.2f}% sl={sl_pct:.2f}% id={t['id']}")
+    metrics.observe("paper_open", time.perf_counter() - t0)
+    metrics.inc("trades_opened_total", strategy=strategy)
     return t["id"]
 
 def _pnl_pct_for(side:str, entry:float, price:float) -> float:
@@ -47,62 +59,111 @@ def _pnl_pct_for(side:str, entry:float, price:float) -> float:
     else:
         return (entry - price) / entry * 100.0
 
-def check_and_close_all():
-    open_list = list(shared_state.open_trades.values())
-    now = time.time()
-    for t in open_list:
-        sym = t["symbol"]; market = t["market"]; side = t["side"]
-        
-        lookup_key = (market.lower(), sym.upper())
-        tick = shared_state.ticks.get(lookup_key)
-        
-        if not tick: 
-            continue
-            
-        price = float(tick.get("price", 0))
-        if price <= 0:
-            continue
+MAX_HOLD_SEC = 300 # Scalper-Trades werden nach 5 Minuten geschlossen
+
+def _is_trailing(t) -> bool:
+    return t.get("tp") > 2.0 # Trailing nur, wenn TP hoch genug gesetzt ist (Definiert in simple_decision.py)
 
-        # [NEU] 1. Aktualisiere den Höchstpreis für Trailing Stop
-        current_max_price = t["max_price"]
-        if (side == "buy" and price > current_max_price) or (side == "sell" and price < current_max_price):
-            t["max_price"] = price
-            
-        # [NEU] 2. Berechne Trailing Stop Level
-        is_trailing = t.get("tp") > 2.0 # Trailing nur, wenn TP hoch genug gesetzt ist (Definiert in simple_decision.py)
+def _exit_reason(t: dict, price: float, now: float):
+    """Prüft TP/SL/Trailing/Timeout eines Trades zum Preis 'price'. Liefert (reason|None, gain_pct)."""
+    side = t["side"]
+
+    # [NEU] 1. Aktualisiere den Höchstpreis für Trailing Stop
+    current_max_price = t["max_price"]
+    if (side == "buy" and price > current_max_price) or (side == "sell" and price < current_max_price):
+        t["max_price"] = price
         
-        if is_trailing:
-            offset = TRAILING_STOP_OFFSET_PCT / 100.0 
-            if side == "buy":
-                trailing_level = t["max_price"] * (1 - offset)
-                hit_trailing = price <= trailing_level
-            else:
-                trailing_level = t["max_price"] * (1 + offset)
-                hit_trailing = price >= trailing_level
+    # [NEU] 2. Berechne Trailing Stop Level
+    if _is_trailing(t):
+        offset = TRAILING_STOP_OFFSET_PCT / 100.0 
+        if side == "buy":
+            trailing_level = t["max_price"] * (1 - offset)
+            hit_trailing = price <= trailing_level
         else:
-            hit_trailing = False
-            
-        
-        gain_pct = _pnl_pct_for(side, float(t["entry_price"]), price)
-        hit_tp = gain_pct >= float(t["tp"])
-        hit_sl = (-gain_pct) >= float(t["sl"])
-        
-        max_hold_sec = 300 
-        is_scalper = t.get('strategy') == 'scalper'
+            trailing_level = t["max_price"] * (1 + offset)
+            hit_trailing = price >= trailing_level
+    else:
+        hit_trailing = False
         
-        timeout = False
-        if is_scalper:
-            timeout = (now - t.get("timestamp", now)) > max_hold_sec
+    gain_pct = _pnl_pct_for(side, float(t["entry_price"]), price)
+    hit_tp = gain_pct >= float(t["tp"])
+    hit_sl = (-gain_pct) >= float(t["sl"])
+    
+    timeout = False
+    if t.get('strategy') == 'scalper':
+        timeout = (now - t.get("timestamp", now)) > MAX_HOLD_SEC
+    
+    if not (hit_tp or hit_sl or timeout or hit_trailing):
+        return None, gain_pct
+    reason = "TP" if hit_tp else ("SL" if hit_sl else "TIMEOUT")
+    if hit_trailing: reason = "TRAIL"
+    return reason, gain_pct
+
+def _trigger_levels(t: dict) -> dict:
+    """Preis-Level, an denen _exit_reason feuern kann – für den Index der Exit-Engine."""
+    side = t["side"]; entry = float(t["entry_price"])
+    tp = entry * float(t["tp"]) / 100.0
+    sl = entry * float(t["sl"]) / 100.0
+    if side == "buy":
+        lv = {"up": [entry + tp], "down": [entry - sl], "ratchet": None}
+    else:
+        lv = {"up": [entry + sl], "down": [entry - tp], "ratchet": None}
+    if _is_trailing(t):
+        offset = TRAILING_STOP_OFFSET_PCT / 100.0
+        if side == "buy":
+            lv["down"].append(float(t["max_price"]) * (1 - offset)); lv["ratchet"] = "rise"
+        else:
+            lv["up"].append(float(t["max_price"]) * (1 + offset)); lv["ratchet"] = "fall"
+    lv["deadline"] = t.get("timestamp", 0.0) + MAX_HOLD_SEC if t.get("strategy") == "scalper" else None
+    return lv
+
+def _close_position(t: dict, price: float, now: float, reason: str, gain_pct: float):
+    t0 = time.perf_counter()
+    sym = t["symbol"]; market = t["market"]; side = t["side"]
+    pnl = (gain_pct/100.0) * float(t["entry_price"]) * float(t["qty"])
+    if not shared_state.close_trade(t["id"], exit_price=price, pnl=pnl, ts=now):
+        return  # schon von einem anderen Pfad geschlossen
+    t["exit_reason"] = reason
+    exit_engine.remove(t["id"])
+    
+    try:
+        online_rl.add_experience(sym, market, side, reward=gain_pct, features=t.get("features", {}))
+    except Exception as e:
+        print("[PAPER] RL add_experience error:", e)
         
-        if hit_tp or hit_sl or timeout or hit_trailing:
-            pnl = (gain_pct/100.0) * float(t["entry_price"]) * float(t["qty"])
-            shared_state.close_trade(t["id"], exit_price=price, pnl=pnl, ts=now)
-            
-            try:
-                online_rl.add_experience(sym, market, side, reward=gain_pct, features=t.get("features", {}))
-            except Exception as e:
-                print("[PAPER] RL add_experience error:", e)
-                
-            reason = "TP" if hit_tp else ("SL" if hit_sl else "TIMEOUT")
-            if hit_trailing: reason = "TRAIL"
-            print(f"[PAPER-CLOSE] ({t.get('strategy','?').upper()}) {market.upper()} {side.upper()} {sym} ({reason}) | exit={price:.6f} pnl={pnl:+.2f} ({gain_pct:+.2f}%) id={t['id']}")
+    print(f"[PAPER-CLOSE] ({t.get('strategy','?').upper()}) {market.upper()} {side.upper()} {sym} ({reason}) | exit={price:.6f} pnl={pnl:+.2f} ({gain_pct:+.2f}%) id={t['id']}")
+    metrics.observe("paper_close", time.perf_counter() - t0)
+    metrics.inc("trades_closed_total", reason=reason)
+
+def _tick_price(key):
+    tick = shared_state.ticks.get(key)
+    return float(tick.get("price", 0)) if tick else None
+
+exit_engine = ExitEngine(_trigger_levels, _exit_reason, _close_position, _tick_price)
+shared_state.tick_listeners.append(exit_engine.on_tick)
+
+def start_exit_worker() -> threading.Thread:
+    """Schließt tickgetriebene Exits abseits des WS-Ingest-Threads (RL-Erfahrung schreibt auf die Platte)."""
+    th = threading.Thread(target=exit_engine.run_worker, daemon=True, name="ExitWorker")
+    th.start()
+    return th
+
+def check_and_close_all(full_sweep: bool = False):
+    """
+    Preis-Exits erkennt die exit_engine tickgetrieben; hier werden Timeouts geprüft und alle
+    eingereihten Exits geschlossen (ohne Exit-Worker passiert das nur hier).
+    full_sweep=True prüft zusätzlich jeden offenen Trade gegen seinen aktuellen Tick.
+    """
+    now = clock.now()
+    exit_engine.poll_timeouts(now)
+    exit_engine.drain()
+    if not full_sweep:
+        return
+
+    for t in list(shared_state.open_trades.values()):
+        price = _tick_price((t["market"].lower(), t["symbol"].upper()))
+        if not price or price <= 0:
+            continue
+        reason, gain_pct = _exit_reason(t, price, now)
+        if reason:
+            _close_position(t, price, now, reason, gain_pct)
@@ -0,0 +1,203 @@
+"""
+Exit Engine – tickgetriebene Ausstiege (TP/SL/Trailing/Timeout) für Paper-Trades.
+
+Offene Trades werden pro (market, symbol) über sortierte Trigger-Level indiziert:
+  up   – feuert, wenn der Preis das Level erreicht oder überschreitet
+  down – feuert, wenn der Preis das Level erreicht oder unterschreitet
+  rise/fall – Trailing-Trades, deren Extrempreis nachgezogen werden muss
+Ein Tick prüft per bisect nur die Trades, deren Schwelle er kreuzt (O(log n + k)).
+Timeouts liegen separat in einem Heap. Die eigentliche Exit-Entscheidung
+(Grund, PnL) bleibt bei den Callbacks aus core.paper_trader.
+
+on_tick läuft auf dem WS-Ingest-Thread: er erkennt nur die Trigger und legt die gefeuerten
+Exits in eine Queue. Geschlossen wird (State, RL-Erfahrung mit Datei-I/O, Log) in drain() –
+im Exit-Worker (run_worker) bzw. im Scanner-Zyklus, nie auf dem Ingest-Pfad.
+"""
+
+import heapq
+import threading
+from collections import deque
+from bisect import bisect_left, bisect_right, insort
+
+from core import clock
+
+_LO, _HI = "", "\uffff"  # Sentinels für Trade-IDs in (level, tid)-Tupeln
+_EPS = 1e-9                # Level leicht vorziehen, die exakte Prüfung macht evaluate_fn
+
+
+class _Book:
+    __slots__ = ("up", "down", "rise", "fall")
+
+    def __init__(self):
+        self.up, self.down, self.rise, self.fall = [], [], [], []
+
+
+def _remove(lst, item):
+    i = bisect_left(lst, item)
+    if i < len(lst) and lst[i] == item:
+        del lst[i]
+
+
+class ExitEngine:
+    def __init__(self, levels_fn, evaluate_fn, close_fn, price_fn):
+        """
+        levels_fn(t)                 → {"up": [...], "down": [...], "ratchet": "rise"|"fall"|None, "deadline": ts|None}
+        evaluate_fn(t, price, now)   → (reason|None, gain_pct)
+        close_fn(t, price, now, reason, gain_pct)
+        price_fn((market, symbol))   → aktueller Preis oder None (für Timeouts)
+        """
+        self.levels_fn = levels_fn
+        self.evaluate_fn = evaluate_fn
+        self.close_fn = close_fn
+        self.price_fn = price_fn
+        self.lock = threading.RLock()
+        self._books = {}     # (market, symbol) → _Book (bleibt bestehen, begrenzt durchs Universum)
+        self._entries = {}   # tid → (trade, key, [(liste, item), ...])
+        self._timeouts = []  # Heap aus (deadline, tid)
+        self._fired = deque()  # (trade, price, now, reason, gain_pct) → drain()
+        self._wake = threading.Event()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def reset(self):
+        with self.lock:
+            self._books.clear()
+            self._entries.clear()
+            self._timeouts.clear()
+            self._fired.clear()
+
+    def _index(self, t):
+        key = (t["market"].lower(), t["symbol"].upper())
+        book = self._books.get(key)
+        if book is None:
+            book = self._books[key] = _Book()
+        lv = self.levels_fn(t)
+        tid = t["id"]
+        items = []
+        for level in lv.get("up", ()):
+            items.append((book.up, (level * (1 - _EPS), tid)))
+        for level in lv.get("down", ()):
+            items.append((book.down, (level * (1 + _EPS), tid)))
+        ratchet = lv.get("ratchet")
+        if ratchet:
+            items.append((getattr(book, ratchet), (float(t["max_price"]), tid)))
+        for lst, item in items:
+            insort(lst, item)
+        self._entries[tid] = (t, key, items)
+        return lv
+
+    def _unindex(self, tid):
+        entry = self._entries.pop(tid, None)
+        if entry is None:
+            return None
+        t, key, items = entry
+        for lst, item in items:
+            _remove(lst, item)
+        return t
+
+    def add(self, t: dict):
+        with self.lock:
+            self._unindex(t["id"])
+            lv = self._index(t)
+            if lv.get("deadline") is not None:
+                heapq.heappush(self._timeouts, (lv["deadline"], t["id"]))
+
+    def remove(self, tid: str):
+        with self.lock:
+            self._unindex(tid)
+
+    def on_tick(self, market: str, symbol: str, price: float, ts: float = None):
+        """Tick-Hook (aus SharedState.upsert_tick): prüft nur die gekreuzten Trigger."""
+        if price <= 0:
+            return
+        key = (market.lower(), symbol.upper())
+        now = clock.now()
+        fired = []
+        with self.lock:
+            book = self._books.get(key)
+            if book is not None:
+                # 1. Extrempreise der Trailing-Trades nachziehen (wie max_price im Sweep)
+                moved = []
+                i = bisect_left(book.rise, (price, _LO))
+                moved += [tid for _, tid in book.rise[:i]]
+                j = bisect_right(book.fall, (price, _HI))
+                moved += [tid for _, tid in book.fall[j:]]
+                for tid in moved:
+                    t = self._entries[tid][0]
+                    t["max_price"] = price
+                    self._unindex(tid)
+                    self._index(t)
+
+                # 2. Gekreuzte Trigger einsammeln
+                cand = set()
+                i = bisect_right(book.up, (price, _HI))
+                cand.update(tid for _, tid in book.up[:i])
+                j = bisect_left(book.down, (price, _LO))
+                cand.update(tid for _, tid in book.down[j:])
+                for tid in sorted(cand):  # Reihenfolge wie im Sweep (Eröffnungsreihenfolge)
+                    t = self._entries[tid][0]
+                    reason, gain_pct = self.evaluate_fn(t, price, now)
+                    if reason:
+                        self._unindex(tid)
+                        fired.append((t, price, reason, gain_pct))
+            if self._timeouts and self._timeouts[0][0] < now:
+                fired += self._pop_timeouts(now)
+        if fired:
+            self._fired.extend((t, px, now, reason, gain_pct) for t, px, reason, gain_pct in fired)
+            self._wake.set()
+
+    def _pop_timeouts(self, now):
+        fired, retry = [], []
+        heap = self._timeouts
+        while heap and heap[0][0] < now:
+            _, tid = heapq.heappop(heap)
+            entry = self._entries.get(tid)
+            if entry is None:
+                continue
+            t, key, _ = entry
+            price = self.price_fn(key)
+            if not price or price <= 0:
+                retry.append(tid)  # ohne Preis kein Close – später erneut versuchen
+                continue
+            reason, gain_pct = self.evaluate_fn(t, price, now)
+            if reason:
+                self._unindex(tid)
+                fired.append((t, price, reason, gain_pct))
+            else:
+                retry.append(tid)
+        for tid in retry:
+            heapq.heappush(heap, (now + 1.0, tid))
+        return fired
+
+    def poll_timeouts(self, now: float = None):
+        """Reiht abgelaufene Trades ein (vom Scanner-Zyklus aufgerufen, unabhängig von Ticks)."""
+        now = clock.now() if now is None else now
+        with self.lock:
+            fired = self._pop_timeouts(now)
+        self._fired.extend((t, px, now, reason, gain_pct) for t, px, reason, gain_pct in fired)
+        return len(fired)
+
+    def pending(self) -> int:
+        return len(self._fired)
+
+    def drain(self) -> int:
+        """Schließt alle eingereihten Exits in Feuer-Reihenfolge (thread-sicher, jeder Exit genau einmal)."""
+        n = 0
+        while True:
+            try:
+                t, px, now, reason, gain_pct = self._fired.popleft()
+            except IndexError:
+                return n
+            try:
+                self.close_fn(t, px, now, reason, gain_pct)
+            except Exception as e:
+                print(f"[EXIT] Fehler beim Schließen von {t.get('id')}: {e}")
+            n += 1
+
+    def run_worker(self, stop: threading.Event = None, idle_sec: float = 1.0):
+        """Exit-Worker: schließt gefeuerte Exits, sobald on_tick welche einreiht."""
+        while stop is None or not stop.is_set():
+            self._wake.wait(idle_sec)
+            self._wake.clear()
+            self.drain()
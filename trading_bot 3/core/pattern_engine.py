@@ -0,0 +1,181 @@
+"""
+Pattern Engine – Kerzenmuster vektorisiert für viele Symbole auf einmal.
+
+Eingabe sind spaltenweise OHLC-Matrizen (Symbole × Bars, letzte Spalte = neueste Bar),
+jedes Muster liest nur sein nachlaufendes Fenster (1–3 Bars). Ergebnis pro Muster ist ein
+int8-Vektor über die Symbole: +1 bullisch, -1 bärisch, 0 nichts (doji: 1 = vorhanden).
+NaN in den Bars ergibt 0.
+
+Engulfing entspricht exakt der bisherigen Regel aus simple_decision; Harami ist die
+übliche Definition (Körper innerhalb des vorigen) – die alte Hand-Regel war deckungsgleich
+mit dem gegenläufigen Engulfing und wurde deshalb nie erreicht. Entscheidung und RL-Agent
+benutzen jetzt dieselbe Implementierung (vorher zusätzlich talib über die gesamte Historie).
+
+PatternEngine.signals() holt die Fenster aus dem CandleStore und cacht die Ergebnisse
+pro abgeschlossener Bar (Ring-Version); neu gerechnet werden nur Symbole mit neuer Bar.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from core.candle_store import as_candle_view
+from core.shared_state import shared_state
+
+
+def _engulfing(o, h, l, c):
+    o1, c1, o0, c0 = o[:, 0], c[:, 0], o[:, 1], c[:, 1]
+    bull = (o1 > c1) & (o0 < c0) & (c0 > o1) & (o0 < c1)
+    bear = (o1 < c1) & (o0 > c0) & (c0 < o1) & (o0 > c1)
+    return bull, bear
+
+
+def _harami(o, h, l, c):
+    # Körper der neuen Bar liegt im Körper der vorigen, Richtung gedreht
+    o1, c1, o0, c0 = o[:, 0], c[:, 0], o[:, 1], c[:, 1]
+    bull = (o1 > c1) & (o0 < c0) & (o0 > c1) & (c0 < o1)
+    bear = (o1 < c1) & (o0 > c0) & (o0 < c1) & (c0 > o1)
+    return bull, bear
+
+
+def _doji(o, h, l, c):
+    rng = h[:, 0] - l[:, 0]
+    hit = (rng > 0) & (np.abs(c[:, 0] - o[:, 0]) <= 0.1 * rng)
+    return hit, np.zeros_like(hit)
+
+
+def _hammer(o, h, l, c):
+    # Hammer (langer unterer Docht) bullisch, Shooting Star (langer oberer Docht) bärisch
+    o0, h0, l0, c0 = o[:, 0], h[:, 0], l[:, 0], c[:, 0]
+    body = np.abs(c0 - o0)
+    lower = np.minimum(o0, c0) - l0
+    upper = h0 - np.maximum(o0, c0)
+    ok = (body > 0) & (h0 > l0)
+    bull = ok & (lower >= 2.0 * body) & (upper <= body)
+    bear = ok & (upper >= 2.0 * body) & (lower <= body)
+    return bull, bear
+
+
+def _star(o, h, l, c):
+    # Morning Star (bullisch) / Evening Star (bärisch)
+    o2, c2, o1, c1, o0, c0 = o[:, 0], c[:, 0], o[:, 1], c[:, 1], o[:, 2], c[:, 2]
+    body2 = np.abs(c2 - o2)
+    big = body2 >= 0.5 * (h[:, 0] - l[:, 0])
+    small = np.abs(c1 - o1) <= 0.3 * body2
+    mid = (o2 + c2) / 2.0
+    bull = big & small & (c2 < o2) & (c0 > o0) & (c0 > mid)
+    bear = big & small & (c2 > o2) & (c0 < o0) & (c0 < mid)
+    return bull, bear
+
+
+def _three_soldiers(o, h, l, c):
+    # Three White Soldiers (bullisch) / Three Black Crows (bärisch)
+    up = (c > o).all(axis=1) & (c[:, 1:] > c[:, :-1]).all(axis=1)
+    down = (c < o).all(axis=1) & (c[:, 1:] < c[:, :-1]).all(axis=1)
+    in_up = ((o[:, 1:] > o[:, :-1]) & (o[:, 1:] < c[:, :-1])).all(axis=1)
+    in_down = ((o[:, 1:] < o[:, :-1]) & (o[:, 1:] > c[:, :-1])).all(axis=1)
+    return up & in_up, down & in_down
+
+
+# name → (Fenster in Bars, Funktion auf (S, Fenster)-Matrizen → (bull, bear))
+PATTERNS = {
+    "engulfing": (2, _engulfing),
+    "harami": (2, _harami),
+    "doji": (1, _doji),
+    "hammer": (1, _hammer),
+    "star": (3, _star),
+    "three_soldiers": (3, _three_soldiers),
+}
+PATTERN_SET = tuple(p.strip() for p in os.getenv("PATTERN_SET", ",".join(PATTERNS)).split(",") if p.strip() in PATTERNS)
+
+
+def window_for(patterns=None) -> int:
+    return max((PATTERNS[p][0] for p in (patterns or PATTERN_SET)), default=1)
+
+
+def detect(o, h, l, c, patterns=None) -> dict:
+    """
+    Muster auf (S, W)-Matrizen (oder 1-D-Reihen eines Symbols) auswerten.
+    Liefert {name: int8-Vektor (S,)}; Symbole mit zu wenigen Bars ergeben 0.
+    """
+    o, h, l, c = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (o, h, l, c))
+    S, W = c.shape
+    out = {}
+    for name in patterns or PATTERN_SET:
+        win, fn = PATTERNS[name]
+        if W < win:
+            out[name] = np.zeros(S, dtype=np.int8)
+            continue
+        bull, bear = fn(o[:, -win:], h[:, -win:], l[:, -win:], c[:, -win:])
+        out[name] = bull.astype(np.int8) - bear.astype(np.int8)
+    return out
+
+
+def pattern_signals(candles, patterns=None) -> dict:
+    """Muster der letzten Bar einer CandleView / Kerzenliste als {name: int}."""
+    view = as_candle_view(candles)
+    n = window_for(patterns)
+    res = detect(view.open[-n:], view.high[-n:], view.low[-n:], view.close[-n:], patterns)
+    return {k: int(v[0]) for k, v in res.items()}
+
+
+def candle_signal(sig: dict) -> int:
+    """RL-Signal aus den Mustern: Engulfing ±2, bullisches Harami 1, sonst 0."""
+    eng = sig.get("engulfing", 0)
+    if eng:
+        return 2 * eng
+    return 1 if sig.get("harami", 0) > 0 else 0
+
+
+class PatternEngine:
+    def __init__(self, patterns=PATTERN_SET, state=None):
+        self.patterns = tuple(patterns)
+        self.window = window_for(self.patterns)
+        self.state = state or shared_state
+        self._cache = {}  # (market, symbol, tf) → (ring.version, {name: int})
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def signals(self, market: str, symbols, tf: int = 300) -> dict:
+        """{symbol: {name: int}} für die letzte abgeschlossene Bar; gerechnet wird nur bei neuer Bar."""
+        state, W = self.state, self.window
+        out, miss, versions, rows = {}, [], [], []
+        for sym in symbols:
+            key = (market, sym, tf)
+            with state.stripe_lock(sym):
+                ring = state.candles_history.get(key)
+                if ring is None or not len(ring):
+                    out[sym] = {p: 0 for p in self.patterns}
+                    continue
+                ver = ring.version
+                cached = self._cache.get(key)
+                if cached is not None and cached[0] == ver:
+                    out[sym] = cached[1]
+                    continue
+                v = ring.view(W)
+                block = np.full((4, W), np.nan)
+                block[:, W - len(v):] = v._data[1:5]
+            miss.append(sym)
+            versions.append(ver)
+            rows.append(block)
+        if miss:
+            block = np.stack(rows, axis=1)  # (4, S, W)
+            res = detect(block[0], block[1], block[2], block[3], self.patterns)
+            with self._lock:
+                for i, sym in enumerate(miss):
+                    sig = {name: int(arr[i]) for name, arr in res.items()}
+                    self._cache[(market, sym, tf)] = (versions[i], sig)
+                    out[sym] = sig
+        with self._lock:
+            self.hits += len(out) - len(miss)
+            self.misses += len(miss)
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+pattern_engine = PatternEngine()
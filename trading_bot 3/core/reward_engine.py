@@ -21,7 +21,7 @@ def portfolio_reward(trades):
     return float(np.mean(rewards))
 
 def update_account_reward(shared_state):
-    with shared_state.lock:
+    with shared_state.trade_lock:
         closed = shared_state.closed_trades
         reward = portfolio_reward(closed)
         shared_state.accounts["spot"]["reward_score"] = reward
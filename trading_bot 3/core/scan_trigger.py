@@ -0,0 +1,83 @@
+"""
+Scan Trigger – markiert Symbole als 'dirty', wenn sich für den Scanner etwas geändert hat.
+
+Quellen: Kerzenabschluss (add_candle) und Preisbewegungen über eine Schwelle
+seit der letzten Bewertung (upsert_tick). Der Scanner wartet auf der Condition
+und holt sich nur die fälligen Symbole ab – mit Mindest- und Höchstabstand pro Symbol.
+"""
+
+import os
+import threading
+
+from core import clock
+
+SCAN_PRICE_THRESHOLD_PCT = float(os.getenv("SCAN_PRICE_THRESHOLD_PCT", "0.05"))
+
+
+class ScanTrigger:
+    def __init__(self, price_threshold_pct: float = SCAN_PRICE_THRESHOLD_PCT):
+        self.price_threshold_pct = float(price_threshold_pct)
+        self.cond = threading.Condition()
+        self._dirty = {}       # symbol → Grund ("tick" / "candle")
+        self._ref_price = {}   # symbol → Preis bei der letzten Bewertung
+        self._last_eval = {}   # symbol → Zeitpunkt der letzten Bewertung
+        self.wakeups = 0
+        self.last_evaluated = 0
+        self.evaluated_total = 0
+
+    def on_tick(self, symbol: str, price: float):
+        # Heißer Pfad (WS-Threads): ohne Lock prüfen, nur beim Übergang zu 'dirty' locken
+        if symbol in self._dirty:
+            return
+        ref = self._ref_price.get(symbol)
+        if ref is None or abs(price - ref) * 100.0 >= ref * self.price_threshold_pct:
+            self.mark_dirty(symbol, "tick")
+
+    def mark_dirty(self, symbol: str, reason: str = "candle"):
+        with self.cond:
+            if symbol not in self._dirty:
+                self._dirty[symbol] = reason
+                self.cond.notify()
+
+    def next_batch(self, universe, min_interval: float, max_interval: float):
+        """
+        Blockiert, bis mindestens ein Symbol fällig ist, und gibt (symbole, gründe) zurück.
+        Fällig: dirty und seit min_interval nicht bewertet, oder seit max_interval gar nicht bewertet.
+        """
+        with self.cond:
+            while True:
+                now = clock.now()
+                last = self._last_eval
+                due, reasons, wait = [], {}, max_interval
+                for sym in universe:
+                    age = now - last.get(sym, 0.0)
+                    reason = self._dirty.get(sym)
+                    if reason is not None and age >= min_interval:
+                        due.append(sym); reasons[sym] = reason
+                    elif age >= max_interval:
+                        due.append(sym); reasons[sym] = "stale"
+                    else:
+                        wait = min(wait, (min_interval if reason is not None else max_interval) - age)
+                if due:
+                    for sym in due:
+                        self._dirty.pop(sym, None)
+                    self.wakeups += 1
+                    self.last_evaluated = len(due)
+                    self.evaluated_total += len(due)
+                    return due, reasons
+                self.cond.wait(timeout=max(0.01, wait))
+
+    def mark_evaluated(self, prices: dict, ts: float = None):
+        ts = clock.now() if ts is None else ts
+        with self.cond:
+            for sym, price in prices.items():
+                self._last_eval[sym] = ts
+                if price:
+                    self._ref_price[sym] = float(price)
+
+    def next_due_in(self, universe, max_interval: float) -> float:
+        """Sekunden bis zur nächsten erzwungenen Bewertung (für next_scan_at im Dashboard)."""
+        now = clock.now()
+        with self.cond:
+            oldest = min((self._last_eval.get(s, 0.0) for s in universe), default=now)
+        return max(0.0, oldest + max_interval - now)
@@ -1,18 +1,23 @@
-import threading, time, math, random
-import pandas as pd
+import threading, math, random, time
+from core import clock, metrics
 from core.shared_state import shared_state
 from core.paper_trader import open_position, check_and_close_all
 from core.ai.online_rl import agent 
-from core.decision_engine.simple_decision import decide_trade
-from core.time_aggregation import aggregate_ticks, calculate_atr
+from core.decision_engine.batch_decision import decide_batch
+from core.time_aggregation import aggregate_ticks, calculate_atr, mtf_trend as _mtf_trend
+from core.indicator_engine import VOLUME_PERIOD
+from core.scanner.batch import BatchScanner
+from core.features.pipeline import feature_pipeline
+from core.pattern_engine import pattern_engine
+from core.symbol_fetcher import universe_from_env
 
-BASE_UNIVERSE = [
+BASE_UNIVERSE = universe_from_env([
     "BTCUSDT","ETHUSDT","SOLUSDT","BNBUSDT","XRPUSDT","ADAUSDT","DOGEUSDT","TRXUSDT","MATICUSDT","DOTUSDT",
     "LTCUSDT","BCHUSDT","ATOMUSDT","LINKUSDT","XLMUSDT","XMRUSDT","APTUSDT","ARBUSDT","OPUSDT","NEARUSDT",
     "ICPUSDT","FTMUSDT","INJUSDT","SUIUSDT","HBARUSDT","ALGOUSDT","GALAUSDT","SANDUSDT","AXSUSDT","APEUSDT",
     "RNDRUSDT","PEPEUSDT","SHIBUSDT","TONUSDT","FLOWUSDT","EGLDUSDT","CRVUSDT","AAVEUSDT","DYDXUSDT","FILUSDT",
     "BLURUSDT","STXUSDT","ONEUSDT","RUNEUSDT","COAIUSDT","BTTUSDT","ETCUSDT","KASUSDT","SEIUSDT","TIAUSDT"
-]
+])
 
 SCALPER_CAP_PCT = 1.00
 CONSERVATIVE_CAP_PCT = 0.00
@@ -20,6 +25,9 @@ MARGIN_PER_TRADE = 15.0
 SCALPER_VOLATILITY_THRESHOLD = 0.5 
 VOLUME_AVG_PERIOD = 20 
 MIN_CANDLE_COUNT = 20
+BATCH_CANDIDATES = 20 # Kandidaten pro Strategie, die im Batch-Modus an decide_batch gehen
+MIN_EVAL_INTERVAL_SEC = 1.0 # Event-Modus: frühestens so oft wird ein Symbol neu bewertet
+MAX_EVAL_INTERVAL_SEC = 30.0 # Event-Modus: spätestens nach dieser Zeit auch ohne Änderung
 
 def _features_from_ticks(symbol: str):
     spot = shared_state.ticks.get(("spot", symbol))
@@ -34,7 +42,7 @@ def _features_from_ticks(symbol: str):
     trend = (price - float(prev)) / max(1e-9, float(prev)) * 100.0
     vol_tick = abs(trend)
     
-    historical_candles = shared_state.get_historical_candles("futures", symbol, 300)
+    historical_candles = shared_state.get_candle_view("futures", symbol, 300)
     
     # [FIX] Sicherheits-Check
     if len(historical_candles) < MIN_CANDLE_COUNT:
@@ -42,103 +50,163 @@ def _features_from_ticks(symbol: str):
                  "mtf_trend": 0.0, "candles": historical_candles, "volume_ratio": 1.0}
     
     atr_pct = calculate_atr("futures", symbol) 
-    mtf_trend = agent.get_mtf_trend_placeholder() 
+    mtf_trend = _mtf_trend("futures", symbol)
     
     volume_ratio = 1.0
-    if len(historical_candles) >= VOLUME_AVG_PERIOD:
-        df_candles = pd.DataFrame(historical_candles)
-        if 'volume' in df_candles.columns:
-            # [FIX] Der Fehler trat hier auf, weil die ATR-Funktion eine Liste zurückgibt, wenn Daten fehlen.
-            # Der Fehler wurde in time_aggregation.py behoben, indem ein Fallback auf 0.0 gesetzt wurde.
-            # Hier nur die Logik zur Volumenberechnung
-            avg_volume = df_candles['volume'].rolling(window=VOLUME_AVG_PERIOD).mean().iloc[-1]
-            current_volume = df_candles['volume'].iloc[-1]
-            if avg_volume > 0:
-                volume_ratio = current_volume / avg_volume
+    ind = shared_state.get_indicators("futures", symbol, 300)
+    if VOLUME_AVG_PERIOD == VOLUME_PERIOD:
+        if ind and ind["bars"] >= VOLUME_AVG_PERIOD and ind["vol_sma"] > 0:
+            volume_ratio = ind["volume"] / ind["vol_sma"]
+    elif len(historical_candles) >= VOLUME_AVG_PERIOD:
+        volumes = historical_candles.volume
+        avg_volume = volumes[-VOLUME_AVG_PERIOD:].mean()
+        if avg_volume > 0:
+            volume_ratio = volumes[-1] / avg_volume
 
     tick["prev"] = price
+    patterns = pattern_engine.signals("futures", (symbol,), 300)[symbol]
     
     return {"price": price, "trend": trend, "vol": vol_tick, "atr_pct": atr_pct, 
-            "mtf_trend": mtf_trend, "candles": historical_candles, "volume_ratio": volume_ratio}
+            "mtf_trend": mtf_trend, "candles": historical_candles, "volume_ratio": volume_ratio, "patterns": patterns,
+            "rsi": ind["rsi"] if ind else None, "sma": ind["sma"] if ind else None}
 
 def _score(feat: dict) -> float:
     return abs(feat["trend"]) * (1.0 + 0.2 * feat["vol"]) * (1.0 + abs(feat["mtf_trend"])) * (1.0 + 0.1 * feat.get("volume_ratio", 1.0))
 
-def start_scanner_thread(scan_interval=10, max_open_per_scan=5, margin_per_trade=MARGIN_PER_TRADE):
+def _collect_candidates(batch, symbols, max_open_per_scan):
+    t0 = time.perf_counter()
+    try:
+        return _collect(batch, symbols, max_open_per_scan)
+    finally:
+        metrics.observe("feature", time.perf_counter() - t0)
+        metrics.inc("scans_total")
+
+def _collect(batch, symbols, max_open_per_scan):
+    if batch is not None:
+        # Ganzes Universum vektorisiert, nur die Top-Kandidaten kommen als Dicts zurück
+        return batch.scan(top_k=max(BATCH_CANDIDATES, max_open_per_scan), symbols=symbols)
+
+    feats_raw = []
+    for sym in symbols:
+        f = _features_from_ticks(sym)
+        if f:
+            f["symbol"] = sym 
+            feats_raw.append(f)
+
+    scalper_coins = [f for f in feats_raw if f.get("atr_pct", 0.0) > SCALPER_VOLATILITY_THRESHOLD]
+    conservative_coins = [f for f in feats_raw if f.get("atr_pct", 0.0) <= SCALPER_VOLATILITY_THRESHOLD]
+    scalper_coins.sort(key=_score, reverse=True)
+    conservative_coins.sort(key=_score, reverse=True)
+    return scalper_coins, conservative_coins
+
+def _open_candidates(coins, strategy, cap, max_open_per_scan, margin_per_trade):
+    current_used = shared_state.get_used_margin_by_strategy(strategy)
+    allowed = max(0, cap - current_used)
+    opened = 0
+    if not coins or allowed <= 0:
+        return
+
+    # Ein Feature-Vektor pro Bar, geteilt mit fusion_core und dem RL-Agenten (über die Trade-Features)
+    bars = feature_pipeline.compute_batch("futures", [f["symbol"] for f in coins], 300)
+    for f in coins:
+        f["bar"] = bars[f["symbol"]]
+    # Alle Kandidaten in einem Durchgang entscheiden, beste Signale zuerst
+    t0 = time.perf_counter()
+    decisions = decide_batch(coins, strategy, agent=agent)
+    metrics.observe("decision", time.perf_counter() - t0)
+    metrics.inc("decisions_total", len(coins), strategy=strategy)
+    for decision in decisions:
+        if opened >= max_open_per_scan or opened * margin_per_trade >= allowed: break
+        f = coins[decision["row"]]
+        if decision.get("action"):
+            trade_margin = margin_per_trade 
+            if decision.get("risk_adjusted_margin"): trade_margin = decision["risk_adjusted_margin"]
+            open_position(f["symbol"], decision["action"], "spot", 
+                          entry_price=f["price"], margin=trade_margin, leverage=decision["leverage"], 
+                          tp_pct=decision["tp_pct"], sl_pct=decision["sl_pct"], features=f, strategy=strategy)
+            open_position(f["symbol"], decision["action"], "futures", 
+                          entry_price=f["price"], margin=trade_margin, leverage=decision["leverage"], 
+                          tp_pct=decision["tp_pct"], sl_pct=decision["sl_pct"], features=f, strategy=strategy)
+            opened += 1
+
+def _trade_candidates(scalper_coins, conservative_coins, max_open_per_scan, margin_per_trade):
+    total_cap = shared_state.daycap_total
+    _open_candidates(scalper_coins, "scalper", total_cap * SCALPER_CAP_PCT, max_open_per_scan, margin_per_trade)
+    _open_candidates(conservative_coins, "conservative", total_cap * CONSERVATIVE_CAP_PCT, max_open_per_scan, margin_per_trade)
+
+def start_scanner_thread(scan_interval=10, max_open_per_scan=5, margin_per_trade=MARGIN_PER_TRADE, batch_mode=False,
+                         event_driven=False, min_eval_interval=MIN_EVAL_INTERVAL_SEC, max_eval_interval=MAX_EVAL_INTERVAL_SEC):
+    batch = BatchScanner(BASE_UNIVERSE, min_candles=MIN_CANDLE_COUNT, volume_period=VOLUME_AVG_PERIOD,
+                         volatility_threshold=SCALPER_VOLATILITY_THRESHOLD) if batch_mode else None
+
     def run():
         print("[SCAN] Scanner Thread läuft ✅")
         while True:
             try:
                 aggregate_ticks()
-                
-                feats_raw = []
-                for sym in BASE_UNIVERSE:
-                    f = _features_from_ticks(sym)
-                    if f:
-                        f["symbol"] = sym 
-                        feats_raw.append(f)
-
-                scalper_coins = [f for f in feats_raw if f.get("atr_pct", 0.0) > SCALPER_VOLATILITY_THRESHOLD]
-                conservative_coins = [f for f in feats_raw if f.get("atr_pct", 0.0) <= SCALPER_VOLATILITY_THRESHOLD]
-
-                total_cap = shared_state.daycap_total
-                scalper_cap = total_cap * SCALPER_CAP_PCT
-                conservative_cap = total_cap * CONSERVATIVE_CAP_PCT
-                
-                scalper_coins.sort(key=_score, reverse=True)
-                conservative_coins.sort(key=_score, reverse=True)
+                scalper_coins, conservative_coins = _collect_candidates(batch, BASE_UNIVERSE, max_open_per_scan)
 
                 hot = [f["symbol"] for f in scalper_coins[:5]] + [f["symbol"] for f in conservative_coins[:5]]
                 
                 with shared_state.lock:
                     shared_state.hot_coins = hot
-                    shared_state.next_scan_at = time.time() + scan_interval
+                    shared_state.next_scan_at = clock.now() + scan_interval
 
                 if hot:
                     print("[SCAN] Hot-Coins:", hot[:10])
 
-                current_scalper_used = shared_state.get_used_margin_by_strategy("scalper")
-                scalper_allowed = max(0, scalper_cap - current_scalper_used)
-                opened = 0
-                
-                for f in scalper_coins:
-                    if opened >= max_open_per_scan or opened * margin_per_trade >= scalper_allowed: break
-                    decision = decide_trade(f, agent, strategy="scalper")
-                    if decision and decision.get("action"):
-                        trade_margin = margin_per_trade 
-                        if decision.get("risk_adjusted_margin"): trade_margin = decision["risk_adjusted_margin"]
-                        open_position(f["symbol"], decision["action"], "spot", 
-                                      entry_price=f["price"], margin=trade_margin, leverage=decision["leverage"], 
-                                      tp_pct=decision["tp_pct"], sl_pct=decision["sl_pct"], features=f, strategy="scalper")
-                        open_position(f["symbol"], decision["action"], "futures", 
-                                      entry_price=f["price"], margin=trade_margin, leverage=decision["leverage"], 
-                                      tp_pct=decision["tp_pct"], sl_pct=decision["sl_pct"], features=f, strategy="scalper")
-                        opened += 1
-                        
-                current_conservative_used = shared_state.get_used_margin_by_strategy("conservative")
-                conservative_allowed = max(0, conservative_cap - current_conservative_used)
-                opened = 0
+                _trade_candidates(scalper_coins, conservative_coins, max_open_per_scan, margin_per_trade)
+                check_and_close_all()
+                clock.sleep(scan_interval)
+            except Exception as e:
+                print("[SCANNER] Fehler:", e)
+                clock.sleep(3)
+
+    def run_events():
+        print(f"[SCAN] Event-Scanner läuft ✅ (min={min_eval_interval}s, max={max_eval_interval}s)")
+        trigger = shared_state.scan_trigger
+        hot_scores = {}  # symbol → (score, scalper?) der letzten Bewertung
+        last_aggregate = 0.0
+        while True:
+            try:
+                symbols, reasons = trigger.next_batch(BASE_UNIVERSE, min_eval_interval, max_eval_interval)
+                now = clock.now()
+                if now - last_aggregate >= 1.0:
+                    aggregate_ticks()
+                    last_aggregate = now
 
+                scalper_coins, conservative_coins = _collect_candidates(batch, symbols, max_open_per_scan)
+                trigger.mark_evaluated({s: _tick_price(s) for s in symbols}, now)
+
+                for sym in symbols:
+                    hot_scores.pop(sym, None)
+                for f in scalper_coins:
+                    hot_scores[f["symbol"]] = (_score(f), True)
                 for f in conservative_coins:
-                    if opened >= max_open_per_scan or opened * margin_per_trade >= conservative_allowed: break
-                    decision = decide_trade(f, agent, strategy="conservative")
-                    if decision and decision.get("action"):
-                        trade_margin = margin_per_trade
-                        if decision.get("risk_adjusted_margin"): trade_margin = decision["risk_adjusted_margin"]
-                        open_position(f["symbol"], decision["action"], "spot", 
-                                      entry_price=f["price"], margin=trade_margin, leverage=decision["leverage"], 
-                                      tp_pct=decision["tp_pct"], sl_pct=decision["sl_pct"], features=f, strategy="conservative")
-                        open_position(f["symbol"], decision["action"], "futures", 
-                                      entry_price=f["price"], margin=trade_margin, leverage=decision["leverage"], 
-                                      tp_pct=decision["tp_pct"], sl_pct=decision["sl_pct"], features=f, strategy="conservative")
-                        opened += 1
-                        
+                    hot_scores[f["symbol"]] = (_score(f), False)
+                ranked = sorted(hot_scores.items(), key=lambda kv: kv[1][0], reverse=True)
+                hot = [s for s, (_, sc) in ranked if sc][:5] + [s for s, (_, sc) in ranked if not sc][:5]
+
+                with shared_state.lock:
+                    shared_state.hot_coins = hot
+                    shared_state.next_scan_at = clock.now() + trigger.next_due_in(BASE_UNIVERSE, max_eval_interval)
+                    shared_state.scan_stats = {"wakeups": trigger.wakeups, "last_evaluated": len(symbols),
+                                               "evaluated_total": trigger.evaluated_total}
+
+                n_dirty = sum(1 for r in reasons.values() if r != "stale")
+                print(f"[SCAN] Wake #{trigger.wakeups}: {len(symbols)} Symbole bewertet (dirty={n_dirty}, stale={len(symbols) - n_dirty})")
+
+                _trade_candidates(scalper_coins, conservative_coins, max_open_per_scan, margin_per_trade)
                 check_and_close_all()
-                time.sleep(scan_interval)
             except Exception as e:
                 print("[SCANNER] Fehler:", e)
-                time.sleep(3)
-    threading.Thread(target=run, daemon=True, name="Scanner").start()
+                clock.sleep(3)
+
+    threading.Thread(target=run_events if event_driven else run, daemon=True, name="Scanner").start()
+
+def _tick_price(symbol: str):
+    tick = shared_state.ticks.get(("futures", symbol)) or shared_state.ticks.get(("spot", symbol))
+    return tick.get("price") if tick else None
 
 def start_auto_trade():
     print("[BOOT] AutoTrade (Scalper+Trader) gestartet ✅")
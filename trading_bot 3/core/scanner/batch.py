@@ -0,0 +1,147 @@
+"""
+Batch-Scan – bewertet das ganze Universum pro Zyklus mit NumPy statt Symbol für Symbol.
+
+Baut einmal pro Zyklus eine (Symbole × Bars)-Matrix aus den Kerzen-Ringen,
+rechnet trend/vol/atr_pct/volume_ratio/RSI/SMA und die Kerzenmuster (Pattern Engine) vektorisiert
+und wählt die besten Kandidaten per partieller Top-k-Selektion (argpartition).
+Zurück kommen dieselben Feature-Dicts wie aus _features_from_ticks – nur für die Auswahl.
+"""
+
+import numpy as np
+from core.shared_state import shared_state
+from core.indicator_engine import ATR_PERIOD, SMA_PERIOD
+from core.time_aggregation.bar_engine import MTF_TREND_TFS
+from core.pattern_engine import detect, PATTERN_SET
+
+CANDLE_INTERVAL = 300
+
+
+def _top_k(score: np.ndarray, idx: np.ndarray, k: int) -> np.ndarray:
+    """Indizes (aus idx) der k besten Scores, absteigend sortiert – ohne Vollsortierung."""
+    if k <= 0 or idx.size == 0:
+        return idx[:0]
+    s = score[idx]
+    if idx.size > k:
+        part = np.argpartition(-s, k - 1)[:k]
+    else:
+        part = np.arange(idx.size)
+    return idx[part[np.argsort(-s[part], kind="stable")]]
+
+
+class BatchScanner:
+    def __init__(self, symbols, market="futures", interval=CANDLE_INTERVAL,
+                 min_candles=20, volume_period=20, volatility_threshold=0.5, mtf_timeframes=MTF_TREND_TFS):
+        self.symbols = list(symbols)
+        self.market = market
+        self.interval = interval
+        self.min_candles = min_candles
+        self.volume_period = volume_period
+        self.volatility_threshold = volatility_threshold
+        self.window = max(volume_period, SMA_PERIOD, 3)
+        self._index = {sym: i for i, sym in enumerate(self.symbols)}
+        self._prev = np.full(len(self.symbols), np.nan)
+        self.mtf_timeframes = tuple(mtf_timeframes)
+
+    def compute(self, symbols=None):
+        """Feature-Matrix für alle (oder die angegebenen) Symbole. Liefert (cols: dict[str, ndarray], views: list)."""
+        if symbols is None:
+            rows = np.arange(len(self.symbols))
+        else:
+            rows = np.array([self._index[s] for s in symbols if s in self._index], dtype=np.int64)
+        syms = [self.symbols[r] for r in rows]
+        S, W = len(syms), self.window
+        price = np.full(S, np.nan)
+        bars = np.zeros(S, dtype=np.int64)
+        atr_pct = np.zeros(S)
+        rsi = np.full(S, np.nan)
+        mtf_close = np.full((len(self.mtf_timeframes), S), np.nan)
+        mtf_sma = np.full((len(self.mtf_timeframes), S), np.nan)
+        ohlcv = np.full((5, S, W), np.nan)  # open, high, low, close, volume
+        views = [None] * S
+
+        ticks = shared_state.ticks
+        store = shared_state.candles_history
+        for i, sym in enumerate(syms):
+            tick = ticks.get(("futures", sym)) or ticks.get(("spot", sym))
+            if not tick:
+                continue
+            price[i] = float(tick.get("price", 0.0))
+            key = (self.market, sym, self.interval)
+            with shared_state.stripe_lock(sym):
+                ring = store.get(key)
+                if ring is None or not len(ring):
+                    continue
+                view = ring.view()
+                views[i] = view
+                n = min(len(view), W)
+                ohlcv[:, i, W - n:] = view._data[1:6, -n:]
+                bars[i] = len(view)
+                ind = shared_state.indicators.get(key)
+                for j, tf in enumerate(self.mtf_timeframes):
+                    hi = shared_state.indicators.get((self.market, sym, tf))
+                    if hi:
+                        mtf_close[j, i], mtf_sma[j, i] = hi["close"], hi["sma"]
+            if ind:
+                atr_pct[i] = ind["atr_pct"] if ind["bars"] >= ATR_PERIOD else 0.0
+                rsi[i] = ind["rsi"]
+
+        has_tick = ~np.isnan(price)
+        prev = self._prev[rows]
+        first = has_tick & np.isnan(prev)
+        ready = has_tick & ~first
+        warm = ready & (bars >= self.min_candles)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            trend = np.where(ready, (price - prev) / np.maximum(1e-9, prev) * 100.0, 0.0)
+        vol = np.abs(trend)
+
+        o, h, l, c, v = ohlcv
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sma = c[:, -SMA_PERIOD:].mean(axis=1)
+            vavg = v[:, -self.volume_period:].mean(axis=1)
+            vr = v[:, -1] / vavg
+        volume_ratio = np.where(warm & (bars >= self.volume_period) & (vavg > 0), vr, 1.0)
+        atr_pct = np.where(warm, atr_pct, 0.0)
+        # MTF-Trend wie bar_engine.mtf_trend(): Mittel aus (close / SMA - 1) * 100 der höheren Timeframes
+        with np.errstate(invalid="ignore", divide="ignore"):
+            dev = np.where(mtf_sma > 0, (mtf_close / mtf_sma - 1.0) * 100.0, np.nan)
+        n_tf = (~np.isnan(dev)).sum(axis=0)
+        mtf = np.where(warm & (n_tf > 0), np.nansum(dev, axis=0) / np.maximum(1, n_tf), 0.0)
+
+        patterns = detect(o, h, l, c, PATTERN_SET)  # je Muster int8 (S,): +1 bullisch / -1 bärisch
+
+        score = np.abs(trend) * (1.0 + 0.2 * vol) * (1.0 + np.abs(mtf)) * (1.0 + 0.1 * volume_ratio)
+
+        # Wie _features_from_ticks: prev nur bei erster Beobachtung oder genug Kerzen nachziehen
+        upd = first | warm
+        self._prev[rows[upd]] = price[upd]
+
+        cols = {
+            "price": price, "trend": trend, "vol": vol, "atr_pct": atr_pct, "mtf_trend": mtf,
+            "volume_ratio": volume_ratio, "rsi": rsi, "sma": sma, "bars": bars,
+            "patterns": patterns,
+            "score": score, "valid": has_tick, "ready": ready, "symbol": syms,
+        }
+        return cols, views
+
+    def _feature_dict(self, i: int, cols: dict, views: list) -> dict:
+        f = {"symbol": cols["symbol"][i], "price": float(cols["price"][i])}
+        for k in ("trend", "vol", "atr_pct", "mtf_trend", "volume_ratio"):
+            f[k] = float(cols[k][i])
+        if cols["ready"][i] and views[i] is not None:
+            f["candles"] = views[i]
+            f["patterns"] = {name: int(arr[i]) for name, arr in cols["patterns"].items()}
+            if cols["bars"][i] >= self.min_candles:
+                f["rsi"] = float(cols["rsi"][i])
+                f["sma"] = float(cols["sma"][i])
+        return f
+
+    def scan(self, top_k: int = 5, symbols=None):
+        """Liefert (scalper_coins, conservative_coins): je die top_k Feature-Dicts, absteigend nach Score."""
+        cols, views = self.compute(symbols)
+        valid = cols["valid"]
+        scalper = np.flatnonzero(valid & (cols["atr_pct"] > self.volatility_threshold))
+        conservative = np.flatnonzero(valid & (cols["atr_pct"] <= self.volatility_threshold))
+        score = cols["score"]
+        return ([self._feature_dict(i, cols, views) for i in _top_k(score, scalper, top_k)],
+                [self._feature_dict(i, cols, views) for i in _top_k(score, conservative, top_k)])
@@ -1,21 +1,64 @@
-import threading, time, json
-from collections import deque, defaultdict
+import os, math, threading, time, json
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from core import clock
+from core.candle_store import CandleStore, CandleView, rows_to_array
+from core.indicator_engine import IndicatorEngine
+from core.scan_trigger import ScanTrigger
+from core.state_snapshot import StateSnapshot, SNAPSHOT_PUBLISH_MS
+
+CANDLE_HISTORY_LEN = int(os.getenv("CANDLE_HISTORY_LEN", "200"))
+LOCK_STRIPES = int(os.getenv("STATE_LOCK_STRIPES", "16"))
+
+def _public_trade(t: dict) -> dict:
+    # Ohne 'features' (enthält u. a. 200 Kerzen) – die braucht nur der RL-Pfad, nicht der Leser
+    return {k: v for k, v in t.items() if k != "features"}
 
 class SharedState:
-    def __init__(self):
+    def __init__(self, lock_stripes: int = LOCK_STRIPES):
+        # Lock-Aufteilung: self.lock für Sonstiges (hot_coins, ws_status, Alt-Aufrufer),
+        # trade_lock für Trades + Daycap/PnL, Stripes für Ticks/Kerzen pro Symbol-Hash.
+        # lock_stripes=0 → alles über den einen globalen Lock (altes Design, für Benchmarks).
+        # Feste Reihenfolge bei mehreren Locks: lock → trade_lock → Stripes aufsteigend.
         self.lock = threading.RLock()
+        self.lock_stripes = int(lock_stripes)
+        if self.lock_stripes > 0:
+            self.trade_lock = threading.RLock()
+            self._stripes = [threading.RLock() for _ in range(self.lock_stripes)]
+        else:
+            self.trade_lock = self.lock
+            self._stripes = [self.lock]
+        self._dirty_ticks = [set() for _ in self._stripes]  # pro Stripe: seit dem letzten Publish geänderte Ticks
+        self._pub_lock = threading.Lock()
+        self.snapshot_cond = threading.Condition()  # notify_all bei jeder neuen Snapshot-Version
+        self._published = StateSnapshot(0, 0.0, {}, {}, {})
+        self._publisher = None
         self.start_ts = time.time()
         self.ws_status = {"spot": "disconnected", "futures": "disconnected"}
+        self.feed_last_msg = {"spot": 0.0, "futures": 0.0}  # letzte WS-Nachricht pro Markt (für den REST-Fallback)
+        # Empfangsverzögerung über dem gleitenden Minimum (ohne Uhrversatz) pro Markt; latency_ms = langsamster
+        # noch lebender Feed (für den Latenz-Guard) – gepflegt von ws_client.common
+        self.feed_latency_ms = {"spot": 0, "futures": 0}
         self.latency_ms = 0
+        # Ein Dict für alle Stripes, bewusst nicht geteilt: jeder Schlüssel (market, SYMBOL) gehört fest
+        # zu einem Stripe und wird nur unter dessen Lock geschrieben. Einzelne Dict-Operationen
+        # (get/setitem, auch mit Resize) sind unter dem GIL atomar – ohne GIL (3.13t) sperrt das Dict
+        # selbst –, verschiedene Stripes schreiben also nie denselben Eintrag. Leser (Scanner,
+        # Paper-Trader) greifen per get() ohne Lock zu; über ticks iteriert nur, wer alle Locks hält.
         self.ticks = {}
-        self.current_candles = defaultdict(lambda: {"start_ts": 0, "open": 0, "high": 0, "low": 0, "close": 0}) 
-        self.candles_history = defaultdict(lambda: deque(maxlen=200)) 
+        self.candles_history = CandleStore(capacity=CANDLE_HISTORY_LEN)
+        self.indicators = IndicatorEngine()
+        self.scan_trigger = ScanTrigger()
+        self.tick_listeners = []  # callback(market, symbol, price, ts) nach jedem Tick, außerhalb des Locks
+        self.volume_listeners = []  # callback(market, [(SYMBOL, volume24h, turnover24h)], ts) nach Ticker-Volumen
+        self.candle_listeners = []  # callback(market, symbol, interval, [kerzen]) nach neuen Kerzen, außerhalb des Locks
         self.daycap_total = 150.0
         self.daycap_used = 0.0
         self.open_trades = {}
         self.closed_trades = deque(maxlen=50)
         self.hot_coins = []
         self.next_scan_at = 0
+        self.scan_stats = {}
         self.total_profit = 0.0
         self.total_loss = 0.0
 
@@ -23,8 +66,24 @@ class SharedState:
     def available(self):
         return max(0.0, self.daycap_total - self.daycap_used)
 
+    def _stripe(self, symbol: str) -> int:
+        return hash(symbol.upper()) % len(self._stripes)
+
+    def stripe_lock(self, symbol: str):
+        return self._stripes[self._stripe(symbol)]
+
+    @contextmanager
+    def all_locks(self):
+        """Alle Shards gleichzeitig sperren – für konsistente Multi-Shard-Snapshots."""
+        with ExitStack() as stack:
+            stack.enter_context(self.lock)
+            stack.enter_context(self.trade_lock)
+            for lk in self._stripes:
+                stack.enter_context(lk)
+            yield
+
     def reset_daycap(self, total=150.0):
-        with self.lock:
+        with self.trade_lock:
             self.daycap_total = float(total)
             self.daycap_used = 0.0
             print(f"[STATE] Daycap zurückgesetzt (total={self.daycap_total:.2f}, used=0.0)")
@@ -36,7 +95,7 @@ class SharedState:
         self.total_loss += float(loss)
 
     def open_trade(self, t: dict):
-        with self.lock:
+        with self.trade_lock:
             tid = t["id"]
             if tid in self.open_trades:
                 return
@@ -44,10 +103,10 @@ class SharedState:
             self.daycap_used += float(t.get("margin_used", 0.0))
 
     def close_trade(self, tid: str, exit_price: float, pnl: float, ts: float):
-        with self.lock:
+        with self.trade_lock:
             t = self.open_trades.pop(tid, None)
             if not t:
-                return
+                return None
             
             t["exit_price"] = float(exit_price)
             t["pnl"] = float(pnl)
@@ -63,37 +122,150 @@ class SharedState:
                 self.apply_profit(pnl)
             else:
                 self.apply_loss(pnl)
+            return t
 
     def upsert_tick(self, market: str, symbol: str, price: float, ts: float):
-        with self.lock:
-            self.ticks[(market.lower(), symbol.upper())] = {"price": float(price), "ts": ts}
-            self.latency_ms = max(0, int((time.time() - ts) * 1000))
-            
-    def get_current_candle_state(self, key):
-        with self.lock:
-            return self.current_candles[key]
+        self.upsert_ticks(market, ((symbol.upper(), float(price)),), ts)
+
+    def upsert_ticks(self, market: str, items, ts: float = None) -> int:
+        """
+        Batch-Ingest für eine WS-Nachricht: items = [(SYMBOL, price), ...] (Symbol bereits upper).
+        Ein Lock pro Stripe statt pro Tick, Tick-Dicts werden pro Symbol wiederverwendet
+        (Zusatzfelder wie 'prev' bleiben erhalten). Unveränderte Preise erneuern nur 'ts'
+        und lösen weder Scanner-Trigger noch Listener aus. Rückgabe: Anzahl geänderter Preise.
+        """
+        if not items:
+            return 0
+        ts = clock.now() if ts is None else ts
+        market = market.lower()
+        n = len(self._stripes)
+        if len(items) == 1 or n == 1:
+            groups = ((hash(items[0][0]) % n, items),)
+        else:
+            by_stripe = {}
+            for it in items:
+                by_stripe.setdefault(hash(it[0]) % n, []).append(it)
+            groups = by_stripe.items()
 
-    def update_candle_state(self, key, state):
-        with self.lock:
-            self.current_candles[key] = state
+        ticks = self.ticks
+        changed = []
+        for i, group in groups:
+            dirty = self._dirty_ticks[i]
+            with self._stripes[i]:
+                for sym, price in group:
+                    key = (market, sym)
+                    slot = ticks.get(key)
+                    if slot is None:
+                        ticks[key] = {"price": price, "ts": ts}
+                    elif slot["price"] == price:
+                        slot["ts"] = ts
+                        continue
+                    else:
+                        slot["price"] = price
+                        slot["ts"] = ts
+                    dirty.add(key)
+                    changed.append((sym, price))
+        if not changed:
+            return 0
 
-    def add_candle(self, market: str, symbol: str, interval: int, cndl: dict):
+        on_tick = self.scan_trigger.on_tick
+        listeners = self.tick_listeners
+        for sym, price in changed:
+            on_tick(sym, price)
+            for cb in listeners:
+                try:
+                    cb(market, sym, price, ts)
+                except Exception as e:
+                    print("[STATE] Tick-Listener Fehler:", e)
+        return len(changed)
+
+    def upsert_volumes(self, market: str, items, ts: float = None):
+        """24h-Volumen/-Umsatz aus den Tickern (items = [(SYMBOL, volume24h, turnover24h)]) an die Listener geben."""
+        ts = clock.now() if ts is None else ts
+        market = market.lower()
+        for cb in self.volume_listeners:
+            try:
+                cb(market, items, ts)
+            except Exception as e:
+                print("[STATE] Volumen-Listener Fehler:", e)
+
+    def add_candle(self, market: str, symbol: str, interval: int, cndl: dict, replace: bool = False):
+        """
+        Abgeschlossene Kerze anhängen. Gleiche oder ältere start_ts gehen über den Merge-Pfad:
+        replace=True (bestätigte Exchange-Kline) ersetzt eine vorhandene Kerze, sonst gewinnt die vorhandene.
+        """
+        key = (market, symbol, interval)
+        g, nan = cndl.get, math.nan
+        start_ts = g("start_ts", nan)
+        with self.stripe_lock(symbol):
+            ring = self.candles_history[key]
+            last_ts = ring.last_ts()
+            if start_ts <= last_ts:
+                in_order = False
+            else:
+                in_order = True
+                ring.append(cndl)
+                self.indicators.update(key, start_ts, g("high", nan), g("low", nan),
+                                       g("close", nan), g("volume", nan))
+        if not in_order:
+            if start_ts == last_ts and not replace:
+                return  # Duplikat der letzten Kerze (z. B. Tick-Bar nach der Kline) – nichts zu tun
+            self.merge_candles(market, symbol, interval, [cndl], prefer_new=replace)
+            return
+        self.scan_trigger.mark_dirty(symbol, "candle")
+        self._notify_candles(market, symbol, interval, [cndl])
+
+    def _notify_candles(self, market, symbol, interval, candles):
+        for cb in self.candle_listeners:
+            try:
+                cb(market, symbol, interval, candles)
+            except Exception as e:
+                print("[STATE] Kerzen-Listener Fehler:", e)
+
+    def merge_candles(self, market: str, symbol: str, interval: int, candles, prefer_new: bool = False) -> int:
+        """
+        Kerzen außerhalb der Reihenfolge einpflegen (Backfill, Cache, Klines): Ring mergen und
+        die Indikatoren des Schlüssels aus dem Ergebnis neu aufbauen. candles: Liste von Dicts.
+        Listener bekommen nur die Kerzen, die danach tatsächlich im Ring stehen.
+        """
         key = (market, symbol, interval)
-        with self.lock:
-            self.candles_history[key].append(cndl)
+        with self.stripe_lock(symbol):
+            ring = self.candles_history[key]
+            if not prefer_new:
+                have = set(ring.view().start_ts.tolist())
+                candles = [c for c in candles if c.get("start_ts") not in have]
+                if not candles:
+                    return len(ring)
+            n = ring.merge(rows_to_array(candles), prefer_new=prefer_new)
+            self.indicators.rebuild(key, ring.view())
+        self.scan_trigger.mark_dirty(symbol, "candle")
+        self._notify_candles(market, symbol, interval, candles)
+        return n
 
     def get_historical_candles(self, market: str, symbol: str, interval: int):
+        # Kompatibilitäts-Pfad (Liste von Dicts); neue Leser nehmen get_candle_view()
+        key = (market, symbol, interval)
+        with self.stripe_lock(symbol):
+            return self.candles_history[key].view().to_dicts()
+
+    def get_candle_view(self, market: str, symbol: str, interval: int, n: int = None) -> CandleView:
         key = (market, symbol, interval)
-        with self.lock:
-            return list(self.candles_history[key])
+        with self.stripe_lock(symbol):
+            return self.candles_history[key].view(n)
+
+    def get_indicators(self, market: str, symbol: str, interval: int):
+        # O(1)-Lesepfad für Scanner/Decision-Engine (None, solange keine Kerze existiert)
+        with self.stripe_lock(symbol):
+            return self.indicators.get((market, symbol, interval))
 
     def get_latest_candle_count(self, market: str ="futures", symbol: str = "BTCUSDT", interval: int = 300) -> int:
         key = (market, symbol, interval)
-        with self.lock:
-            return len(self.candles_history[key])
+        with self.stripe_lock(symbol):
+            ring = self.candles_history.get(key)
+            return len(ring) if ring is not None else 0
 
     def get_used_margin_by_strategy(self, strategy: str) -> float:
-        with self.lock:
+        with self.trade_lock:
             used = 0.0
             for t in self.open_trades.values():
                 if t.get("strategy") == strategy:
@@ -101,32 +273,124 @@ class SharedState:
             return used
 
     def snapshot(self):
-        with self.lock:
-            ws_stat = self.ws_status
-            if not isinstance(ws_stat, dict):
-                ws_stat = {"spot": str(ws_stat), "futures": "?"}
-            
-            current_pnl = 0.0
-            open_trades_list = []
-            for t in self.open_trades.values():
-                open_trades_list.append(dict(t))
-            
-            candle_count = self.get_latest_candle_count()
-
-            return {
-                "ws_status": dict(ws_stat),
-                "latency_ms": self.latency_ms,
-                "ticks": {f"{m.lower()}:{s.upper()}": d for (m, s), d in self.ticks.items()},
-                "accounts": {
-                    "daycap": {"total": self.daycap_total, "used": self.daycap_used},
-                    "total_pnl": self.total_profit + self.total_loss + current_pnl
-                },
-                "open_trades": list(self._last_n(open_trades_list, 5)),
-                "closed_trades": list(self._last_n(self.closed_trades, 5)),
-                "hot_coins": list(self.hot_coins[:10]),
-                "next_scan_at": self.next_scan_at,
-                "candle_count": candle_count
-            }
+        """Aktueller Lesestand (Dict, nicht verändern). Hält keinen Schreib-Lock."""
+        return self.published().data
+
+    def changes_since(self, version: int) -> dict:
+        """Nur die Änderungen seit 'version' (siehe StateSnapshot.changes_since)."""
+        return self.published().changes_since(version)
+
+    def published(self, max_age_ms: float = SNAPSHOT_PUBLISH_MS) -> StateSnapshot:
+        # Läuft kein Publisher-Thread, baut der Leser selbst nach – höchstens alle max_age_ms
+        snap = self._published
+        if self._publisher is None and time.time() - snap.ts >= max_age_ms / 1000.0:
+            snap = self.publish()
+        return snap
+
+    def publish(self) -> StateSnapshot:
+        """
+        Baut einen neuen StateSnapshot (copy-on-write) und veröffentlicht ihn.
+        Jeder Shard wird nur kurz unter seinem eigenen Lock gelesen.
+        """
+        with self._pub_lock:
+            prev = self._published
+            data = prev.data
+            sec_ver = dict(prev.section_versions)
+            ver = prev.version + 1
+            changed = False
+
+            # Ticks: nur die seit dem letzten Publish geänderten Einträge kopieren
+            new_ticks = {}
+            for i, lk in enumerate(self._stripes):
+                with lk:
+                    dirty, self._dirty_ticks[i] = self._dirty_ticks[i], set()
+                    for key in dirty:
+                        new_ticks[f"{key[0]}:{key[1]}"] = dict(self.ticks[key])
+            ticks, tick_ver = data.get("ticks", {}), prev.tick_versions
+            if new_ticks:
+                ticks, tick_ver = dict(ticks), dict(tick_ver)
+                ticks.update(new_ticks)
+                for k in new_ticks:
+                    tick_ver[k] = ver
+                sec_ver["ticks"] = ver
+                changed = True
+
+            with self.trade_lock:
+                sections = {
+                    "trades": {
+                        "open_trades": [_public_trade(t) for t in self._last_n(self.open_trades.values(), 5)],
+                        "closed_trades": [_public_trade(t) for t in self._last_n(self.closed_trades, 5)],
+                    },
+                    "accounts": {
+                        "accounts": {
+                            "daycap": {"total": self.daycap_total, "used": self.daycap_used},
+                            "total_pnl": self.total_profit + self.total_loss,
+                        },
+                    },
+                }
+            with self.lock:
+                ws_stat = self.ws_status
+                if not isinstance(ws_stat, dict):
+                    ws_stat = {"spot": str(ws_stat), "futures": "?"}
+                sections["meta"] = {
+                    "ws_status": dict(ws_stat),
+                    "latency_ms": self.latency_ms,
+                    "hot_coins": list(self.hot_coins[:10]),
+                    "next_scan_at": self.next_scan_at,
+                    "candle_count": self.get_latest_candle_count(),
+                    "scan_stats": dict(self.scan_stats),
+                }
+
+            out = {"ticks": ticks}
+            for sec, vals in sections.items():
+                if any(data.get(k) != v for k, v in vals.items()):
+                    sec_ver[sec] = ver
+                    changed = True
+                    out.update(vals)
+                else:
+                    out.update({k: data[k] for k in vals})
+
+            if not changed:
+                snap = StateSnapshot(prev.version, time.time(), data, prev.section_versions, prev.tick_versions)
+            else:
+                out["version"] = ver
+                snap = StateSnapshot(ver, time.time(), out, sec_ver, tick_ver)
+            self._published = snap
+        if changed:
+            with self.snapshot_cond:
+                self.snapshot_cond.notify_all()
+        return snap
+
+    def wait_for_version(self, version: int, timeout: float = None) -> StateSnapshot:
+        """Blockiert, bis ein Snapshot neuer als 'version' veröffentlicht ist (oder timeout)."""
+        if self._publisher is None:
+            # Ohne Publisher-Thread selbst im Publish-Takt nachbauen; timeout=None wartet wie wait_for unbegrenzt
+            deadline = None if timeout is None else time.time() + timeout
+            snap = self.published()
+            while snap.version <= version and (deadline is None or time.time() < deadline):
+                time.sleep(SNAPSHOT_PUBLISH_MS / 1000.0)
+                snap = self.published()
+            return snap
+        with self.snapshot_cond:
+            self.snapshot_cond.wait_for(lambda: self._published.version > version, timeout)
+        return self._published
+
+    def start_snapshot_publisher(self, interval_ms: float = SNAPSHOT_PUBLISH_MS):
+        if self._publisher is not None:
+            return self._publisher
+
+        def run():
+            while True:
+                try:
+                    self.publish()
+                except Exception as e:
+                    print("[STATE] Snapshot-Publisher Fehler:", e)
+                time.sleep(interval_ms / 1000.0)
+
+        self._publisher = threading.Thread(target=run, daemon=True, name="SnapshotPublisher")
+        self._publisher.start()
+        print(f"[STATE] Snapshot-Publisher läuft (alle {interval_ms:.0f} ms)")
+        return self._publisher
 
     def _last_n(self, iterable, n):
         arr = list(iterable)
@@ -0,0 +1,52 @@
+"""
+State Snapshot – unveränderlicher, versionierter Lesestand von SharedState.
+
+Der Publisher baut den Stand höchstens alle SNAPSHOT_PUBLISH_MS Millisekunden neu,
+und zwar inkrementell: nur geänderte Ticks werden kopiert, die kleinen Sektionen
+(Trades, Konto, Meta) werden verglichen und bekommen nur bei Änderung eine neue Version.
+Leser holen sich das aktuelle Objekt ohne Lock und dürfen es nicht verändern.
+"""
+
+import os
+
+SNAPSHOT_PUBLISH_MS = int(os.getenv("SNAPSHOT_PUBLISH_MS", "250"))
+SECTIONS = ("ticks", "trades", "accounts", "meta")
+# Sektion → Schlüssel im (alten) snapshot()-Dict
+SECTION_KEYS = {
+    "ticks": ("ticks",),
+    "trades": ("open_trades", "closed_trades"),
+    "accounts": ("accounts",),
+    "meta": ("ws_status", "latency_ms", "hot_coins", "next_scan_at", "candle_count", "scan_stats"),
+}
+
+
+class StateSnapshot:
+    __slots__ = ("version", "ts", "data", "section_versions", "tick_versions")
+
+    def __init__(self, version, ts, data, section_versions, tick_versions):
+        self.version = version                    # höchste Version aller Sektionen
+        self.ts = ts
+        self.data = data                          # Dict im Format von SharedState.snapshot()
+        self.section_versions = section_versions  # Sektion → Version der letzten Änderung
+        self.tick_versions = tick_versions        # "market:SYMBOL" → Version der letzten Änderung
+
+    def changes_since(self, version: int) -> dict:
+        """
+        Nur was sich nach 'version' geändert hat: geänderte Sektionen komplett,
+        bei Ticks nur die geänderten Einträge. version<=0 → voller Stand ("full": True).
+        """
+        version = int(version or 0)
+        out = {"version": self.version, "since": version, "full": version <= 0}
+        if version >= self.version:
+            return out
+        data = self.data
+        for sec in SECTIONS:
+            if self.section_versions.get(sec, 0) <= version:
+                continue
+            if sec == "ticks":
+                ticks = data["ticks"]
+                out["ticks"] = {k: ticks[k] for k, v in self.tick_versions.items() if v > version}
+            else:
+                for key in SECTION_KEYS[sec]:
+                    out[key] = data[key]
+        return out
@@ -1,5 +1,7 @@
 import os
 
+from dotenv import load_dotenv
+
 def get_dynamic_symbols(limit=50):
     """
     Liefert IMMER ein Tuple (spot_symbols, futures_symbols).
@@ -16,3 +18,17 @@ def get_dynamic_symbols(limit=50):
 
     syms = list(dict.fromkeys(syms))[:limit]  # uniq + limit
     return (syms, syms)
+
+
+def universe_from_env(default, env="UNIVERSE_SYMBOLS"):
+    """
+    Universum aus der Umgebung überschreiben (z. B. 1000+ Symbole gegen bench.mock_exchange):
+    kommagetrennte Liste oder @pfad (Symbole komma- oder zeilengetrennt). Ohne Variable bleibt default.
+    """
+    load_dotenv()  # gleiche Sicht für Scanner und Feeds, egal wer zuerst importiert wird
+    raw = os.getenv(env, "").strip()
+    if raw.startswith("@"):
+        with open(raw[1:], encoding="utf-8") as f:
+            raw = f.read()
+    syms = [s.strip().upper() for s in raw.replace("\n", ",").split(",") if s.strip()]
+    return list(dict.fromkeys(syms)) or list(default)
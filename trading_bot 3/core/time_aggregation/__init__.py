@@ -1 +1,2 @@
-from .ram_bars import on_tick_to_bars
+from .bar_engine import BarEngine, bar_engine, mtf_trend, start_bar_clock, TIMEFRAMES
+from .candles import aggregate_ticks, calculate_atr, CANDLE_INTERVAL_SEC
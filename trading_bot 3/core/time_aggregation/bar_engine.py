@@ -0,0 +1,271 @@
+"""
+Bar Engine – hierarchische Multi-Timeframe-Bars (1m/3m/5m/15m/1h) aus Ticks.
+
+Nur die 1m-Bars werden aus Ticks gebaut. Jeder höhere Timeframe entsteht durch
+Zusammenfassen abgeschlossener Bars des nächstkleineren Teilers (60 → 180, 60 → 300,
+300 → 900, 900 → 3600) – nie durch erneutes Aggregieren der Ticks.
+
+Abgeschlossene Bars landen per add_candle im gemeinsamen CandleStore unter
+(market, symbol, tf) und sind damit über dieselbe Zero-Copy-API lesbar wie alles andere:
+shared_state.get_candle_view(market, symbol, tf). Bestätigte Exchange-Klines ersetzen
+Tick-Bars mit gleichem start_ts (add_candle(..., replace=True) im Kline-Handler).
+
+Streaming pro Tick (O(1), tick_listeners) statt Abtasten im Scanner-Zyklus:
+- Volumen/Umsatz sind echte Deltas der Ticker-Felder volume24h/turnover24h
+  (volume_listeners). Das 24h-Fenster ist rollierend – fällt mehr alter Umsatz heraus
+  als neuer hinzukommt, ist das Delta negativ und zählt als 0. Bars, die vor dem ersten
+  Volumen-Stand eines Symbols begonnen haben, tragen volume = NaN (unbekannt).
+- Bars schließen auf der Zeitgrenze auch ohne neuen Tick: ein Timer-Wheel mit
+  1-s-Slots (BarClock-Thread) kennt für jede offene Bar ihr Ende; pro Sekunde wird nur
+  der fällige Slot angefasst statt aller Symbole.
+"""
+
+import math
+import os
+import threading
+import time
+
+from core import clock, metrics
+from core.shared_state import shared_state
+
+TIMEFRAMES = (60, 180, 300, 900, 3600)
+MTF_TREND_TFS = (900, 3600)  # Timeframes für den MTF-Trend
+BAR_CLOSE_GRACE_SEC = float(os.getenv("BAR_CLOSE_GRACE_SEC", "0.25"))  # Puffer für verspätete Ticks
+_NAN = math.nan
+
+
+def _parents(timeframes):
+    # Höherer TF ← größter kleinerer TF, der ihn teilt
+    out = {}
+    for tf in timeframes[1:]:
+        out[tf] = max(p for p in timeframes if p < tf and tf % p == 0)
+    return out
+
+
+class BarEngine:
+    def __init__(self, timeframes=TIMEFRAMES, state=None):
+        self.state = state or shared_state
+        self.lock = threading.Lock()
+        self.reset(timeframes)
+
+    def reset(self, timeframes=None):
+        """Alle offenen Bars, Volumen-Basen und das Wheel verwerfen, optional mit neuen Timeframes (Backtest)."""
+        with self.lock:
+            self.timeframes = tuple(sorted(timeframes or self.timeframes))
+            self.base = self.timeframes[0]
+            self.parent = _parents(self.timeframes)
+            self.children = {tf: [c for c, p in self.parent.items() if p == tf] for tf in self.timeframes}
+            # tf → (market, symbol) → [start, o, h, l, c, volume, turnover]
+            self._forming = {tf: {} for tf in self.timeframes}
+            self._last_closed = {}  # (market, symbol) → start der zuletzt geschlossenen Basis-Bar
+            self._vol_last = {}     # (market, symbol) → [volume24h, turnover24h] zuletzt gesehen
+            # Timer-Wheel: Slot = Bar-Ende % Größe; größer als der längste TF → keine Runden nötig
+            self._wheel_size = 1 << max(self.timeframes).bit_length()
+            self._wheel = [[] for _ in range(self._wheel_size)]
+            self._wheel_pos = None  # nächste noch nicht abgearbeitete Sekunde
+            self._due = None        # während advance(): (sec, [Einträge]) für Bars, die schon beim Anlegen fällig sind
+            self.closed_by_clock = 0
+
+    # ---------- Eingang ----------
+
+    def on_tick(self, market: str, symbol: str, price: float, ts: float):
+        """Tick-Listener (SharedState.tick_listeners): aktualisiert die laufende 1m-Bar in O(1)."""
+        key = (market, symbol)
+        start = int(ts // self.base) * self.base
+        closed = []
+        with self.lock:
+            cur = self._forming[self.base]
+            b = cur.get(key)
+            if b is not None and start > b[0]:
+                del cur[key]
+                self._close(self.base, key, b, closed)
+                b = None
+            if b is None:
+                if start <= self._last_closed.get(key, -1):
+                    return  # verspäteter Tick einer schon geschlossenen Bar
+                v0 = 0.0 if key in self._vol_last else _NAN
+                cur[key] = [start, price, price, price, price, v0, v0]
+                self._schedule(self.base, key, start)
+            elif start == b[0]:
+                if price > b[2]: b[2] = price
+                if price < b[3]: b[3] = price
+                b[4] = price
+            # ältere Ticks (start < b[0]) verwerfen
+        self._emit(closed)
+
+    def on_volume(self, market: str, items, ts: float):
+        """Volumen-Listener (SharedState.volume_listeners): 24h-Stände → Deltas in die laufende 1m-Bar."""
+        cur = self._forming[self.base]
+        with self.lock:
+            for sym, vol24, turn24 in items:
+                key = (market, sym)
+                last = self._vol_last.get(key)
+                if last is None:
+                    self._vol_last[key] = [vol24, turn24]  # erster Stand = Basis, noch kein Delta
+                    continue
+                b = cur.get(key)
+                if vol24 == vol24:
+                    if b is not None and last[0] == last[0] and vol24 > last[0]:
+                        b[5] += vol24 - last[0]
+                    last[0] = vol24
+                if turn24 == turn24:
+                    if b is not None and last[1] == last[1] and turn24 > last[1]:
+                        b[6] += turn24 - last[1]
+                    last[1] = turn24
+
+    def advance(self, now: float):
+        """Timer-Wheel bis now abarbeiten: schließt fällige Bars, auch wenn kein Tick mehr kam."""
+        closed = []
+        with self.lock:
+            sec = int(now - BAR_CLOSE_GRACE_SEC)
+            pos = self._wheel_pos
+            if pos is None or sec - pos >= self._wheel_size:
+                pos = sec - self._wheel_size + 1  # erster Lauf bzw. lange Pause: jeden Slot einmal
+            size, wheel = self._wheel_size, self._wheel
+            self._due = (sec, [])
+            try:
+                while pos <= sec:
+                    slot = wheel[pos % size]
+                    if slot:
+                        keep = []
+                        slot.sort(key=lambda e: e[1])  # kleine TFs zuerst: Teil-Bars vor ihrer Eltern-Bar schließen
+                        for entry in slot:
+                            if entry[0] > sec:
+                                keep.append(entry)
+                            else:
+                                self._close_entry(entry, closed)
+                        wheel[pos % size] = keep
+                    pos += 1
+                # Beim Aufholen (lange Pause, stilles Symbol) legt das Roll-up höhere Bars an, deren Ende
+                # schon vorbei ist – ihr Slot ist in diesem Durchlauf bereits abgearbeitet
+                due = self._due[1]
+                while due:
+                    batch, due[:] = sorted(due, key=lambda e: e[1]), []
+                    for entry in batch:
+                        self._close_entry(entry, closed)
+            finally:
+                self._due = None
+            self._wheel_pos = pos
+        self.closed_by_clock += len(closed)
+        self._emit(closed)
+        return len(closed)
+
+    def close_due(self, now: float):
+        """Schließt alle Bars, deren Zeitraum vorbei ist – Vollscan, unabhängig vom Timer-Wheel."""
+        closed = []
+        with self.lock:
+            for tf in self.timeframes:
+                cur = self._forming[tf]
+                for key in [k for k, b in cur.items() if b[0] + tf <= now]:
+                    self._close(tf, key, cur.pop(key), closed)
+        self._emit(closed)
+        return len(closed)
+
+    def run_clock(self):
+        """BarClock-Thread: kurz nach jeder vollen Sekunde das Wheel weiterdrehen."""
+        print(f"[BARS] Bar-Clock läuft ✅ (Timeframes {', '.join(str(tf) for tf in self.timeframes)}s)")
+        while True:
+            now = time.time()
+            time.sleep(math.floor(now) + 1 + BAR_CLOSE_GRACE_SEC - now)
+            try:
+                self.advance(time.time())
+            except Exception as e:
+                print("[BARS] Fehler:", e)
+
+    def current(self, market: str, symbol: str, tf: int):
+        """Laufende (noch offene) Bar als Dict oder None."""
+        with self.lock:
+            b = self._forming.get(tf, {}).get((market, symbol))
+            return _to_dict(b) if b else None
+
+    # ---------- Roll-up ----------
+
+    def _schedule(self, tf, key, start):
+        end = start + tf
+        if self._due is not None and end <= self._due[0]:
+            self._due[1].append((end, tf, key, start))
+            return
+        self._wheel[end % self._wheel_size].append((end, tf, key, start))
+
+    def _close_entry(self, entry, closed):
+        _, tf, key, start = entry
+        b = self._forming[tf].get(key)
+        if b is not None and b[0] == start:  # sonst schon per Tick bzw. Roll-up geschlossen
+            del self._forming[tf][key]
+            self._close(tf, key, b, closed)
+
+    def _close(self, tf, key, bar, closed):
+        if tf == self.base:
+            self._last_closed[key] = bar[0]
+        closed.append((key, tf, bar))
+        for child_tf in self.children[tf]:
+            self._rollup(child_tf, key, bar, tf, closed)
+
+    def _rollup(self, tf, key, child, child_tf, closed):
+        cur = self._forming[tf]
+        start = int(child[0] // tf) * tf
+        hb = cur.get(key)
+        if hb is not None and hb[0] != start:
+            if hb[0] > start:
+                return  # verspätete Teil-Bar eines schon abgeschlossenen Zeitraums
+            del cur[key]
+            self._close(tf, key, hb, closed)
+            hb = None
+        if hb is None:
+            hb = cur[key] = list(child)
+            hb[0] = start
+            self._schedule(tf, key, start)
+        else:
+            if child[2] > hb[2]: hb[2] = child[2]
+            if child[3] < hb[3]: hb[3] = child[3]
+            hb[4] = child[4]
+            hb[5] += child[5]  # NaN (unbekannt) bleibt NaN
+            hb[6] += child[6]
+        if child[0] + child_tf >= start + tf:
+            # letzte Teil-Bar des Zeitraums → höhere Bar ist komplett
+            del cur[key]
+            self._close(tf, key, hb, closed)
+
+    def _emit(self, closed):
+        if not closed:
+            return
+        for (market, symbol), tf, bar in closed:
+            self.state.add_candle(market, symbol, tf, _to_dict(bar))
+        now = clock.now()
+        for _, tf, bar in closed:
+            metrics.observe("candle_close", now - (bar[0] + tf))
+
+
+def _to_dict(b):
+    d = {"start_ts": int(b[0]), "open": b[1], "high": b[2], "low": b[3], "close": b[4]}
+    if b[5] == b[5]:
+        d["volume"] = b[5]
+    if b[6] == b[6]:
+        d["turnover"] = b[6]
+    return d
+
+
+def mtf_trend(market: str, symbol: str, timeframes=MTF_TREND_TFS, state=None) -> float:
+    """
+    Multi-Timeframe-Trend in %: Mittel aus (close / SMA - 1) * 100 über die höheren Timeframes,
+    direkt aus den inkrementellen Indikatoren (O(1) pro Timeframe). 0.0 ohne Daten.
+    """
+    state = state or shared_state
+    vals = []
+    for tf in timeframes:
+        ind = state.get_indicators(market, symbol, tf)
+        if ind and ind["sma"] == ind["sma"] and ind["sma"] > 0:
+            vals.append((ind["close"] / ind["sma"] - 1.0) * 100.0)
+    return sum(vals) / len(vals) if vals else 0.0
+
+
+def start_bar_clock(engine=None) -> threading.Thread:
+    engine = engine or bar_engine
+    t = threading.Thread(target=engine.run_clock, daemon=True, name="BarClock")
+    t.start()
+    return t
+
+
+bar_engine = BarEngine()
+shared_state.tick_listeners.append(bar_engine.on_tick)
+shared_state.volume_listeners.append(bar_engine.on_volume)
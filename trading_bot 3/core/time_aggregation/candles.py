@@ -0,0 +1,38 @@
+import pandas as pd
+import ta
+from core import clock
+from core.shared_state import shared_state
+from core.indicator_engine import ATR_PERIOD
+from core.time_aggregation.bar_engine import bar_engine
+
+CANDLE_INTERVAL_SEC = 300
+
+def aggregate_ticks(now=None):
+    """
+    Bars werden pro Tick in der Bar Engine gebaut (tick_listeners) und vom BarClock-Thread
+    auf der Zeitgrenze geschlossen. Hier nur das Timer-Wheel bis jetzt weiterdrehen –
+    kostet nur die fälligen Bars (Sicherheitsnetz, falls die Bar-Clock nicht läuft).
+    """
+    return bar_engine.advance(clock.now() if now is None else now)
+
+def calculate_atr(market, symbol, interval=CANDLE_INTERVAL_SEC, period=ATR_PERIOD):
+    if period == ATR_PERIOD:
+        # Inkrementell gepflegter Wert – kein Neurechnen der Historie pro Scan
+        ind = shared_state.get_indicators(market, symbol, interval)
+        if not ind or ind["bars"] < period:
+            return 0.0
+        return ind["atr_pct"]
+
+    view = shared_state.get_candle_view(market, symbol, interval)
+    if len(view) < period:
+        return 0.0
+
+    try:
+        atr_values = ta.volatility.average_true_range(pd.Series(view.high), pd.Series(view.low),
+                                                      pd.Series(view.close), window=period)
+        if atr_values.empty: return 0.0
+        last_atr = atr_values.iloc[-1]
+        current_price = view.close[-1]
+        if current_price > 0: return (last_atr / current_price) * 100.0
+    except Exception: pass
+    return 0.0
@@ -0,0 +1,46 @@
+"""
+JSON-Decoder für die WS-Feeds: orjson, falls installiert (deutlich schneller bei
+Ticker-Bursts), sonst die Standardbibliothek. Beide liefern dieselben dicts/lists.
+"""
+
+import json
+
+_NAN = float("nan")
+
+try:
+    import orjson
+    loads = orjson.loads
+    DECODER = "orjson"
+except ImportError:
+    loads = json.loads
+    DECODER = "json"
+
+
+def parse_tickers(data: dict, volumes: list = None):
+    """
+    Bybit-v5 tickers.* → [(SYMBOL, price), ...]; Deltas ohne Preisfeld werden übersprungen.
+    Mit volumes (Liste) werden zusätzlich (SYMBOL, volume24h, turnover24h) angehängt –
+    auch für reine Volumen-Deltas; fehlende Felder = NaN.
+    """
+    arr = data.get("data")
+    if isinstance(arr, dict):
+        arr = (arr,)
+    items = []
+    for it in arr or ():
+        sym = it.get("symbol")
+        if not sym:
+            continue
+        last = it.get("lastPrice") or it.get("markPrice")
+        if last:
+            try:
+                items.append((sym.upper(), float(last)))
+            except (TypeError, ValueError):
+                pass
+        if volumes is not None:
+            v, t = it.get("volume24h"), it.get("turnover24h")
+            if v or t:
+                try:
+                    volumes.append((sym.upper(), float(v) if v else _NAN, float(t) if t else _NAN))
+                except (TypeError, ValueError):
+                    pass
+    return items
@@ -0,0 +1,79 @@
+"""
+Gemeinsamer Nachrichtenpfad der WS-Feeds (spot_ws, futures_ws): Tape, Zähler, Decode,
+Feed-Lebenszeichen, Empfangsverzögerung und Ticker-Upsert. Die Feed-Module liefern nur
+ihren Markt und die Verarbeitung ihrer Topics.
+
+Empfangsverzögerung: die Metrik ws_receive zeigt den Rohwert (inkl. Uhrversatz zur Börse),
+der Latenz-Guard nur den Anstieg über dem gleitenden Minimum – pro Markt in
+shared_state.feed_latency_ms. shared_state.latency_ms ist der langsamste Feed, der in den
+letzten LATENCY_FEED_MAX_AGE_SEC noch Daten geliefert hat (ein stiller Feed hält keinen alten Wert fest).
+"""
+
+import os
+import time
+
+from core import clock, metrics
+from core.shared_state import shared_state
+from . import tape
+from .codec import loads, parse_tickers
+
+LATENCY_FEED_MAX_AGE_SEC = float(os.getenv("LATENCY_FEED_MAX_AGE_SEC", "30"))
+
+_lags = {}  # market → metrics.RelativeLag
+
+
+def observe_receive(market: str, data, wall: float):
+    # Exchange-Zeitstempel (ms) der Nachricht → Empfangsverzögerung; Acks/Pongs haben keinen
+    ts = data.get("ts") if isinstance(data, dict) else None
+    if not ts:
+        return
+    now = clock.now()
+    lag = now - float(ts) / 1000.0
+    metrics.observe("ws_receive", lag)
+    rel = _lags.get(market) or _lags.setdefault(market, metrics.RelativeLag())
+    lat = shared_state.feed_latency_ms
+    lat[market] = int(rel.update(now, lag) * 1000)
+    last = shared_state.feed_last_msg
+    shared_state.latency_ms = max((ms for m, ms in lat.items() if wall - last.get(m, 0.0) <= LATENCY_FEED_MAX_AGE_SEC),
+                                  default=lat[market])
+
+
+def handle_message(market: str, msg, process):
+    """Eine rohe WS-Nachricht des Feeds 'market' annehmen; process(data) verarbeitet die Topics."""
+    tag = f"WSS-{market.upper()}"
+    now = time.time()
+    tape.record(market, msg, now)
+    metrics.inc("messages_total", market=market)
+    t0 = time.perf_counter()
+    try:
+        data = loads(msg)
+    except Exception as e:
+        print(f"[{tag}] ⚠ JSON decode error:", e)
+        return
+    metrics.observe("decode", time.perf_counter() - t0)
+    if "topic" in data:
+        shared_state.feed_last_msg[market] = now  # nur Daten – Pongs/Acks zählen nicht als lebender Feed
+    observe_receive(market, data, now)
+
+    process(data)
+
+    if "success" in data and data.get("op") != "ping":
+        print(f"[{tag}] Ack: {data.get('ret_msg')}")
+
+
+def upsert_tickers(market: str, data: dict):
+    """tickers.*-Nachricht → Preise (upsert_ticks, Stufe 'upsert') und 24h-Volumen in den State."""
+    volumes = []
+    items = parse_tickers(data, volumes)
+    now = clock.now()
+    if items:
+        try:
+            t0 = time.perf_counter()
+            n = shared_state.upsert_ticks(market, items, now)
+            metrics.observe("upsert", time.perf_counter() - t0)
+            metrics.inc("ticks_total", n, market=market)
+        except Exception as e:
+            print(f"[WSS-{market.upper()}] ❌ Upsert-Fehler ({len(items)} Ticks): {e}")
+    if volumes:
+        shared_state.upsert_volumes(market, volumes, now)
+    shared_state.ws_status[market] = "active"
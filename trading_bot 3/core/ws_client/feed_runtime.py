@@ -0,0 +1,316 @@
+"""
+Feed Runtime – alle Bybit-Websockets (Spot, Futures, weitere Shards) in einem asyncio-Loop.
+
+- Reconnect mit exponentiellem Backoff + Jitter statt fester 3 s
+- Diff-basiertes (Re-)Subscribe: nur neue Topics abonnieren, entfallene abbestellen.
+  Jeder Request trägt eine req_id; 'subscribed' folgt den Acks der Börse. Abgelehnte
+  Sammel-Requests werden einzeln wiederholt, um das fehlerhafte Topic zu finden
+  (bleibt bis zum nächsten Reconnect als 'rejected' liegen).
+- Heartbeat ({"op": "ping"}) und Stale-Erkennung pro Verbindung: nur Topic-Daten zählen
+  als Lebenszeichen – Pongs/Acks halten eine Verbindung ohne laufende Abos nicht am Leben
+- Große Universen werden stabil per Topic-Hash auf mehrere Verbindungen verteilt
+  (max_topics ist der Richtwert pro Verbindung)
+- Übergabe an den State-Layer über eine begrenzte Queue: ein Ingest-Thread
+  dekodiert und verarbeitet; bei voller Queue fliegt die älteste Nachricht raus
+  (Ticker überholen sich selbst) – gezählt in den Backpressure-Metriken.
+
+Benötigt das optionale Paket `websockets`; ohne bleibt start.py bei den alten Threads.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+import zlib
+
+import websockets
+
+from core.shared_state import shared_state
+
+BACKOFF_BASE_SEC = float(os.getenv("FEED_BACKOFF_BASE_SEC", "0.5"))
+BACKOFF_MAX_SEC = float(os.getenv("FEED_BACKOFF_MAX_SEC", "30"))
+HEARTBEAT_SEC = float(os.getenv("FEED_HEARTBEAT_SEC", "20"))
+STALE_AFTER_SEC = float(os.getenv("FEED_STALE_AFTER_SEC", "30"))
+QUEUE_MAX = int(os.getenv("FEED_QUEUE_MAX", "10000"))
+MAX_TOPICS_PER_CONN = int(os.getenv("FEED_MAX_TOPICS_PER_CONN", "200"))
+SUBSCRIBE_CHUNK = 10   # Bybit v5: höchstens 10 args pro subscribe-Request (Spot)
+STABLE_AFTER_SEC = 30  # so lange verbunden → Backoff zurücksetzen
+
+
+class _Conn:
+    def __init__(self, feed, idx, url):
+        self.feed = feed
+        self.name = f"{feed.name}#{idx}"
+        self.url = url
+        self.topics = set()      # Soll
+        self.subscribed = set()  # Ist (auf der aktuellen Verbindung, per Ack bestätigt)
+        self.pending = {}        # req_id → (op, [topics]) bis zum Ack
+        self.rejected = set()    # von der Börse abgelehnte Topics (bis zum Reconnect)
+        self.ws = None
+        self.status = "idle"
+        self.reconnects = 0
+        self.messages = 0
+        self.last_msg = 0.0      # letzte Topic-Daten
+        self.last_ctrl = 0.0     # letzter Ack/Pong
+        self.connected_at = 0.0
+        self.last_backoff = 0.0
+
+    def stats(self, now):
+        return {"status": self.status, "topics": len(self.topics), "subscribed": len(self.subscribed),
+                "pending": sum(len(c) for _, c in self.pending.values()), "rejected": len(self.rejected),
+                "reconnects": self.reconnects, "messages": self.messages,
+                "last_msg_age": round(now - self.last_msg, 3) if self.last_msg else None,
+                "last_backoff": round(self.last_backoff, 3)}
+
+
+class _Feed:
+    def __init__(self, name, url, handler, market, max_topics):
+        self.name = name
+        self.url = url
+        self.handler = handler   # handler(msg: str) im Ingest-Thread
+        self.market = market     # Schlüssel in shared_state.ws_status
+        self.max_topics = max_topics
+        self.conns = []
+
+
+class FeedRuntime:
+    def __init__(self, queue_max=QUEUE_MAX, heartbeat=HEARTBEAT_SEC, stale_after=STALE_AFTER_SEC):
+        self.heartbeat = heartbeat
+        self.stale_after = stale_after
+        self.loop = None
+        self.feeds = {}
+        self.queue = queue.Queue(maxsize=queue_max)
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.handler_errors = 0
+        self.max_depth = 0
+        self._req_ids = itertools.count(1)
+        self._started = threading.Event()
+
+    # ---------- Konfiguration (thread-safe) ----------
+
+    def add_feed(self, name, url, topics, handler, market=None, max_topics=MAX_TOPICS_PER_CONN):
+        feed = self.feeds[name] = _Feed(name, url, handler, market or name, max_topics)
+        self.set_topics(name, topics)
+        return feed
+
+    def set_topics(self, name, topics):
+        """Verteilt die Topics stabil auf die Verbindungen des Feeds und abonniert nur die Differenz."""
+        feed = self.feeds[name]
+        topics = sorted(set(topics))
+        n = max(1, -(-len(topics) // feed.max_topics))
+        while len(feed.conns) < n:
+            conn = _Conn(feed, len(feed.conns), feed.url)
+            feed.conns.append(conn)
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self._spawn, conn)
+        shards = [set() for _ in feed.conns]
+        for t in topics:
+            shards[zlib.crc32(t.encode()) % n].add(t)
+        for conn, shard in zip(feed.conns, shards):
+            conn.topics = shard
+            if self.loop is not None:
+                asyncio.run_coroutine_threadsafe(self._sync_topics(conn), self.loop)
+
+    # ---------- Start ----------
+
+    def start(self):
+        threading.Thread(target=self._ingest_loop, daemon=True, name="FeedIngest").start()
+        threading.Thread(target=self._run_loop, daemon=True, name="FeedRuntime").start()
+        self._started.wait(5)
+        print(f"[FEED] Runtime läuft: {sum(len(f.conns) for f in self.feeds.values())} Verbindungen "
+              f"in einem Event-Loop ({', '.join(self.feeds)})")
+        return self
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        for feed in self.feeds.values():
+            for conn in feed.conns:
+                self._spawn(conn)
+        self._started.set()
+        self.loop.run_forever()
+
+    def _spawn(self, conn):
+        self.loop.create_task(self._run_conn(conn))
+
+    # ---------- Verbindung ----------
+
+    async def _run_conn(self, conn):
+        attempt = 0
+        while True:
+            conn.status = "connecting"
+            try:
+                async with websockets.connect(conn.url, ping_interval=None, open_timeout=10,
+                                              close_timeout=2, max_queue=None) as ws:
+                    conn.ws, conn.subscribed, conn.pending, conn.rejected = ws, set(), {}, set()
+                    conn.connected_at = conn.last_msg = time.time()
+                    conn.status = "connected"
+                    self._set_ws_status(conn, "connected")
+                    print(f"[FEED] {conn.name} verbunden ({conn.url})")
+                    await self._sync_topics(conn)
+                    hb = asyncio.ensure_future(self._heartbeat(conn, ws))
+                    try:
+                        await self._recv(conn, ws)
+                    finally:
+                        hb.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                conn.status = f"error:{e}"
+                self._set_ws_status(conn, f"error:{e}")
+                print(f"[FEED] {conn.name} ❌ {e}")
+            conn.ws = None
+            conn.subscribed, conn.pending = set(), {}
+            if conn.connected_at and time.time() - conn.connected_at >= STABLE_AFTER_SEC:
+                attempt = 0
+            conn.connected_at = 0.0  # fehlgeschlagene Verbindungsversuche setzen den Backoff nicht zurück
+            delay = random.uniform(0, min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * (2 ** attempt)))
+            attempt += 1
+            conn.reconnects += 1
+            conn.last_backoff = delay
+            if not conn.status.startswith("error") and conn.status != "stale":
+                conn.status = "disconnected"
+                self._set_ws_status(conn, "disconnected")
+            print(f"[FEED] {conn.name} Reconnect in {delay:.2f}s (Versuch {attempt})")
+            await asyncio.sleep(delay)
+
+    async def _recv(self, conn, ws):
+        q = self.queue
+        name = conn.feed.name
+        async for msg in ws:
+            # Bybit-Daten beginnen mit "topic"; alles andere sind Acks/Pongs ({"op": ...})
+            if (b'"topic"' if isinstance(msg, bytes) else '"topic"') in msg:
+                conn.last_msg = time.time()
+            else:
+                conn.last_ctrl = time.time()
+                self._on_control(conn, msg)
+            conn.messages += 1
+            item = (name, msg)
+            try:
+                q.put_nowait(item)
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+                q.put_nowait(item)
+            self.enqueued += 1
+            depth = q.qsize()
+            if depth > self.max_depth:
+                self.max_depth = depth
+
+    async def _heartbeat(self, conn, ws):
+        # Bybit erwartet alle ~20 s ein App-Ping; gleichzeitig Stale-Erkennung
+        tick = min(self.heartbeat, self.stale_after / 3.0)
+        last_ping = time.time()
+        while True:
+            await asyncio.sleep(tick)
+            now = time.time()
+            # Ohne abonnierbare Topics kommen keine Daten – dann reichen Pongs als Lebenszeichen
+            seen = conn.last_msg if conn.topics - conn.rejected else max(conn.last_msg, conn.last_ctrl)
+            if now - seen > self.stale_after:
+                conn.status = "stale"
+                self._set_ws_status(conn, "stale")
+                print(f"[FEED] {conn.name} ⚠ keine Daten seit {now - seen:.0f}s → Reconnect")
+                await ws.close()
+                return
+            if now - last_ping >= self.heartbeat:
+                await ws.send('{"op":"ping"}')
+                last_ping = now
+
+    async def _sync_topics(self, conn):
+        ws = conn.ws
+        if ws is None:
+            return
+        in_flight = {op: set() for op in ("subscribe", "unsubscribe")}
+        for op, chunk in conn.pending.values():
+            in_flight[op].update(chunk)
+        add = sorted(conn.topics - conn.subscribed - conn.rejected - in_flight["subscribe"])
+        drop = sorted(conn.subscribed - conn.topics - in_flight["unsubscribe"])
+        try:
+            await self._send_ops(conn, "unsubscribe", drop)
+            await self._send_ops(conn, "subscribe", add)
+        except Exception as e:
+            print(f"[FEED] {conn.name} Subscribe-Fehler: {e}")
+            return
+        if add or drop:
+            print(f"[FEED] {conn.name} +{len(add)} / -{len(drop)} Topics angefragt (aktiv: {len(conn.subscribed)})")
+
+    async def _send_ops(self, conn, op, topics, chunk_size=SUBSCRIBE_CHUNK):
+        for i in range(0, len(topics), chunk_size):
+            chunk = topics[i:i + chunk_size]
+            req_id = f"{op[:5]}-{next(self._req_ids)}"
+            conn.pending[req_id] = (op, chunk)
+            await conn.ws.send(json.dumps({"req_id": req_id, "op": op, "args": chunk}))
+
+    def _on_control(self, conn, msg):
+        """Acks auf (un)subscribe gegen die offenen Requests abgleichen; Pongs und Fremdes ignorieren."""
+        try:
+            d = json.loads(msg)
+        except ValueError:
+            return
+        entry = conn.pending.pop(d.get("req_id") or "", None) if isinstance(d, dict) else None
+        if entry is None:
+            return
+        op, chunk = entry
+        if op == "unsubscribe":
+            conn.subscribed.difference_update(chunk)  # auch bei Fehler: dann war es nicht (mehr) aktiv
+        elif d.get("success"):
+            conn.subscribed.update(chunk)
+        elif len(chunk) > 1:
+            # ein ungültiges Topic lässt den ganzen Request scheitern → einzeln wiederholen
+            asyncio.ensure_future(self._send_ops(conn, "subscribe", chunk, chunk_size=1))
+        else:
+            conn.rejected.update(chunk)
+            print(f"[FEED] {conn.name} ❌ Abo abgelehnt: {chunk[0]} ({d.get('ret_msg')})")
+        if not conn.pending and conn.subscribed:
+            conn.status = "subscribed"
+            self._set_ws_status(conn, "subscribed")
+
+    def _set_ws_status(self, conn, status):
+        # Mehrere Verbindungen pro Markt: nur die erste meldet den Status (wie bisher ein Feld pro Markt)
+        if conn is conn.feed.conns[0]:
+            shared_state.ws_status[conn.feed.market] = status
+
+    # ---------- Ingest (State-Layer) ----------
+
+    def _ingest_loop(self):
+        q = self.queue
+        feeds = self.feeds
+        while True:
+            name, msg = q.get()
+            try:
+                feeds[name].handler(msg)
+            except Exception as e:
+                self.handler_errors += 1
+                print(f"[FEED] Handler-Fehler ({name}):", e)
+            self.processed += 1
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            "queue": {"depth": self.queue.qsize(), "max_depth": self.max_depth, "capacity": self.queue.maxsize,
+                      "enqueued": self.enqueued, "processed": self.processed, "dropped": self.dropped,
+                      "handler_errors": self.handler_errors},
+            "connections": {c.name: c.stats(now) for f in self.feeds.values() for c in f.conns},
+        }
+
+
+runtime = None
+
+
+def start_feeds():
+    """Spot + Futures in einer Runtime starten (ersetzt spot_ws.run / futures_ws.run)."""
+    global runtime
+    from core.ws_client import spot_ws, futures_ws
+    runtime = FeedRuntime()
+    runtime.add_feed("spot", spot_ws.WSS_URL, spot_ws.topics(), spot_ws.handle_message)
+    runtime.add_feed("futures", futures_ws.WSS_URL, futures_ws.topics(), futures_ws.handle_message)
+    return runtime.start()
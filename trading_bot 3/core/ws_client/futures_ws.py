@@ -1,32 +1,22 @@
-import os, json, time, socket, threading
+import os, json, time, threading
 from websocket import WebSocketApp
 from dotenv import load_dotenv
+from core.symbol_fetcher import universe_from_env
 from ..shared_state import shared_state
-
-_orig_getaddrinfo = socket.getaddrinfo
-def _only_ipv4(*a, **k):
-    return [r for r in _orig_getaddrinfo(*a, **k) if r[0] == socket.AF_INET]
-socket.getaddrinfo = _only_ipv4
+from . import common
+from .common import upsert_tickers
 
 load_dotenv()
 WSS_URL = os.getenv("WSS_URL_FUTURES", "wss://stream.bybit.com/v5/public/linear")
 
-CANDLE_UNIVERSE = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT", "XRPUSDT", "ADAUSDT", "DOGEUSDT", "TRXUSDT", "MATICUSDT", "DOTUSDT"]
+CANDLE_UNIVERSE = universe_from_env(["BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT", "XRPUSDT", "ADAUSDT", "DOGEUSDT", "TRXUSDT", "MATICUSDT", "DOTUSDT"])
 
 def _process_message(data):
     topic = data.get("topic","")
     
     # 1. Ticker-Daten (für den Preis-Scan)
     if topic.startswith("tickers."):
-        arr = data.get("data")
-        if isinstance(arr, dict): arr = [arr]
-        now = time.time()
-        for it in arr or []:
-            sym = (it.get("symbol") or "").upper()
-            last = it.get("lastPrice") or it.get("markPrice") 
-            if sym and last:
-                shared_state.upsert_tick("futures", sym, float(last), now)
-        shared_state.ws_status["futures"] = "active"
+        upsert_tickers("futures", data)
 
     # 2. Kerzen-Daten (für Chart-Analyse / MTF)
     elif topic.startswith("kline.5."): 
@@ -41,34 +31,28 @@ def _process_message(data):
             # WICHTIG: Wir speichern die Kerze NUR, wenn sie abgeschlossen ist (confirm=True)
             if is_confirmed and symbol:
                 c = {
+                    'start_ts': int(it['start']) // 1000,
                     'open': float(it['open']),
                     'high': float(it['high']),
                     'low': float(it['low']),
                     'close': float(it['close']),
                     'volume': float(it['volume']),
-                    'end_ts': int(it['end']),
                 }
-                shared_state.add_candle("futures", symbol, c)
+                shared_state.add_candle("futures", symbol, 300, c, replace=True)  # ersetzt die Tick-Bar
                 print(f"[WSS-FUTURES] Kerze gespeichert: {symbol} @ {c['close']:.2f}")
 
 
+def handle_message(msg):
+    common.handle_message("futures", msg, _process_message)
+
 def _on_message(ws, msg):
-    try:
-        data = json.loads(msg)
-    except Exception as e:
-        print("[WSS-FUTURES] ⚠ JSON decode error:", e)
-        return
+    handle_message(msg)
 
-    _process_message(data)
-    
-    if "success" in data:
-        print(f"[WSS-FUTURES] Ack: {data.get('ret_msg')}")
+def topics():
+    return [f"tickers.{s}" for s in CANDLE_UNIVERSE] + [f"kline.5.{s}" for s in CANDLE_UNIVERSE]
 
 def _on_open(ws):
-    ticker_subs = [f"tickers.{s}" for s in CANDLE_UNIVERSE]
-    candle_subs = [f"kline.5.{s}" for s in CANDLE_UNIVERSE]
-
-    ws.send(json.dumps({"op": "subscribe", "args": ticker_subs + candle_subs}))
+    ws.send(json.dumps({"op": "subscribe", "args": topics()}))
     shared_state.ws_status["futures"] = "subscribed"
     print(f"[WSS-FUTURES] Subscribed to {len(CANDLE_UNIVERSE)} symbols and {len(CANDLE_UNIVERSE)} candles.")
 
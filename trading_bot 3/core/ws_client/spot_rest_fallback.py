@@ -1,24 +1,117 @@
+"""
+REST-Fallback – Bulk-Ticker über HTTPS, solange ein WS-Feed ausfällt.
 
-import threading, time, requests
+Ein Request pro Markt (/v5/market/tickers?category=spot|linear) liefert alle Symbole;
+gefiltert aufs Universum und per upsert_ticks eingespielt. Der Fallback schaltet sich
+selbst ein, wenn vom WS-Feed eines Marktes länger als REST_STALE_SEC nichts kam, und
+wieder aus, sobald der Feed REST_RECOVER_SEC lang durchgehend frisch ist.
+"""
+
+import os
+import threading
+import time
+
+from core.backfill import BYBIT_REST_URL, make_session
 from core.shared_state import shared_state
+from core.ws_client.codec import parse_tickers
+
+REST_STALE_SEC = float(os.getenv("REST_STALE_SEC", "10"))
+REST_RECOVER_SEC = float(os.getenv("REST_RECOVER_SEC", "5"))
+REST_POLL_SEC = float(os.getenv("REST_POLL_SEC", "2"))
+REST_POLL_MAX_SEC = float(os.getenv("REST_POLL_MAX_SEC", "10"))
+CHECK_SEC = 1.0
+
+_CATEGORY = {"spot": "spot", "futures": "linear"}
+
+
+class RestFallback:
+    def __init__(self, universe, markets=("spot", "futures"), base_url=None):
+        self.universe = {s.upper() for s in universe}
+        self.markets = tuple(markets)
+        self.base_url = (base_url or BYBIT_REST_URL).rstrip("/")
+        self.session = make_session(len(self.markets))
+        self.active = {m: False for m in self.markets}
+        self.interval = {m: REST_POLL_SEC for m in self.markets}
+        self.next_poll = {m: 0.0 for m in self.markets}
+        self.fresh_since = {m: 0.0 for m in self.markets}
+        self.requests = 0
+        self.errors = 0
+        self.activations = 0
+
+    def poll(self, market: str) -> int:
+        r = self.session.get(f"{self.base_url}/v5/market/tickers", params={"category": _CATEGORY[market]}, timeout=5)
+        self.requests += 1
+        r.raise_for_status()
+        data = r.json()
+        if data.get("retCode") != 0:
+            raise ValueError(f"retCode {data.get('retCode')}: {data.get('retMsg')}")
+        volumes = []
+        items = [it for it in parse_tickers({"data": data.get("result", {}).get("list")}, volumes) if it[0] in self.universe]
+        now = time.time()
+        if items:
+            shared_state.upsert_ticks(market, items, now)
+        volumes = [v for v in volumes if v[0] in self.universe]
+        if volumes:
+            shared_state.upsert_volumes(market, volumes, now)
+        return len(items)
+
+    def _update_mode(self, market: str, now: float):
+        last = shared_state.feed_last_msg.get(market, 0.0)
+        age = now - last
+        if not self.active[market]:
+            if age > REST_STALE_SEC:
+                self.active[market] = True
+                self.interval[market] = REST_POLL_SEC
+                self.next_poll[market] = now
+                self.fresh_since[market] = 0.0
+                self.activations += 1
+                why = f"seit {age:.0f}s still" if last else "noch ohne Daten"
+                print(f"[REST] {market}: WS {why} → Bulk-Fallback an")
+        elif age <= REST_STALE_SEC:
+            # Hysterese: erst aus, wenn der Feed eine Weile durchgehend frisch ist
+            self.fresh_since[market] = self.fresh_since[market] or now
+            if now - self.fresh_since[market] >= REST_RECOVER_SEC:
+                self.active[market] = False
+                print(f"[REST] {market}: WS wieder frisch → Fallback aus")
+        else:
+            self.fresh_since[market] = 0.0
+
+    def step(self, now: float = None):
+        now = time.time() if now is None else now
+        for m in self.markets:
+            self._update_mode(m, now)
+            if not self.active[m] or now < self.next_poll[m]:
+                continue
+            try:
+                n = self.poll(m)
+                shared_state.ws_status[m] = "rest-active"
+                self.interval[m] = REST_POLL_SEC
+                if n == 0:
+                    print(f"[REST] {m}: keine Universe-Symbole in der Antwort")
+            except Exception as e:
+                self.errors += 1
+                shared_state.ws_status[m] = f"rest-error:{e}"
+                # Bei Fehlern langsamer werden (bis REST_POLL_MAX_SEC), bei Erfolg zurück auf REST_POLL_SEC
+                self.interval[m] = min(REST_POLL_MAX_SEC, self.interval[m] * 2)
+            self.next_poll[m] = now + self.interval[m]
+
+    def run(self):
+        print(f"[REST] Fallback-Wächter läuft ({', '.join(self.markets)}, {len(self.universe)} Symbole)")
+        while True:
+            try:
+                self.step()
+            except Exception as e:
+                print("[REST] Fehler:", e)
+            time.sleep(CHECK_SEC)
+
+
+def start_rest_fallback(universe, markets=("spot", "futures")) -> RestFallback:
+    fb = RestFallback(universe, markets)
+    threading.Thread(target=fb.run, daemon=True, name="RestFallback").start()
+    return fb
+
 
-SPOT_SYMBOLS = ["BTCUSDT","ETHUSDT","SOLUSDT","BNBUSDT","XRPUSDT"]
-
-def _poll_loop():
-    print("[REST-SPOT] Fallback aktiviert – zieht Preise alle 2s über HTTPS.")
-    while True:
-        try:
-            for s in SPOT_SYMBOLS:
-                r = requests.get(f"https://api.bybit.com/v5/market/tickers?category=spot&symbol={s}", timeout=3)
-                data = r.json()
-                if data.get("result") and data["result"].get("list"):
-                    last = float(data["result"]["list"][0]["lastPrice"])
-                    shared_state.upsert_tick("spot", s, last, time.time())
-            shared_state.ws_status["spot"] = "rest-active"
-        except Exception as e:
-            shared_state.ws_status["spot"] = f"rest-error:{e}"
-        time.sleep(2)
-
-def start_rest_spot():
-    t = threading.Thread(target=_poll_loop, daemon=True)
-    t.start()
+def start_rest_spot(universe=None):
+    # Alter Einstiegspunkt (nur Spot)
+    from core.ws_client.spot_ws import BASE_UNIVERSE
+    return start_rest_fallback(universe or BASE_UNIVERSE, markets=("spot",))
@@ -1,61 +1,37 @@
-import os, json, time, socket, threading
+import os, json, time, threading
 from websocket import WebSocketApp
 from dotenv import load_dotenv
+from core.symbol_fetcher import universe_from_env
 from ..shared_state import shared_state
-
-_orig_getaddrinfo = socket.getaddrinfo
-def _only_ipv4(*a, **k):
-    return [r for r in _orig_getaddrinfo(*a, **k) if r[0] == socket.AF_INET]
-socket.getaddrinfo = _only_ipv4
+from . import common
+from .common import upsert_tickers
 
 load_dotenv()
 WSS_URL = os.getenv("WSS_URL_SPOT", "wss://stream.bybit.com/v5/public/spot")
 
-BASE_UNIVERSE = [
+BASE_UNIVERSE = universe_from_env([
     "BTCUSDT","ETHUSDT","SOLUSDT","BNBUSDT","XRPUSDT","ADAUSDT","DOGEUSDT",
     "TRXUSDT","MATICUSDT","DOTUSDT","LTCUSDT","BCHUSDT","ATOMUSDT","LINKUSDT",
     "XLMUSDT","XMRUSDT","APTUSDT","ARBUSDT","OPUSDT","NEARUSDT","ICPUSDT",
     "FTMUSDT","INJUSDT","SUIUSDT","HBARUSDT","ALGOUSDT","GALAUSDT","SANDUSDT",
     "AXSUSDT","APEUSDT"
-]
+])
 
 def _process_ticker_data(data):
-    topic = data.get("topic","")
-    if not topic.startswith("tickers."):
-        return
+    if data.get("topic", "").startswith("tickers."):
+        upsert_tickers("spot", data)
 
-    arr = data.get("data")
-    if isinstance(arr, dict):
-        arr = [arr]
-    
-    now = time.time()
-    
-    for it in arr or []:
-        sym = (it.get("symbol") or "").upper()
-        last = it.get("lastPrice") or it.get("markPrice") 
-        
-        if sym and last:
-            try:
-                shared_state.upsert_tick("spot", sym, float(last), now)
-            except Exception as e:
-                print(f"[WSS-SPOT] ❌ Upsert-Fehler ({sym}): {e}")
-    
-    shared_state.ws_status["spot"] = "active"
+def handle_message(msg):
+    common.handle_message("spot", msg, _process_ticker_data)
 
 def _on_message(ws, msg):
-    try:
-        data = json.loads(msg)
-    except Exception as e:
-        print("[WSS-SPOT] ⚠ JSON decode error:", e)
-        return
+    handle_message(msg)
 
-    _process_ticker_data(data)
-    
-    if "success" in data:
-        print(f"[WSS-SPOT] Ack: {data.get('ret_msg')}")
+def topics():
+    return [f"tickers.{s}" for s in BASE_UNIVERSE]
 
 def _on_open(ws):
-    subs = [f"tickers.{s}" for s in BASE_UNIVERSE]
+    subs = topics()
     ws.send(json.dumps({"op": "subscribe", "args": subs}))
     shared_state.ws_status["spot"] = "subscribed" 
     print(f"[WSS-SPOT] Subscribed to {len(subs)} symbols (tickers.*)")
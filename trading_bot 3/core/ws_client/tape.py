@@ -0,0 +1,389 @@
+"""
+Tape – rohe WS-Nachrichten aufzeichnen und wieder abspielen (lokaler Bybit-Ersatz).
+
+Format (append-only, nur Chunks hintereinander):
+    Chunk  = Header "<4sIIdd" (MAGIC, Bytes komprimiert, Anzahl Records, erster ts, letzter ts)
+             + zlib(Records)
+    Record = "<dBI" (Empfangszeit, Markt-Index in MARKETS, Länge) + Nachricht (UTF-8)
+Der Recorder sammelt Records und schreibt einen Chunk, sobald TAPE_CHUNK_RECORDS oder
+TAPE_CHUNK_SEC erreicht sind. Nach einem Absturz fehlt höchstens der offene Chunk; ein
+abgeschnittener letzter Chunk wird beim Lesen ignoriert.
+
+Aufzeichnen: futures_ws/spot_ws.handle_message schreiben jede Nachricht mit, sobald
+start_recording() lief (start.py: TAPE_RECORD=pfad) – oder eigenständig ohne Handel:
+    python -m core.ws_client.tape record data/tapes/session.tape [--seconds 600]
+
+Abspielen:
+- replay(): dieselben handle_message → _process_message-Pfade im Prozess, mit 1×, N× oder
+  maximaler Geschwindigkeit. Die Handelslogik läuft dabei auf einer SimClock mit den
+  aufgezeichneten Empfangszeiten – Bars und Timeouts sind unabhängig vom Tempo identisch.
+  Auf der Wanduhr (sim_clock=False, serve) wird der Exchange-"ts" jeder Nachricht um das
+  Alter des Tapes verschoben, damit die gemessene Empfangsverzögerung die aufgezeichnete bleibt.
+  Optional alle scan_every Sekunden (Tape-Zeit) ein Scanner-Zyklus wie im Live-Betrieb.
+- serve(): lokaler Websocket-Server mit Bybits subscribe/unsubscribe/ping-Protokoll unter
+  /v5/public/spot und /v5/public/linear; der Bot zeigt per WSS_URL_SPOT/WSS_URL_FUTURES darauf.
+  Jede Verbindung bekommt die Nachrichten ihrer abonnierten Topics im Takt des Tapes.
+
+    python -m core.ws_client.tape info|replay|serve TAPE [--speed 10] [--max]
+"""
+
+import json
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+MAGIC = b"TAP1"
+_CHUNK = struct.Struct("<4sIIdd")
+_REC = struct.Struct("<dBI")
+MARKETS = ("spot", "futures")
+_MARKET_IDX = {m: i for i, m in enumerate(MARKETS)}
+_TS_FIELD = re.compile(r'"ts":\s*(\d+)')
+TAPE_CHUNK_RECORDS = int(os.getenv("TAPE_CHUNK_RECORDS", "2000"))
+TAPE_CHUNK_SEC = float(os.getenv("TAPE_CHUNK_SEC", "1.0"))
+TAPE_LEVEL = int(os.getenv("TAPE_LEVEL", "3"))  # zlib-Level (niedrig: Kompression läuft im Ingest-Thread)
+
+
+class TapeWriter:
+    def __init__(self, path: str, chunk_records: int = TAPE_CHUNK_RECORDS, chunk_sec: float = TAPE_CHUNK_SEC,
+                 level: int = TAPE_LEVEL):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.chunk_records = int(chunk_records)
+        self.chunk_sec = float(chunk_sec)
+        self.level = level
+        self.lock = threading.Lock()
+        self._f = open(path, "ab")
+        self._buf = []
+        self._first = 0.0
+        self._last = 0.0
+        self.records = 0
+        self.chunks = 0
+        self.raw_bytes = 0
+        self.bytes_written = 0
+
+    def write(self, market: str, msg, ts: float = None):
+        ts = time.time() if ts is None else ts
+        data = msg.encode() if isinstance(msg, str) else bytes(msg)
+        rec = _REC.pack(ts, _MARKET_IDX[market], len(data)) + data
+        with self.lock:
+            if not self._buf:
+                self._first = ts
+            self._buf.append(rec)
+            self._last = ts
+            self.records += 1
+            self.raw_bytes += len(rec)
+            if len(self._buf) >= self.chunk_records or ts - self._first >= self.chunk_sec:
+                self._flush()
+
+    def _flush(self):
+        if not self._buf or self._f.closed:
+            return
+        payload = zlib.compress(b"".join(self._buf), self.level)
+        self._f.write(_CHUNK.pack(MAGIC, len(payload), len(self._buf), self._first, self._last) + payload)
+        self._f.flush()
+        self.chunks += 1
+        self.bytes_written += _CHUNK.size + len(payload)
+        self._buf = []
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            self._f.close()
+
+
+def read_chunks(path: str):
+    """Chunk-Header (anzahl, erster ts, letzter ts, komprimierte bytes) + Payload; stoppt am ersten kaputten Chunk."""
+    with open(path, "rb") as f:
+        while True:
+            head = f.read(_CHUNK.size)
+            if len(head) < _CHUNK.size:
+                return
+            magic, size, count, first, last = _CHUNK.unpack(head)
+            if magic != MAGIC:
+                print(f"[TAPE] ⚠ {path}: ungültiger Chunk-Header bei Byte {f.tell() - _CHUNK.size} – Rest ignoriert")
+                return
+            payload = f.read(size)
+            if len(payload) < size:
+                return  # abgeschnittener letzter Chunk (Absturz beim Schreiben)
+            yield count, first, last, payload
+
+
+def read_tape(path: str):
+    """(ts, market, nachricht: str) in Aufnahme-Reihenfolge."""
+    unpack, rsize = _REC.unpack_from, _REC.size
+    for _, _, _, payload in read_chunks(path):
+        raw = zlib.decompress(payload)
+        pos, end = 0, len(raw)
+        while pos < end:
+            ts, m, n = unpack(raw, pos)
+            pos += rsize
+            yield ts, MARKETS[m], raw[pos:pos + n].decode()
+            pos += n
+
+
+def info(path: str) -> dict:
+    chunks = records = comp = 0
+    first = last = None
+    for count, a, b, payload in read_chunks(path):
+        chunks += 1
+        records += count
+        comp += _CHUNK.size + len(payload)
+        first = a if first is None else first
+        last = b
+    return {"path": path, "chunks": chunks, "records": records, "bytes": comp,
+            "first_ts": first, "last_ts": last, "span_s": round(last - first, 3) if records else 0.0}
+
+
+# ---------- Aufnahme im Bot ----------
+
+recorder = None
+
+
+def start_recording(path: str) -> TapeWriter:
+    """Ab jetzt jede WS-Nachricht (spot + futures) mit Empfangszeit ins Tape schreiben."""
+    global recorder
+    recorder = TapeWriter(path)
+    threading.Thread(target=_flush_loop, args=(recorder,), daemon=True, name="TapeFlush").start()
+    print(f"[TAPE] Aufnahme läuft → {path}")
+    return recorder
+
+
+def stop_recording():
+    global recorder
+    rec, recorder = recorder, None
+    if rec is not None:
+        rec.close()
+        print(f"[TAPE] Aufnahme beendet: {rec.records} Nachrichten in {rec.chunks} Chunks "
+              f"({rec.raw_bytes / 1e6:.1f} MB → {rec.bytes_written / 1e6:.1f} MB)")
+
+
+def record(market: str, msg, ts: float):
+    rec = recorder
+    if rec is not None:
+        rec.write(market, msg, ts)
+
+
+def _flush_loop(rec):
+    # Ruhige Feeds: offenen Chunk spätestens nach chunk_sec auf die Platte bringen
+    while recorder is rec:
+        time.sleep(rec.chunk_sec)
+        rec.flush()
+
+
+def _retime(msg: str, shift_sec: float) -> str:
+    """Exchange-"ts" (ms, erstes Vorkommen = Nachrichtenkopf) um shift_sec verschieben – beim Abspielen
+    auf der Wanduhr bleibt so die aufgezeichnete Empfangsverzögerung erhalten statt des Alters des Tapes."""
+    shift_ms = int(shift_sec * 1000)
+    return _TS_FIELD.sub(lambda m: f'"ts":{int(m.group(1)) + shift_ms}', msg, count=1)
+
+
+# ---------- Replay im Prozess ----------
+
+def replay(path: str, speed: float = 0.0, sim_clock: bool = True, scan_every: float = None, limit: int = None) -> dict:
+    """
+    Tape durch futures_ws/spot_ws.handle_message spielen. speed: 1 = Echtzeit, N = N-fach,
+    0 = so schnell wie möglich. sim_clock: Handelslogik sieht die aufgezeichneten Zeiten
+    (sonst die Wanduhr). scan_every: alle x Sekunden Tape-Zeit ein Scanner-Zyklus (Batch-Scanner).
+    """
+    from contextlib import ExitStack
+    from core import clock
+    from core.shared_state import shared_state
+    from core.time_aggregation import aggregate_ticks
+    from core.ws_client import futures_ws, spot_ws
+
+    handlers = {"spot": spot_ws.handle_message, "futures": futures_ws.handle_message}
+    cycle = None
+    if scan_every:
+        from core import scanner
+        from core.paper_trader import check_and_close_all
+        from core.scanner.batch import BatchScanner
+        batch = BatchScanner(scanner.BASE_UNIVERSE, min_candles=scanner.MIN_CANDLE_COUNT,
+                             volume_period=scanner.VOLUME_AVG_PERIOD,
+                             volatility_threshold=scanner.SCALPER_VOLATILITY_THRESHOLD)
+
+        def cycle():
+            scalper, conservative = scanner._collect_candidates(batch, scanner.BASE_UNIVERSE, 5)
+            scanner._trade_candidates(scalper, conservative, 5, scanner.MARGIN_PER_TRADE)
+            check_and_close_all()
+
+    messages = scans = 0
+    ts0 = next_scan = None
+    lag_max = 0.0
+    sim = clock.SimClock()
+    t0 = time.perf_counter()
+    with ExitStack() as stack:
+        if sim_clock:
+            stack.enter_context(clock.use_clock(sim))
+        for ts, market, msg in read_tape(path):
+            if ts0 is None:
+                ts0 = ts
+                next_scan = ts + (scan_every or 0)
+            if speed > 0:
+                wait = (ts - ts0) / speed - (time.perf_counter() - t0)
+                if wait > 0:
+                    time.sleep(wait)
+                else:
+                    lag_max = max(lag_max, -wait)
+            if sim_clock:
+                sim.set(ts)
+            else:
+                msg = _retime(msg, time.time() - ts)
+            handlers[market](msg)
+            aggregate_ticks()
+            messages += 1
+            if cycle is not None and ts >= next_scan:
+                cycle()
+                scans += 1
+                next_scan = ts + scan_every
+            if limit and messages >= limit:
+                break
+    elapsed = time.perf_counter() - t0
+    span = (ts - ts0) if messages else 0.0
+    return {"messages": messages, "span_s": round(span, 3), "elapsed_s": round(elapsed, 3),
+            "msgs_per_s": round(messages / max(elapsed, 1e-9), 1), "speedup": round(span / max(elapsed, 1e-9), 1),
+            "max_lag_ms": round(lag_max * 1000, 2), "scans": scans, "ticks": len(shared_state.ticks),
+            "open_trades": len(shared_state.open_trades), "closed_trades": len(shared_state.closed_trades),
+            "pnl": round(shared_state.total_profit + shared_state.total_loss, 6)}
+
+
+# ---------- Lokaler Websocket-Server ----------
+
+def _ack(op: str, req: dict, conn_id: str) -> str:
+    return json.dumps({"success": True, "ret_msg": "pong" if op == "ping" else "", "conn_id": conn_id,
+                       "req_id": req.get("req_id", ""), "op": op})
+
+
+def _market_for_path(path: str) -> str:
+    return "spot" if path.rstrip("/").endswith("spot") else "futures"
+
+
+async def serve_async(path: str, host: str = "127.0.0.1", port: int = 8765, speed: float = 1.0, loop_tape: bool = False):
+    """Tape über Websockets ausspielen; startet mit dem ersten Abonnement."""
+    import asyncio
+    import websockets
+    from core.ws_client.codec import loads
+
+    clients = {}  # ws → (market, abonnierte topics)
+    started = asyncio.Event()
+
+    async def handler(ws, *legacy):
+        req_path = legacy[0] if legacy else getattr(getattr(ws, "request", None), "path", "/")
+        topics = set()
+        clients[ws] = (_market_for_path(req_path), topics)
+        conn_id = f"tape-{id(ws):x}"
+        try:
+            async for raw in ws:
+                try:
+                    req = json.loads(raw)
+                except ValueError:
+                    continue
+                op = req.get("op")
+                if op == "subscribe":
+                    topics.update(req.get("args") or ())
+                    started.set()
+                elif op == "unsubscribe":
+                    topics.difference_update(req.get("args") or ())
+                elif op != "ping":
+                    continue
+                await ws.send(_ack(op, req, conn_id))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            clients.pop(ws, None)
+
+    async with websockets.serve(handler, host, port, max_queue=None):
+        print(f"[TAPE] Server auf ws://{host}:{port}/v5/public/{{spot,linear}} – wartet auf Abos ({path}, {speed}×)")
+        await started.wait()
+        while True:
+            sent, ts0, t0 = 0, None, time.perf_counter()
+            for i, (ts, market, msg) in enumerate(read_tape(path)):
+                if ts0 is None:
+                    ts0 = ts
+                if speed > 0:
+                    wait = (ts - ts0) / speed - (time.perf_counter() - t0)
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                topic = loads(msg).get("topic")
+                if not topic:
+                    continue  # Acks/Pongs der Aufnahme
+                msg = _retime(msg, time.time() - ts)
+                for ws, (m, topics) in list(clients.items()):
+                    if m == market and topic in topics:
+                        try:
+                            await ws.send(msg)
+                            sent += 1
+                        except websockets.ConnectionClosed:
+                            pass
+                if speed <= 0 and i % 1000 == 0:
+                    await asyncio.sleep(0)  # Acks/Pings nicht verhungern lassen
+            print(f"[TAPE] Tape durch: {sent} Nachrichten in {time.perf_counter() - t0:.1f}s")
+            if not loop_tape:
+                return
+
+
+def serve(path: str, host: str = "127.0.0.1", port: int = 8765, speed: float = 1.0, loop_tape: bool = False):
+    import asyncio
+    asyncio.run(serve_async(path, host, port, speed, loop_tape))
+
+
+# ---------- CLI ----------
+
+def _record_standalone(path: str, seconds: float):
+    from core.ws_client import futures_ws, spot_ws
+    from core.ws_client.feed_runtime import FeedRuntime
+    rec = start_recording(path)
+    rt = FeedRuntime()
+    rt.add_feed("spot", spot_ws.WSS_URL, spot_ws.topics(), lambda msg: rec.write("spot", msg))
+    rt.add_feed("futures", futures_ws.WSS_URL, futures_ws.topics(), lambda msg: rec.write("futures", msg))
+    rt.start()
+    t_end = time.time() + seconds if seconds else None
+    try:
+        while t_end is None or time.time() < t_end:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    stop_recording()
+
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("command", choices=("record", "info", "replay", "serve"))
+    ap.add_argument("tape")
+    ap.add_argument("--seconds", type=float, default=0.0, help="record: Aufnahmedauer (0 = bis Strg+C)")
+    ap.add_argument("--speed", type=float, default=1.0, help="replay/serve: Tempo-Faktor")
+    ap.add_argument("--max", action="store_true", help="replay/serve: so schnell wie möglich")
+    ap.add_argument("--wall-clock", action="store_true", help="replay: Wanduhr statt aufgezeichneter Zeiten")
+    ap.add_argument("--scan-every", type=float, default=None, help="replay: Scanner-Zyklus alle x s Tape-Zeit")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--loop", action="store_true", help="serve: Tape endlos wiederholen")
+    args = ap.parse_args()
+    speed = 0.0 if args.max else args.speed
+
+    if args.command == "record":
+        _record_standalone(args.tape, args.seconds)
+    elif args.command == "info":
+        for k, v in info(args.tape).items():
+            print(f"  {k:<10} {v}")
+    elif args.command == "replay":
+        import contextlib
+        from core.ai import online_rl
+        online_rl.RL_PERSIST = False  # Replays schreiben keinen Agent-Stand
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            stats = replay(args.tape, speed=speed, sim_clock=not args.wall_clock, scan_every=args.scan_every)
+        for k, v in stats.items():
+            print(f"  {k:<14} {v}")
+    else:
+        serve(args.tape, args.host, args.port, speed, args.loop)
+
+
+if __name__ == "__main__":
+    main()
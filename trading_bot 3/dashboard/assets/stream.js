@@ -0,0 +1,33 @@
+// Push-Stream: /api/stream liefert fertige Props pro Komponente (nur Geänderte).
+// Solange der Stream steht, ist das 1-s-Polling (dcc.Interval "tick") abgeschaltet.
+(function () {
+    if (!window.EventSource) { return; }
+
+    function setProps(id, props) {
+        try { window.dash_clientside.set_props(id, props); }
+        catch (e) { console.warn("[STREAM] set_props", id, e); }
+    }
+
+    function connect() {
+        if (!window.dash_clientside || !window.dash_clientside.set_props || !document.getElementById("tick")) {
+            setTimeout(connect, 300);  // Dash-Renderer noch nicht bereit
+            return;
+        }
+        var es = new EventSource("/api/stream");
+        es.addEventListener("props", function (ev) {
+            var upd = JSON.parse(ev.data);
+            for (var id in upd) { setProps(id, upd[id]); }
+        });
+        es.onopen = function () { setProps("tick", {disabled: true}); };
+        es.onerror = function () {
+            // EventSource verbindet selbst neu; bis dahin wieder pollen
+            setProps("tick", {disabled: false});
+        };
+    }
+
+    if (document.readyState === "loading") {
+        document.addEventListener("DOMContentLoaded", connect);
+    } else {
+        connect();
+    }
+})();
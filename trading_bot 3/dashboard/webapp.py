@@ -1,5 +1,5 @@
-import json, time, requests, datetime
-from flask import Flask, jsonify
+import json, os, time, datetime, gzip, zlib, threading
+from flask import Flask, jsonify, request, Response
 import dash
 from dash import html, dcc, dash_table
 from dash.dependencies import Input, Output
@@ -12,14 +12,75 @@ server = Flask(__name__)
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
 
+GZIP_MIN_BYTES = 1024
+RESP_CACHE_MAX_KEYS = int(os.getenv("RESP_CACHE_MAX_KEYS", "8"))
+# (version, fields, since, gzip) → (etag, body, gz); nur die neueste Version, höchstens RESP_CACHE_MAX_KEYS
+# Einträge (since/fields kommen vom Client). Flask bedient Requests in Threads → Zugriff nur unter _resp_lock.
+_resp_cache = {}
+_resp_lock = threading.Lock()
+
+def _project(payload: dict, fields):
+    if not fields:
+        return payload
+    keep = set(fields) | {"version", "since", "full"}
+    return {k: v for k, v in payload.items() if k in keep}
+
 @server.route("/api/snapshot")
 def api_snapshot():
+    """
+    Query: fields=a,b (Projektion auf Top-Level-Felder), since=V (nur Änderungen seit Version V).
+    Antwortet mit ETag/304, solange sich nichts geändert hat, und gzip ab GZIP_MIN_BYTES.
+    """
     try:
         from core.shared_state import shared_state
-        return jsonify(shared_state.snapshot())
+        snap = shared_state.published()
+        fields = tuple(sorted(f for f in request.args.get("fields", "").split(",") if f))
+        since = request.args.get("since", type=int)
+        gz = "gzip" in request.headers.get("Accept-Encoding", "")
+        key = (snap.version, fields, since, gz)
+
+        with _resp_lock:
+            hit = _resp_cache.get(key)
+        if hit is None:
+            payload = snap.changes_since(since) if since is not None else snap.data
+            body = json.dumps(_project(payload, fields), separators=(",", ":"), default=str).encode()
+            gz = gz and len(body) >= GZIP_MIN_BYTES
+            if gz:
+                body = gzip.compress(body, compresslevel=5)
+            etag = 'W/"%d-%s-%x%s"' % (snap.version, "full" if since is None else since,
+                                       zlib.crc32(",".join(fields).encode()), "-gz" if gz else "")
+            hit = (etag, body, gz)
+            with _resp_lock:
+                cached = next(iter(_resp_cache), None)
+                if cached is None or cached[0] <= snap.version:  # ein älterer Snapshot verdrängt nichts
+                    if cached is not None and cached[0] < snap.version:
+                        _resp_cache.clear()
+                    while len(_resp_cache) >= RESP_CACHE_MAX_KEYS:
+                        del _resp_cache[next(iter(_resp_cache))]  # ältester Eintrag zuerst
+                    _resp_cache[key] = hit
+        etag, body, gz = hit
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status=304, headers=headers)
+        if gz:
+            headers["Content-Encoding"] = "gzip"
+        return Response(body, mimetype="application/json", headers=headers)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@server.route("/api/metrics")
+def api_metrics():
+    """Prometheus-Textformat (Latenz pro Pipeline-Stufe, Zähler, ein paar Gauges); ?format=json für die Rohwerte."""
+    from core.metrics import metrics
+    from core.shared_state import shared_state
+    if request.args.get("format") == "json":
+        return jsonify(metrics.snapshot())
+    gauges = {"open_trades": len(shared_state.open_trades), "ws_latency_ms": shared_state.latency_ms,
+              "ticks_tracked": len(shared_state.ticks), "daycap_used": shared_state.daycap_used,
+              "snapshot_version": shared_state.published().version}
+    return Response(metrics.prometheus_text(gauges=gauges), mimetype="text/plain; version=0.0.4")
+
 BG="#0e0f12";CARD="#16181d";BORD="#23252b";TXT="#e8eaf1";ACC="#05f0ff"
 POS="#00e08a";NEG="#ff4d7d"
 card={"backgroundColor":CARD,"border":f"1px solid {BORD}",
@@ -69,96 +130,99 @@ app.layout = html.Div([
     html.Div([
         html.Div(id="perf",style=card),
         html.Div(id="learn",style=card),
-    ],style={"display":"grid","gridTemplateColumns":"1fr 1fr","gap":"8px"}),
+        html.Div(id="latency",style=card),
+    ],style={"display":"grid","gridTemplateColumns":"1fr 1fr 2fr","gap":"8px"}),
 
     dcc.Interval(id="tick",interval=1000,n_intervals=0) 
 ],style={"backgroundColor":BG,"minHeight":"100vh","padding":"12px","fontFamily":"Inter,system-ui"})
 
 def get_snapshot():
+    # In-Process statt HTTP an den eigenen Server: der veröffentlichte Stand kostet hier nichts
     try:
-        r=requests.get("http://127.0.0.1:8050/api/snapshot",timeout=1)
-        if r.status_code == 200:
-            return r.json()
+        from core.shared_state import shared_state
+        return shared_state.snapshot()
     except Exception:
-        pass
-    return {}
+        return {}
 
-@app.callback(
-    [Output("status","children"),
-     Output("btc_box","children"),
-     Output("daycap_box","children"),
-     Output("pnl_box","children"),
-     Output("scan_eta","children"),
-     Output("hot3","children"),
-     Output("candle_status","children"),
-     Output("tbl_open","data"),
-     Output("tbl_closed","data"),
-     Output("perf","children"), Output("learn","children")],
-    Input("tick","n_intervals")
-)
-def refresh(_):
-    snap=get_snapshot()
+CURRICULUM_PATH = "data/curriculum_state.json"
+_curriculum_cache = {"mtime": None, "state": None}
+
+def load_curriculum_state():
+    # Nur neu lesen, wenn sich die Datei geändert hat
+    try:
+        mtime = os.path.getmtime(CURRICULUM_PATH)
+    except OSError:
+        return None
+    if mtime != _curriculum_cache["mtime"]:
+        with open(CURRICULUM_PATH, "r") as f:
+            _curriculum_cache["state"] = json.load(f)
+        _curriculum_cache["mtime"] = mtime
+    return _curriculum_cache["state"]
+
+def format_trades(trades, cols):
+    formatted = []
+    for t in trades:
+        row = {}
+        for col in cols:
+            val = t.get(col)
+            if isinstance(val, float):
+                if col in ['pnl']: row[col] = f"{val:+.2f}"
+                elif col in ['sl', 'tp']: row[col] = f"{val:.1f}%" if val else "-"
+                elif col in ['margin_used']: row[col] = f"{val:.2f}"
+                else: row[col] = round(val, 4)
+            elif col == 'timestamp' and val: row[col] = datetime.datetime.fromtimestamp(val).strftime('%H:%M:%S')
+            elif col == 'close_ts' and val: row[col] = datetime.datetime.fromtimestamp(val).strftime('%H:%M:%S')
+            else: row[col] = val if val is not None else "-"
+        formatted.append(row)
+    return formatted
+
+# --- Formatierer pro Snapshot-Sektion: {component_id: wert} ---
+# Genutzt vom Poll-Callback (Fallback) und vom Push-Stream (/api/stream).
+
+def fmt_meta(snap):
     ws=snap.get("ws_status",{})
     if not isinstance(ws,dict):
         ws={"spot":str(ws),"futures":"?"}
-    
-    spot_status = ws.get('spot','?')
-    futures_status = ws.get('futures','?')
     latency = snap.get('latency_ms', 0)
-    latency_str = f"{latency} ms" if latency > 0 else "..."
-    status=f"Spot: {spot_status} | Futures: {futures_status} | Latenz: {latency_str}"
+    latency_str = f"+{latency} ms" if "active" in ws.values() else "..."  # Verzug über dem gleitenden Minimum
+    eta=max(0,int(snap.get("next_scan_at",0)-time.time()))
+    return {
+        "status": f"Spot: {ws.get('spot','?')} | Futures: {ws.get('futures','?')} | Latenz: {latency_str}",
+        "scan_eta": str(eta),
+        "hot3": ", ".join(snap.get("hot_coins",[])[:3]) or "–",
+        "candle_status": f"{snap.get('candle_count', 0)} / 200",
+    }
 
+def fmt_ticks(snap):
     ticks=snap.get("ticks",{})
     sp=ticks.get("spot:BTCUSDT",{}).get("price")
     fu=ticks.get("futures:BTCUSDT",{}).get("price")
-    
     btc_price = fu or sp
-    btc = f"{btc_price:.1f}" if btc_price else "–"
+    return {"btc_box": f"{btc_price:.1f}" if btc_price else "–"}
 
+def fmt_accounts(snap):
     dc=snap.get("accounts",{}).get("daycap",{"total":150,"used":0})
-    daycap_text=f"{float(dc.get('used',0)):.2f} / {float(dc.get('total',150)):.2f} USDT"
-
     total_pnl=float(snap.get("accounts",{}).get("total_pnl",0))
     pnl_color=POS if total_pnl>=0 else NEG
-    pnl=html.Span(f"{total_pnl:+.2f} USDT",style={"color":pnl_color,"fontWeight":"800"})
+    return {
+        "daycap_box": f"{float(dc.get('used',0)):.2f} / {float(dc.get('total',150)):.2f} USDT",
+        "pnl_box": html.Span(f"{total_pnl:+.2f} USDT",style={"color":pnl_color,"fontWeight":"800"}),
+        "perf": html.Div([
+            html.Div(f"Closed Trades: {len(snap.get('closed_trades', []))}",style={"color":TXT}),
+            html.Div(f"Gesamt PnL: {total_pnl:+.2f} USDT",style={"color":pnl_color,"fontWeight":"700"})
+        ]),
+    }
 
-    eta=max(0,int(snap.get("next_scan_at",0)-time.time()))
-    hot=", ".join(snap.get("hot_coins",[])[:3]) or "–"
-    
-    candle_count = snap.get("candle_count", 0)
-    candle_status = f"{candle_count} / 200"
-
-    open_trades = snap.get("open_trades", [])
-    closed_trades = snap.get("closed_trades", [])
-
-    def format_trades(trades, cols):
-        formatted = []
-        for t in trades:
-            row = {}
-            for col in cols:
-                val = t.get(col)
-                if isinstance(val, float):
-                    if col in ['pnl']: row[col] = f"{val:+.2f}"
-                    elif col in ['sl', 'tp']: row[col] = f"{val:.1f}%" if val else "-"
-                    elif col in ['margin_used']: row[col] = f"{val:.2f}"
-                    else: row[col] = round(val, 4)
-                elif col == 'timestamp' and val: row[col] = datetime.datetime.fromtimestamp(val).strftime('%H:%M:%S')
-                elif col == 'close_ts' and val: row[col] = datetime.datetime.fromtimestamp(val).strftime('%H:%M:%S')
-                else: row[col] = val if val is not None else "-"
-            formatted.append(row)
-        return formatted
-
-    open_data = format_trades(open_trades, cols_open)
-    closed_data = format_trades(closed_trades, cols_closed)
-
-    perf=html.Div([
-        html.Div(f"Closed Trades: {len(closed_trades)}",style={"color":TXT}),
-        html.Div(f"Gesamt PnL: {total_pnl:+.2f} USDT",style={"color":pnl_color,"fontWeight":"700"})
-    ])
+def fmt_trades(snap):
+    out = {"tbl_open": format_trades(snap.get("open_trades", []), cols_open),
+           "tbl_closed": format_trades(snap.get("closed_trades", []), cols_closed)}
+    out.update(fmt_accounts(snap))  # perf zählt die Closed Trades
+    return out
 
+def fmt_learn():
     learn="Keine Daten"
     try:
-        with open("data/curriculum_state.json","r") as f: st=json.load(f)
+        st=load_curriculum_state()
         lvl=int(st.get("level",0)); xp=float(st.get("xp",0)); nxt=float(st.get("xp_to_next",100))
         bar=int((xp/max(1,nxt))*100)
         learn=html.Div([
@@ -166,11 +230,103 @@ def refresh(_):
             html.Div(f"Knowledge: {st.get('knowledge',0):.2f} | Perf(EWM): {st.get('performance_ewm',0):+.3f}",style={"color":TXT})
         ])
     except Exception: pass
+    return {"learn": learn}
+
+METRICS_PANEL_SEC = 2.0  # Push-Stream: Latenz-Panel höchstens so oft neu senden
+
+def fmt_metrics():
+    from core.metrics import metrics
+    m = metrics.snapshot()
+    cell = {"padding":"2px 8px","textAlign":"right"}
+    head = html.Tr([html.Th(h,style={**cell,"color":ACC}) for h in ("Stufe","n","p50 ms","p99 ms","max ms")])
+    rows = [html.Tr([html.Td(stage,style={**cell,"textAlign":"left"}), html.Td(st["count"],style=cell),
+                     html.Td(f"{st['p50_ms']:.2f}",style=cell), html.Td(f"{st['p99_ms']:.2f}",style=cell),
+                     html.Td(f"{st['max_ms']:.2f}",style=cell)])
+            for stage, st in m["stages"].items() if st["count"]]
+    counters = " | ".join(f"{k.replace('_total','')}: {v}" for k, v in m["counters"].items())
+    return {"latency": html.Div([
+        html.Div("Latenz pro Stufe",style={"color":ACC,"fontWeight":"800","marginBottom":"6px"}),
+        html.Table([head] + rows,style={"color":TXT,"fontSize":"12px","borderCollapse":"collapse"}) if rows
+        else html.Div("Noch keine Messwerte",style={"color":TXT}),
+        html.Div(counters or "–",style={"color":TXT,"fontSize":"11px","opacity":"0.8","marginTop":"6px"}),
+    ])}
+
+SECTION_FORMATTERS = {"meta": fmt_meta, "ticks": fmt_ticks, "accounts": fmt_accounts, "trades": fmt_trades}
+OUTPUT_IDS = ["status","btc_box","daycap_box","pnl_box","scan_eta","hot3","candle_status",
+              "tbl_open","tbl_closed","perf","learn","latency"]
+DATA_PROPS = {"tbl_open": "data", "tbl_closed": "data"}  # Rest: children
+
+@app.callback(
+    [Output(cid, DATA_PROPS.get(cid, "children")) for cid in OUTPUT_IDS],
+    Input("tick","n_intervals")
+)
+def refresh(_):
+    # Poll-Fallback: läuft nur, solange der Push-Stream nicht verbunden ist (assets/stream.js)
+    snap=get_snapshot()
+    vals = {}
+    for fmt in SECTION_FORMATTERS.values():
+        vals.update(fmt(snap))
+    vals.update(fmt_learn())
+    vals.update(fmt_metrics())
+    return tuple(vals[cid] for cid in OUTPUT_IDS)
+
+# --- Push-Stream (Server-Sent Events) ---
+STREAM_MAX_HZ = float(os.getenv("DASH_STREAM_MAX_HZ", "4"))
+STREAM_HEARTBEAT_SEC = 15.0
+
+def _props_json(props):
+    from plotly.utils import PlotlyJSONEncoder
+    return json.dumps(props, cls=PlotlyJSONEncoder, separators=(",", ":"))
+
+def stream_events(max_hz=STREAM_MAX_HZ):
+    """
+    Generator für /api/stream: wartet auf neue Snapshot-Versionen, fasst Bursts auf
+    höchstens max_hz Events/s zusammen und sendet nur Props, die sich geändert haben.
+    """
+    from core.shared_state import shared_state
+    from core.state_snapshot import SECTION_KEYS
+    min_gap = 1.0 / max(0.1, max_hz)
+    version, last_sent, sent = 0, 0.0, {}
+    learn_mtime, metrics_at = None, 0.0
+    while True:
+        snap = shared_state.wait_for_version(version, timeout=STREAM_HEARTBEAT_SEC)
+        now = time.time()
+        mtime = _curriculum_cache["mtime"] if load_curriculum_state() is not None else None
+        if snap.version <= version and mtime == learn_mtime:
+            yield ": ping\n\n"
+            continue
+        if now - last_sent < min_gap:
+            time.sleep(min_gap - (now - last_sent))
+            snap = shared_state.published()  # alles, was in der Pause dazukam, in einem Event
+
+        delta = snap.changes_since(version)
+        vals = {}
+        for sec, fmt in SECTION_FORMATTERS.items():
+            if delta["full"] or any(k in delta for k in SECTION_KEYS[sec]):
+                vals.update(fmt(snap.data))
+        if mtime != learn_mtime or delta["full"]:
+            vals.update(fmt_learn())
+            learn_mtime = mtime
+        if now - metrics_at >= METRICS_PANEL_SEC:
+            vals.update(fmt_metrics())
+            metrics_at = now
+
+        props = {}
+        for cid, val in vals.items():
+            enc = _props_json(val)
+            if sent.get(cid) != enc:
+                sent[cid] = enc
+                props[cid] = enc
+        version, last_sent = snap.version, time.time()
+        if props:
+            body = ",".join(f'"{cid}":{{"{DATA_PROPS.get(cid, "children")}":{enc}}}' for cid, enc in props.items())
+            yield f"id: {version}\nevent: props\ndata: {{{body}}}\n\n"
 
-    return (status,btc,daycap_text,pnl,str(eta),hot,candle_status, 
-            open_data,
-            closed_data,
-            perf,learn)
+@server.route("/api/stream")
+def api_stream():
+    hz = request.args.get("hz", type=float) or STREAM_MAX_HZ
+    return Response(stream_events(min(hz, STREAM_MAX_HZ)), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 if __name__=="__main__":
     app.run(host="0.0.0.0",port=8050,debug=False)
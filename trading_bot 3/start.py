@@ -15,7 +15,7 @@ print("Cache gelöscht.\n")
 
 # Importiere zentrale Module erst nach der Bereinigung
 from core.shared_state import shared_state
-from core.api_fetcher import load_all_histories # [NEU] Import für API-Lader
+from core.backfill import start_backfill_thread
 from core.scanner import BASE_UNIVERSE # [NEU] Import für die Coin-Liste
 
 try:
@@ -31,16 +31,45 @@ from core.scanner import start_scanner_thread, start_auto_trade
 from core.ai.online_rl import start_online_rl_thread, agent
 
 def boot_all():
-    # [NEU] Lade historische Kerzen von der API, BEVOR die Echtzeit-Threads starten
-    load_all_histories(BASE_UNIVERSE)
-    
     shared_state.reset_daycap(total=150.0)
+    shared_state.start_snapshot_publisher()
 
-    threading.Thread(target=run_spot_ws, daemon=True, name="SpotWS").start()
-    threading.Thread(target=run_futures_ws, daemon=True, name="FuturesWS").start()
+    # Kerzen vom letzten Lauf sofort laden (Indikatoren sind danach warm), der Backfill holt nur die Lücke
+    from core.candle_cache import candle_cache
+    candle_cache.attach(shared_state)
+
+    # Rohe WS-Nachrichten mitschneiden (Replay/Regressionstests: python -m core.ws_client.tape)
+    if os.getenv("TAPE_RECORD"):
+        from core.ws_client.tape import start_recording
+        start_recording(os.getenv("TAPE_RECORD"))
+
+    try:
+        from core.ws_client.feed_runtime import start_feeds
+        start_feeds()
+    except ImportError as e:
+        # Ohne 'websockets' die alten Threads (ein run_forever pro Markt)
+        print(f"[BOOT] Feed-Runtime nicht verfügbar ({e}) – nutze Einzel-Threads")
+        threading.Thread(target=run_spot_ws, daemon=True, name="SpotWS").start()
+        threading.Thread(target=run_futures_ws, daemon=True, name="FuturesWS").start()
     print("[BOOT] Websocket-Feeds gestartet")
 
-    start_scanner_thread(scan_interval=10, max_open_per_scan=5, margin_per_trade=15.0)
+    # Bulk-REST-Ticker springen ein, sobald ein WS-Feed still wird
+    from core.ws_client.spot_rest_fallback import start_rest_fallback
+    start_rest_fallback(BASE_UNIVERSE)
+
+    # Bars schließen auf der Zeitgrenze, auch wenn kein Tick mehr kommt
+    from core.time_aggregation import start_bar_clock
+    start_bar_clock()
+
+    # Historische Kerzen parallel zu den laufenden Feeds nachladen
+    start_backfill_thread(BASE_UNIVERSE)
+
+    # Tickgetriebene Exits schließen (State, RL-Erfahrung) abseits des WS-Ingest-Threads
+    from core.paper_trader import start_exit_worker
+    start_exit_worker()
+
+    start_scanner_thread(scan_interval=10, max_open_per_scan=5, margin_per_trade=15.0, batch_mode=True,
+                         event_driven=True)
     start_auto_trade()
     print("[SCAN] Scanner Thread läuft ✅")
     print("[BOOT] AutoTrade (Scalper+Trader) gestartet ✅")
@@ -0,0 +1,12 @@
+"""
+Tests laufen aus dem Projektordner:  python -m pytest -q
+(pytest.ini begrenzt die Sammlung auf tests/ – core/test_logic.py ist kein Test, sondern eine Simulation.)
+Der Projektordner kommt auf sys.path, damit 'core', 'bench' und 'dashboard' wie in start.py importierbar sind.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
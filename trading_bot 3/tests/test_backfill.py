@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from bench.backfill import kline_row, make_server
+from core.backfill import Backfill, TokenBucket, parse_klines
+from core.shared_state import SharedState
+from core.time_aggregation.bar_engine import MTF_TREND_TFS, mtf_trend
+
+STEP = 300
+
+
+@pytest.fixture
+def fake():
+    servers = []
+
+    def start(statuses=(), latency_ms=0.0):
+        srv, url = make_server(latency_ms, 0.0, statuses=statuses)
+        servers.append(srv)
+        return srv, url
+    yield start
+    for srv in servers:
+        srv.shutdown()
+
+
+def _backfill(url, universe, state, **kw):
+    kw = {"markets": ("futures",), "intervals": (STEP,), "concurrency": 2, "rate": 1000, "burst": 1000, "retries": 4, **kw}
+    return Backfill(universe, base_url=url, state=state, **kw)
+
+
+def _assert_ring_equals_served(state, symbol, n, step=STEP):
+    view = state.get_candle_view("futures", symbol, step)
+    assert len(view) == n
+    ts = view.start_ts.astype(int).tolist()
+    assert all(b - a == step for a, b in zip(ts, ts[1:])), "Lücke im Ring"
+    assert ts[-1] >= int(time.time()) // step * step - 2 * step  # bis zur letzten abgeschlossenen Bar
+    served = parse_klines([kline_row(t) for t in reversed(ts)], step, now=ts[-1] + step)
+    assert [c for c in view] == served
+
+
+def test_pagination_fills_window_and_ring_equals_served(fake):
+    srv, url = fake()
+    state = SharedState()
+    bf = _backfill(url, ["AAAUSDT", "BBBUSDT"], state, limit=150, page_limit=40)
+    p = bf.run()
+    assert p["ok"] == 2 and not p["failed"]
+    assert p["requests"] == 8  # 4 Seiten à höchstens 40 pro Symbol
+    assert sum(1 for q in srv.calls if "end" in q) == 6
+    for sym in ("AAAUSDT", "BBBUSDT"):
+        _assert_ring_equals_served(state, sym, 150)
+
+
+def test_only_the_gap_is_fetched(fake):
+    srv, url = fake()
+    state = SharedState()
+    last_closed = int(time.time()) // STEP * STEP - STEP
+    older = [kline_row(last_closed - i * STEP) for i in range(5, 200)]  # neueste 5 Bars fehlen
+    state.merge_candles("futures", "AAAUSDT", STEP, parse_klines(older, STEP))
+    bf = _backfill(url, ["AAAUSDT"], state)
+    p = bf.run()
+    assert p["ok"] == 1 and p["requests"] == 1
+    assert srv.calls[0]["limit"] == "6"  # 5 fehlende + laufende Kerze
+    _assert_ring_equals_served(state, "AAAUSDT", 200)
+
+    p = _backfill(url, ["AAAUSDT"], state).run()  # vollständig → kein Request
+    assert p["skipped"] == 1 and p["requests"] == 0
+
+
+def test_hole_in_the_middle_is_filled(fake):
+    srv, url = fake()
+    state = SharedState()
+    last_closed = int(time.time()) // STEP * STEP - STEP
+    rows = [kline_row(last_closed - i * STEP) for i in range(200) if not 50 <= i < 60]  # Loch mitten im Fenster
+    state.merge_candles("futures", "AAAUSDT", STEP, parse_klines(rows, STEP))
+    p = _backfill(url, ["AAAUSDT"], state).run()
+    assert p["ok"] == 1 and p["requests"] == 1
+    assert srv.calls[0]["limit"] == "61"  # ab der ältesten fehlenden Bar + laufende Kerze
+    _assert_ring_equals_served(state, "AAAUSDT", 200)
+
+
+def test_cold_start_loads_mtf_intervals(fake):
+    srv, url = fake()
+    state = SharedState()
+    assert mtf_trend("futures", "AAAUSDT", state=state) == 0.0
+    p = _backfill(url, ["AAAUSDT"], state, intervals=(STEP,) + MTF_TREND_TFS, concurrency=1).run()
+    assert p["total"] == 3 and p["ok"] == 3
+    assert [q["interval"] for q in srv.calls] == ["5", "15", "60"]  # Basis-Intervall zuerst
+    for step in (STEP,) + MTF_TREND_TFS:
+        _assert_ring_equals_served(state, "AAAUSDT", 200, step)
+        ind = state.get_indicators("futures", "AAAUSDT", step)
+        assert ind["sma"] == ind["sma"]
+    assert mtf_trend("futures", "AAAUSDT", state=state) != 0.0
+
+
+def test_retries_after_429_and_5xx(fake):
+    srv, url = fake(statuses=(429, 503, 502))
+    state = SharedState()
+    p = _backfill(url, ["AAAUSDT"], state, concurrency=1).run()
+    assert p["ok"] == 1 and p["retried"] == 3 and p["requests"] == 4
+    _assert_ring_equals_served(state, "AAAUSDT", 200)
+
+
+def test_gives_up_after_retries(fake):
+    srv, url = fake(statuses=(429, 500, 429))
+    p = _backfill(url, ["AAAUSDT"], SharedState(), concurrency=1, retries=2).run()
+    assert p["ok"] == 0 and p["failed"] == 1 and p["requests"] == 3
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, burst=5)
+    t0 = time.monotonic()
+    for _ in range(30):
+        bucket.acquire()
+    elapsed = time.monotonic() - t0
+    assert 0.45 <= elapsed < 1.5  # 25 Tokens über dem Burst bei 50/s ≈ 0.5 s
+
+
+def test_backfill_respects_request_rate(fake):
+    srv, url = fake()
+    p = _backfill(url, [f"S{i}USDT" for i in range(12)], SharedState(), concurrency=8, rate=20, burst=2).run()
+    assert p["ok"] == 12
+    assert p["elapsed"] >= (12 - 2) / 20 * 0.9
@@ -0,0 +1,164 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from core import clock
+from core.shared_state import SharedState
+from core.time_aggregation.bar_engine import BAR_CLOSE_GRACE_SEC, TIMEFRAMES, BarEngine
+
+T0 = 1_700_000_000 // 3600 * 3600
+
+
+def _bars(state, market, symbol, tf):
+    view = state.get_candle_view(market, symbol, tf)
+    return {int(c["start_ts"]): c for c in view}
+
+
+def _rollup(minute_bars, tf):
+    """Referenz: höhere Bars direkt aus den 1m-Bars (erste open, max high, min low, letzte close, Summe volume)."""
+    out = {}
+    for start in sorted(minute_bars):
+        b = minute_bars[start]
+        s = start // tf * tf
+        r = out.get(s)
+        if r is None:
+            out[s] = dict(b, start_ts=s)
+        else:
+            r["high"] = max(r["high"], b["high"])
+            r["low"] = min(r["low"], b["low"])
+            r["close"] = b["close"]
+            r["volume"] += b["volume"]
+    return out
+
+
+def test_higher_timeframes_equal_rollup_of_minute_bars():
+    state = SharedState()
+    engine = BarEngine(state=state)
+    rng = random.Random(11)
+    sim = clock.SimClock(T0)
+    syms = ["AAAUSDT", "BBBUSDT"]
+    price = {s: 100.0 for s in syms}
+    vol = {s: 5000.0 for s in syms}
+    with clock.use_clock(sim):
+        engine.on_volume("futures", [(s, vol[s], vol[s] * 100) for s in syms], sim.time())  # Basis
+        sim.set(T0 + 37)  # erster Tick mitten in einer Minute
+        end = T0 + int(2.5 * 3600)
+        while sim.time() < end:
+            for s in syms:
+                price[s] = round(price[s] * (1 + rng.gauss(0, 0.002)), 6)
+                vol[s] += rng.uniform(0, 50)
+                engine.on_tick("futures", s, price[s], sim.time())
+                engine.on_volume("futures", [(s, vol[s], vol[s] * 100)], sim.time())
+            sim.advance(rng.uniform(1, 20))
+        engine.advance(T0 + 3 * 3600 + BAR_CLOSE_GRACE_SEC + 1)  # alles bis zur vollen Stunde schließen
+
+    for s in syms:
+        minute = _bars(state, "futures", s, 60)
+        starts = sorted(minute)
+        assert starts[0] == T0 and len(starts) >= 140
+        assert all(b % 60 == 0 for b in starts)
+        assert all(not math.isnan(minute[b]["volume"]) for b in starts)
+        for tf in TIMEFRAMES[1:]:
+            got, want = _bars(state, "futures", s, tf), _rollup(minute, tf)
+            assert sorted(got) == sorted(want), tf
+            assert all(start % tf == 0 for start in got)
+            for start, w in want.items():
+                g = got[start]
+                for f in ("open", "high", "low", "close"):
+                    assert g[f] == w[f], (tf, start, f)
+                assert g["volume"] == pytest.approx(w["volume"], rel=1e-12), (tf, start)
+
+
+def test_confirmed_kline_replaces_tick_bar():
+    state = SharedState()
+    engine = BarEngine(timeframes=(60, 300), state=state)
+    sim = clock.SimClock(T0)
+    with clock.use_clock(sim):
+        for k, px in enumerate((100.0, 101.0, 99.5, 100.5)):
+            engine.on_tick("futures", "AAAUSDT", px, T0 + 30 + k * 60)
+        engine.advance(T0 + 300 + BAR_CLOSE_GRACE_SEC + 1)
+    tick_bar = _bars(state, "futures", "AAAUSDT", 300)[T0]
+    assert (tick_bar["open"], tick_bar["high"], tick_bar["low"], tick_bar["close"]) == (100.0, 101.0, 99.5, 100.5)
+
+    kline = {"start_ts": T0, "open": 100.1, "high": 101.2, "low": 99.4, "close": 100.6, "volume": 42.0}
+    state.add_candle("futures", "AAAUSDT", 300, kline, replace=True)
+    bars = _bars(state, "futures", "AAAUSDT", 300)
+    assert list(bars) == [T0]
+    assert {k: bars[T0][k] for k in kline} == kline
+    assert state.get_indicators("futures", "AAAUSDT", 300)["close"] == 100.6
+
+    # eine spätere Tick-Bar mit demselben start_ts überschreibt die bestätigte Kline nicht
+    state.add_candle("futures", "AAAUSDT", 300, dict(tick_bar))
+    assert _bars(state, "futures", "AAAUSDT", 300)[T0]["close"] == 100.6
+    assert np.array_equal(state.get_candle_view("futures", "AAAUSDT", 300).start_ts, [T0])
+
+
+def test_timer_wheel_closes_bars_of_quiet_symbols():
+    state = SharedState()
+    engine = BarEngine(timeframes=(60, 300), state=state)
+    sim = clock.SimClock(T0)
+    with clock.use_clock(sim):
+        sim.set(T0 + 10)
+        engine.on_tick("futures", "AAAUSDT", 100.0, sim.time())
+        engine.on_tick("futures", "QQQUSDT", 50.0, sim.time())  # danach kein Tick mehr
+        sim.set(T0 + 60 + BAR_CLOSE_GRACE_SEC - 0.01)
+        assert engine.advance(sim.time()) == 0  # Puffer für verspätete Ticks noch nicht vorbei
+        sim.set(T0 + 60 + BAR_CLOSE_GRACE_SEC + 0.01)
+        engine.on_tick("futures", "AAAUSDT", 101.0, sim.time())  # schließt nur AAA per Tick
+        assert list(_bars(state, "futures", "AAAUSDT", 60)) == [T0]
+        assert not _bars(state, "futures", "QQQUSDT", 60)
+
+        sim.set(T0 + 61 + BAR_CLOSE_GRACE_SEC)
+        assert engine.advance(sim.time()) == 1  # nur die stille Bar von QQQ
+        assert _bars(state, "futures", "QQQUSDT", 60)[T0]["close"] == 50.0
+
+        sim.set(T0 + 301 + BAR_CLOSE_GRACE_SEC)
+        engine.advance(sim.time())
+        assert list(_bars(state, "futures", "QQQUSDT", 300)) == [T0]
+        assert list(_bars(state, "futures", "AAAUSDT", 60)) == [T0, T0 + 60]
+        assert list(_bars(state, "futures", "AAAUSDT", 300)) == [T0]
+
+        # lange Pause (mehr als eine Wheel-Runde): die Bar schließt trotzdem genau einmal
+        sim.set(T0 + 1000)
+        engine.on_tick("futures", "ZZZUSDT", 7.0, sim.time())
+        sim.set(T0 + 20000)
+        assert engine.advance(sim.time()) == 2  # 1m + 5m
+        assert engine.advance(sim.time()) == 0
+        assert list(_bars(state, "futures", "ZZZUSDT", 60)) == [T0 + 960]
+        assert list(_bars(state, "futures", "ZZZUSDT", 300)) == [T0 + 900]
+        assert engine.current("futures", "ZZZUSDT", 60) is None
+
+
+def test_volume24h_deltas_become_bar_volume():
+    state = SharedState()
+    engine = BarEngine(timeframes=(60,), state=state)
+    sim = clock.SimClock(T0)
+    key = ("futures", "AAAUSDT")
+
+    def vol(v24, t24=math.nan):
+        engine.on_volume(*key[:1], [(key[1], v24, t24)], sim.time())
+
+    with clock.use_clock(sim):
+        engine.on_tick("futures", "NOVOLUSDT", 1.0, sim.time())  # nie ein Volumen-Stand → unbekannt
+        vol(1000.0, 1e5)  # erster Stand = Basis, noch kein Delta
+        sim.set(T0 + 1)
+        engine.on_tick(*key, 10.0, sim.time())
+        vol(1010.0, 1.001e5)  # +10
+        vol(1005.0, 1.0005e5)  # 24h-Fenster rollt: Rückgang zählt als 0, Basis folgt
+        vol(1012.0)  # +7, Umsatz unbekannt → unverändert
+        cur = engine.current(*key, 60)
+        assert cur["volume"] == pytest.approx(17.0) and cur["turnover"] == pytest.approx(100.0)
+
+        sim.set(T0 + 61)
+        engine.on_tick(*key, 10.5, sim.time())  # schließt Minute 1
+        vol(3.0)  # Zähler-Reset (z. B. neuer Handelstag bei der Börse) → 0, neue Basis
+        vol(5.0)  # +2
+        sim.set(T0 + 121 + BAR_CLOSE_GRACE_SEC)
+        engine.advance(sim.time())
+
+    bars = _bars(state, *key, 60)
+    assert bars[T0]["volume"] == pytest.approx(17.0)
+    assert bars[T0 + 60]["volume"] == pytest.approx(2.0)
+    assert np.isnan(state.get_candle_view("futures", "NOVOLUSDT", 60).volume).all()
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+import core.candle_cache as cc
+from core.candle_cache import CandleCache
+
+STEP = 300
+
+
+def _candles(starts):
+    return [{"start_ts": float(t), "open": t + 1.0, "high": t + 2.0, "low": t - 1.0, "close": t + 0.5, "volume": 10.0}
+            for t in starts]
+
+
+def _starts(rows):
+    return rows[0].astype(int).tolist()
+
+
+def test_append_wraps_and_survives_reopen(tmp_path):
+    cache = CandleCache(str(tmp_path), capacity=8)
+    cache.append("futures", "AAAUSDT", STEP, _candles(range(0, 12 * STEP, STEP)))
+    expected = list(range(4 * STEP, 12 * STEP, STEP))
+    assert _starts(cache.load("futures", "AAAUSDT", STEP)) == expected
+    assert _starts(CandleCache(str(tmp_path), capacity=8).load("futures", "AAAUSDT", STEP)) == expected
+
+
+def test_older_candles_are_merged_sorted_and_new_wins(tmp_path):
+    cache = CandleCache(str(tmp_path), capacity=16)
+    cache.append("futures", "AAAUSDT", STEP, _candles([0, STEP, 4 * STEP, 5 * STEP]))
+    fill = _candles([2 * STEP, 3 * STEP, 4 * STEP])
+    fill[-1]["close"] = -1.0
+    cache.append("futures", "AAAUSDT", STEP, fill)
+    rows = CandleCache(str(tmp_path), capacity=16).load("futures", "AAAUSDT", STEP)
+    assert _starts(rows) == [i * STEP for i in range(6)]
+    assert rows[4, 4] == -1.0
+
+
+def test_crash_during_rewrite_keeps_old_file(tmp_path, monkeypatch):
+    cache = CandleCache(str(tmp_path), capacity=16)
+    cache.append("futures", "AAAUSDT", STEP, _candles([3 * STEP, 4 * STEP, 5 * STEP]))
+    before = cache.load("futures", "AAAUSDT", STEP)
+
+    def crash(src, dst):
+        raise OSError("Abbruch vor dem Tausch")
+    monkeypatch.setattr(cc.os, "replace", crash)
+    with pytest.raises(OSError):
+        cache.append("futures", "AAAUSDT", STEP, _candles([0, STEP, 2 * STEP]))
+    monkeypatch.undo()
+
+    after = CandleCache(str(tmp_path), capacity=16)
+    assert after.keys() == [("futures", "AAAUSDT", STEP)]  # die .tmp-Datei zählt nicht als Reihe
+    np.testing.assert_array_equal(after.load("futures", "AAAUSDT", STEP), before)
+
+
+def test_confirmed_kline_overwrites_last_slot_in_place(tmp_path, monkeypatch):
+    cache = CandleCache(str(tmp_path), capacity=4)
+    cache.append("futures", "AAAUSDT", STEP, _candles(range(0, 5 * STEP, STEP)))  # Ring bereits umgelaufen
+
+    def no_rewrite(src, dst):
+        raise AssertionError("Kline auf die letzte Bar darf die Datei nicht neu schreiben")
+    monkeypatch.setattr(cc.os, "replace", no_rewrite)
+    kline = _candles([4 * STEP])
+    kline[0]["close"] = -1.0
+    assert cache.append("futures", "AAAUSDT", STEP, kline) == 0
+    nxt = _candles([4 * STEP, 5 * STEP])  # Ersatz + neue Kerze in einem Aufruf
+    nxt[0]["high"] = -2.0
+    assert cache.append("futures", "AAAUSDT", STEP, nxt) == 1
+    monkeypatch.undo()
+
+    rows = CandleCache(str(tmp_path), capacity=4).load("futures", "AAAUSDT", STEP)
+    assert _starts(rows) == [2 * STEP, 3 * STEP, 4 * STEP, 5 * STEP]
+    assert rows[2, 2] == -2.0 and rows[4, 2] == 4 * STEP + 0.5
@@ -0,0 +1,58 @@
+from collections import deque
+
+import pytest
+
+from core.candle_store import CandleRing
+
+
+def _fill(ring, start, stop):
+    for i in range(start, stop):
+        ring.append_row(i, i, i, i, float(i), 1.0)
+
+
+@pytest.mark.parametrize("cap", [1, 2, 5, 200])
+def test_view_matches_deque(cap):
+    ring, ref = CandleRing(cap), deque(maxlen=cap)
+    for i in range(cap * 7 + 3):
+        ring.append_row(i, i, i, i, float(i), 1.0)
+        ref.append(float(i))
+        assert ring.view().close.tolist() == list(ref)
+        assert ring.view(3).close.tolist() == list(ref)[-3:]
+        assert ring.last_ts() == ref[-1]
+
+
+def test_held_view_survives_appends():
+    ring = CandleRing(5)
+    _fill(ring, 0, 5)
+    held, tail = ring.view(), ring.view(2)
+    _fill(ring, 5, 6)
+    assert held.close.tolist() == [0, 1, 2, 3, 4]
+    _fill(ring, 6, 40)  # mehrere Pufferwechsel
+    assert held.close.tolist() == [0, 1, 2, 3, 4]
+    assert tail.close.tolist() == [3, 4]
+    assert ring.view().close.tolist() == [35, 36, 37, 38, 39]
+
+
+def test_held_view_survives_merge_and_clear():
+    ring = CandleRing(200)
+    _fill(ring, 0, 204)
+    held = ring.view()
+    before = held.close.tolist()
+    # bestätigte Kline ersetzt die letzte Tick-Bar (add_candle(..., replace=True) → merge)
+    ring.merge([[203], [1], [1], [1], [999.0], [1]], prefer_new=True)
+    assert held.close.tolist() == before
+    assert ring.view().close.tolist()[-3:] == [201, 202, 999]
+    ring.clear()
+    assert held.close.tolist() == before
+    assert len(ring) == 0 and len(ring.view()) == 0
+
+
+def test_merge_sorts_dedupes_and_keeps_capacity():
+    ring = CandleRing(4)
+    _fill(ring, 10, 13)
+    n = ring.merge([[5, 11, 20, 21], [0] * 4, [0] * 4, [0] * 4, [50.0, 110.0, 200.0, 210.0], [0] * 4])
+    assert n == 4
+    assert ring.view().start_ts.tolist() == [11, 12, 20, 21]
+    assert ring.view().close.tolist() == [11, 12, 200, 210]  # vorhandene Kerze gewinnt ohne prefer_new
+    _fill(ring, 22, 30)
+    assert ring.view().start_ts.tolist() == [26, 27, 28, 29]
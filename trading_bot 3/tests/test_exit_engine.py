@@ -0,0 +1,52 @@
+import threading
+import time
+
+from core.paper_trader import _exit_reason, _trigger_levels
+from core.paper_trader.exit_engine import ExitEngine
+
+
+def _trade(tid, side="buy", entry=100.0, tp=1.0, sl=1.0):
+    return {"id": tid, "market": "futures", "symbol": "AAAUSDT", "side": side, "entry_price": entry, "tp": tp,
+            "sl": sl, "timestamp": 0.0, "strategy": "conservative", "max_price": entry}
+
+
+def _engine(closed, on_close=None):
+    def close(t, price, now, reason, gain_pct):
+        if on_close:
+            on_close()
+        closed.append((t["id"], reason, price, threading.current_thread().name))
+    return ExitEngine(_trigger_levels, _exit_reason, close, lambda key: None)
+
+
+def test_tick_only_enqueues_and_drain_closes_in_order():
+    closed = []
+    engine = _engine(closed)
+    engine.add(_trade("T1"))
+    engine.add(_trade("T2", tp=0.5))
+    engine.on_tick("futures", "AAAUSDT", 101.0)
+    assert closed == [] and engine.pending() == 2 and len(engine) == 0
+    engine.on_tick("futures", "AAAUSDT", 102.0)  # schon ausgetragen → kein zweiter Exit
+    assert engine.drain() == 2
+    assert [c[:3] for c in closed] == [("T1", "TP", 101.0), ("T2", "TP", 101.0)]
+    assert engine.drain() == 0
+
+
+def test_worker_closes_off_the_ingest_thread():
+    closed = []
+    slow = threading.Event()
+    engine = _engine(closed, on_close=lambda: slow.wait(0.2))  # Datei-I/O im Close
+    engine.add(_trade("T1"))
+    stop = threading.Event()
+    worker = threading.Thread(target=engine.run_worker, args=(stop,), name="ExitWorker", daemon=True)
+    worker.start()
+
+    t0 = time.perf_counter()
+    engine.on_tick("futures", "AAAUSDT", 98.0)
+    assert time.perf_counter() - t0 < 0.05  # der Tick wartet nicht auf den Close
+
+    deadline = time.time() + 2.0
+    while not closed and time.time() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    worker.join(2.0)
+    assert closed == [("T1", "SL", 98.0, "ExitWorker")]
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+from core.shared_state import shared_state
+from core.ws_client import spot_ws
+from core.ws_client.feed_runtime import FeedRuntime
+from core.ws_client.tape import _ack
+
+
+def _wait(cond, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def server():
+    """Bybit-artiger Server: Topics mit 'BAD' lehnt er ab (ganzer Request), Pings beantwortet er, Daten nur auf Wunsch."""
+    state = {"send_data": False, "connections": 0, "port": None}
+    ready = threading.Event()
+
+    async def handler(ws, *legacy):
+        state["connections"] += 1
+        topics = set()
+
+        async def pump():
+            while True:
+                await asyncio.sleep(0.05)
+                if state["send_data"]:
+                    for t in list(topics):
+                        await ws.send(json.dumps({"topic": t, "ts": int(time.time() * 1000), "type": "snapshot",
+                                                  "data": {"symbol": t.split(".")[1], "lastPrice": "1.0"}}))
+        task = asyncio.ensure_future(pump())
+        try:
+            async for raw in ws:
+                req = json.loads(raw)
+                op = req.get("op")
+                if op == "subscribe" and any("BAD" in a for a in req["args"]):
+                    await ws.send(json.dumps({"success": False, "ret_msg": "Invalid symbol", "conn_id": "x",
+                                              "req_id": req.get("req_id", ""), "op": op}))
+                    continue
+                if op == "subscribe":
+                    topics.update(req["args"])
+                elif op == "unsubscribe":
+                    topics.difference_update(req["args"])
+                await ws.send(_ack(op, req, "x"))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            task.cancel()
+
+    def run():
+        loop = asyncio.new_event_loop()
+
+        async def main():
+            async with websockets.serve(handler, "127.0.0.1", 0) as srv:
+                state["port"] = next(iter(srv.sockets)).getsockname()[1]
+                ready.set()
+                await asyncio.Future()
+        loop.run_until_complete(main())
+
+    threading.Thread(target=run, daemon=True).start()
+    assert ready.wait(5)
+    return state
+
+
+def _runtime(server, topics, **kw):
+    rt = FeedRuntime(**kw)
+    rt.add_feed("test", f"ws://127.0.0.1:{server['port']}/v5/public/spot", topics, lambda msg: None,
+                market="test_market")
+    return rt.start()
+
+
+def test_subscribed_follows_acks_and_isolates_rejected_topic(server):
+    rt = _runtime(server, ["tickers.AAA", "tickers.BAD", "tickers.CCC"])
+    conn = rt.feeds["test"].conns[0]
+    assert _wait(lambda: conn.subscribed == {"tickers.AAA", "tickers.CCC"} and not conn.pending)
+    assert conn.rejected == {"tickers.BAD"}
+    assert rt.stats()["connections"][conn.name]["rejected"] == 1
+
+
+def test_pongs_do_not_keep_a_dead_subscription_alive(server):
+    rt = _runtime(server, ["tickers.AAA"], heartbeat=0.1, stale_after=0.5)
+    conn = rt.feeds["test"].conns[0]
+    assert _wait(lambda: conn.subscribed == {"tickers.AAA"})
+    assert _wait(lambda: conn.reconnects >= 1, timeout=5)  # nur Acks/Pongs → stale → Reconnect
+
+
+def test_data_keeps_connection_alive(server):
+    server["send_data"] = True
+    rt = _runtime(server, ["tickers.AAA"], heartbeat=0.1, stale_after=0.5)
+    conn = rt.feeds["test"].conns[0]
+    time.sleep(1.5)
+    assert conn.reconnects == 0 and conn.last_msg > time.time() - 0.5
+
+
+def test_handler_ignores_pongs_for_feed_health():
+    shared_state.feed_last_msg["spot"] = 0.0
+    spot_ws.handle_message(json.dumps({"success": True, "ret_msg": "pong", "conn_id": "x", "op": "ping"}))
+    assert shared_state.feed_last_msg["spot"] == 0.0
+    spot_ws.handle_message(json.dumps({"topic": "tickers.ZZZUSDT", "ts": int(time.time() * 1000),
+                                       "type": "snapshot", "data": {"symbol": "ZZZUSDT", "lastPrice": "2.5"}}))
+    assert shared_state.feed_last_msg["spot"] > 0.0
@@ -0,0 +1,84 @@
+import json
+import random
+
+import pytest
+
+from core import clock
+from core.metrics import Histogram, Metrics, RelativeLag
+from core.shared_state import shared_state
+from core.ws_client import futures_ws, spot_ws
+
+
+def test_histogram_quantiles_within_bucket_resolution():
+    rng = random.Random(3)
+    values = sorted(rng.lognormvariate(-7, 1.5) for _ in range(50000))
+    h = Histogram()
+    for v in values:
+        h.record(v)
+    for q, got in zip((0.5, 0.9, 0.99, 0.999), h.quantiles()):
+        exact = values[int(q * len(values)) - 1]
+        assert got == pytest.approx(exact, rel=0.04)
+    assert h.count == len(values)
+
+
+def test_prometheus_text_has_summaries_and_counters():
+    m = Metrics()
+    m.observe("decode", 0.002)
+    m.inc("messages_total", market="spot")
+    m.inc("messages_total", 2, market="spot")
+    text = m.prometheus_text(gauges={"open_trades": 3})
+    assert 'trading_stage_latency_seconds{stage="decode",quantile="0.5"} 0.002' in text
+    assert 'trading_stage_latency_seconds_count{stage="decode"} 1' in text
+    assert 'trading_messages_total{market="spot"} 3' in text
+    assert "trading_open_trades 3" in text
+
+
+def test_relative_lag_cancels_constant_clock_skew():
+    lag = RelativeLag(window=60)
+    skew = 0.7  # Hostuhr 700 ms vor der Börse
+    out = [lag.update(t, skew + 0.02 + 0.01 * (t % 3)) for t in range(30)]
+    assert max(out) <= 0.021
+    assert lag.update(30, skew + 0.62) == pytest.approx(0.6)  # echter Rückstau bleibt sichtbar
+    assert lag.update(200, skew + 0.05) == 0.0  # altes Minimum ist aus dem Fenster gefallen
+
+
+def test_skewed_exchange_clock_does_not_trip_latency_guard():
+    sim = clock.SimClock(1_700_000_000.0)
+    with clock.use_clock(sim):
+        for i in range(20):
+            sim.advance(0.5)
+            ts_ms = int((sim.time() - 0.9) * 1000)  # Börsen-ts 900 ms „alt“ – konstanter Versatz
+            spot_ws.handle_message(json.dumps({"topic": "tickers.QQQUSDT", "ts": ts_ms, "type": "snapshot",
+                                               "data": {"symbol": "QQQUSDT", "lastPrice": str(1 + i)}}))
+        assert shared_state.latency_ms < 50
+
+
+def test_relative_lag_resets_when_clock_jumps_back():
+    lag = RelativeLag(window=60)
+    lag.update(1000.0, 0.0)
+    assert lag.update(10.0, 0.9) == 0.0
+
+
+def test_latency_is_tracked_per_market_and_guard_takes_the_slowest():
+    sim = clock.SimClock(1_700_000_000.0)
+
+    def ticker(handler, sym, age):
+        ts_ms = int((sim.time() - age) * 1000)
+        handler(json.dumps({"topic": f"tickers.{sym}", "ts": ts_ms, "type": "snapshot",
+                            "data": {"symbol": sym, "lastPrice": "1"}}))
+
+    with clock.use_clock(sim):
+        for _ in range(10):
+            sim.advance(0.5)
+            ticker(spot_ws.handle_message, "QQQUSDT", 0.05)
+            ticker(futures_ws.handle_message, "QQQUSDT", 0.3)  # anderer Versatz – hebt sich pro Markt heraus
+        assert shared_state.latency_ms < 20
+        sim.advance(0.5)
+        ticker(futures_ws.handle_message, "QQQUSDT", 1.3)  # Futures staut sich 1 s
+        ticker(spot_ws.handle_message, "QQQUSDT", 0.05)   # ein flotter Spot-Feed überschreibt das nicht
+        assert shared_state.feed_latency_ms["futures"] == pytest.approx(1000, abs=5)
+        assert shared_state.feed_latency_ms["spot"] < 20
+        assert shared_state.latency_ms == shared_state.feed_latency_ms["futures"]
+        sim.advance(0.5)
+        ticker(futures_ws.handle_message, "QQQUSDT", 0.3)
+        assert shared_state.latency_ms < 20
@@ -0,0 +1,183 @@
+"""Parität der schnellen Pfade mit ihren Referenzen: Indikatoren vs ta, Exit-Engine vs Sweep, decide_batch vs decide_trade,
+BatchScanner vs _features_from_ticks."""
+
+import copy
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ta = pytest.importorskip("ta")
+
+from core import clock
+from core.indicator_engine import IndicatorState
+
+
+def test_indicator_engine_matches_ta():
+    rng = np.random.default_rng(3)
+    n = 300
+    c = 100 + np.cumsum(rng.normal(0, 1, n))
+    h, l = c + rng.uniform(0.1, 1, n), c - rng.uniform(0.1, 1, n)
+    v = rng.uniform(10, 100, n)
+    st, got = IndicatorState(), []
+    for i in range(n):
+        st.update(i * 300.0, h[i], l[i], c[i], v[i])
+        got.append(st.values())
+    H, L, C, V = map(pd.Series, (h, l, c, v))
+    ref = {
+        "atr": ta.volatility.average_true_range(H, L, C, window=st.atr_period),
+        "rsi": ta.momentum.rsi(C, window=st.rsi_period),
+        "sma": C.rolling(st._close_sma.period).mean(),
+        "vol_sma": V.rolling(st._vol_sma.period).mean(),
+        "vol_ema": ta.trend.ema_indicator(V, window=st._vol_sma.period),
+    }
+    for name, series in ref.items():
+        want = series.to_numpy()
+        have = np.array([g[name] for g in got])
+        # Warmup: beide NaN (ATR: ta liefert 0.0 wie die Engine)
+        np.testing.assert_array_equal(np.isnan(have), np.isnan(want), err_msg=name)
+        np.testing.assert_allclose(have, want, rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=name)
+
+
+def _random_trades(rng, symbols, ids):
+    trades = []
+    for i in ids:
+        sym = rng.choice(symbols)
+        trades.append({"id": f"T{i:08d}", "market": "futures", "symbol": sym, "side": rng.choice(("buy", "sell")),
+                       "entry_price": 0.0, "qty": 1.0, "leverage": 1.0, "tp": rng.uniform(0.2, 4.0),
+                       "sl": rng.uniform(0.2, 3.0), "timestamp": 0.0, "margin_used": 1.0,
+                       "strategy": rng.choice(("scalper", "conservative")), "max_price": 0.0})
+    return trades
+
+
+def test_exit_engine_matches_full_sweep():
+    from core.paper_trader import _exit_reason, _trigger_levels
+    from core.paper_trader.exit_engine import ExitEngine
+
+    rng = random.Random(7)
+    symbols = ["AAAUSDT", "BBBUSDT", "CCCUSDT"]
+    prices = {("futures", s): 100.0 for s in symbols}
+    schedule = {}  # Schritt → Trades, die davor eröffnet werden
+    for step in range(0, 1500, 15):
+        schedule[step] = _random_trades(rng, symbols, range(step, step + 4))
+    walk = [(rng.choice(symbols), rng.gauss(0, 0.0015), rng.uniform(0.5, 6.0)) for _ in range(1500)]
+
+    def replay(use_engine):
+        closed, open_, px = [], {}, dict(prices)
+
+        def close(t, price, now, reason, gain_pct):
+            open_.pop(t["id"])
+            closed.append((step, t["id"], reason, price))
+        engine = ExitEngine(_trigger_levels, _exit_reason, close, px.get)
+        with clock.use_clock(clock.SimClock(1_000_000.0)) as c:
+            for step, (sym, ret, dt) in enumerate(walk):
+                for t in copy.deepcopy(schedule.get(step, [])):
+                    key = ("futures", t["symbol"])
+                    t["entry_price"] = t["max_price"] = px[key]
+                    t["timestamp"] = c.time()
+                    open_[t["id"]] = t
+                    if use_engine:
+                        engine.add(t)
+                c.advance(dt)
+                key = ("futures", sym)
+                px[key] = round(px[key] * (1 + ret), 6)
+                if use_engine:
+                    engine.on_tick("futures", sym, px[key])
+                    engine.poll_timeouts()
+                    engine.drain()
+                else:  # wie check_and_close_all(full_sweep=True): jeder offene Trade gegen seinen Tick
+                    now = c.time()
+                    for t in list(open_.values()):
+                        p = px[("futures", t["symbol"])]
+                        reason, _ = _exit_reason(t, p, now)
+                        if reason:
+                            open_.pop(t["id"])
+                            closed.append((step, t["id"], reason, p))
+        return sorted(closed), sorted(open_)
+
+    closed_engine, open_engine = replay(True)
+    closed_sweep, open_sweep = replay(False)
+    assert len(closed_sweep) > 100 and {r for _, _, r, _ in closed_sweep} >= {"TP", "SL", "TRAIL", "TIMEOUT"}
+    assert closed_engine == closed_sweep
+    assert open_engine == open_sweep
+
+
+@pytest.mark.parametrize("strategy", ["scalper", "conservative"])
+def test_decide_batch_matches_decide_trade(strategy, monkeypatch):
+    from bench.decision import make_features
+    from core.ai.online_rl import agent
+    from core.decision_engine.batch_decision import decide_batch
+    from core.decision_engine.simple_decision import decide_trade
+    from core.shared_state import shared_state
+
+    monkeypatch.setattr(shared_state, "latency_ms", 0)
+    feats = make_features(300, seed=5)
+    ref = {f["symbol"]: decide_trade(f, agent, strategy) for f in feats}
+    ref = {k: v for k, v in ref.items() if v}
+    got = {d["symbol"]: d for d in decide_batch(feats, strategy, agent=agent)}
+    assert ref, "keine Trades – Testdaten prüfen"
+    assert set(got) == set(ref)
+    for sym, d in ref.items():
+        for k in ("action", "leverage", "tp_pct", "sl_pct", "risk_adjusted_margin"):
+            assert got[sym][k] == pytest.approx(d[k], rel=1e-12), f"{sym} {k}"
+
+
+def test_batch_scanner_matches_features_from_ticks():
+    from core import scanner
+    from core.backtest.data import synthetic
+    from core.backtest.engine import _reset
+    from core.candle_store import CandleView
+    from core.scanner.batch import BatchScanner
+    from core.shared_state import shared_state
+    from core.time_aggregation.bar_engine import MTF_TREND_TFS
+
+    rng = np.random.default_rng(9)
+    symbols = [f"S{i:03d}USDT" for i in range(60)]
+    t0 = 1_704_067_200
+    with clock.use_clock(clock.SimClock(t0)):
+        _reset(150.0, 9, None)
+        hist = dict(zip(symbols, rng.choice([0, 5, scanner.MIN_CANDLE_COUNT - 1, scanner.MIN_CANDLE_COUNT, 45, 300],
+                                            len(symbols))))
+        price = {}
+        for sym in symbols:
+            n = int(hist[sym])
+            price[sym] = 100.0
+            if n:
+                data = synthetic([sym], n, 300, int(rng.integers(1 << 30)), start_ts=t0 - n * 300)[sym]
+                shared_state.merge_candles("futures", sym, 300, CandleView(data), prefer_new=True)
+                price[sym] = float(data[4, -1])
+            if n >= scanner.MIN_CANDLE_COUNT and rng.random() < 0.7:  # höhere Timeframes für den MTF-Trend
+                for tf in MTF_TREND_TFS:
+                    data = synthetic([sym], 40, tf, int(rng.integers(1 << 30)), start_ts=t0 - 40 * tf)[sym]
+                    shared_state.merge_candles("futures", sym, tf, CandleView(data), prefer_new=True)
+        feed = rng.choice(["both", "spot", "none"], len(symbols), p=[0.8, 0.1, 0.1])
+        batch = BatchScanner(symbols, min_candles=scanner.MIN_CANDLE_COUNT, volume_period=scanner.VOLUME_AVG_PERIOD,
+                             volatility_threshold=scanner.SCALPER_VOLATILITY_THRESHOLD)
+
+        for rnd in range(4):
+            for sym, f in zip(symbols, feed):
+                price[sym] = round(price[sym] * float(np.exp(rng.normal(0, 0.004))), 8)
+                for market in {"both": ("spot", "futures"), "spot": ("spot",), "none": ()}[f]:
+                    shared_state.upsert_tick(market, sym, price[sym], t0 + rnd)
+            ref = scanner._collect(None, symbols, 0)
+            got = batch.scan(top_k=len(symbols), symbols=symbols)
+            if rnd == 0:  # erste Bewertung setzt nur 'prev'
+                continue
+            for want_list, got_list in zip(ref, got):
+                assert [f["symbol"] for f in got_list] == [f["symbol"] for f in want_list]
+                for w, g in zip(want_list, got_list):
+                    for k in ("price", "trend", "vol", "atr_pct", "mtf_trend", "volume_ratio"):
+                        assert g[k] == pytest.approx(w[k], rel=1e-9, abs=1e-12), (rnd, w["symbol"], k)
+                    assert len(g.get("candles", ())) == len(w["candles"])  # ohne Ring: Batch lässt den Schlüssel weg
+                    if "rsi" in g:
+                        assert g["rsi"] == pytest.approx(w["rsi"], rel=1e-9, nan_ok=True)
+                        assert g["sma"] == pytest.approx(w["sma"], rel=1e-9)
+                    if "patterns" in w:
+                        assert g["patterns"] == w["patterns"]
+
+    cold = [s for s, f in zip(symbols, feed) if f != "none" and hist[s] < scanner.MIN_CANDLE_COUNT]
+    flat = {f["symbol"]: f for lst in ref for f in lst}
+    assert cold and sum(f != "none" for f in feed) == len(flat)
+    assert any(flat[s]["mtf_trend"] for s in flat) and any(flat[s]["atr_pct"] > 0 for s in flat)
+    assert ref[0] and ref[1]
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from core.shared_state import SharedState
+
+
+@pytest.mark.parametrize("stripes", [0, 1, 16])
+def test_empty_batch_is_a_noop(stripes):
+    state = SharedState(lock_stripes=stripes)
+    assert state.upsert_ticks("futures", [], ts=1.0) == 0
+    assert state.upsert_ticks("futures", (), ts=1.0) == 0
+    assert not state.ticks
+
+
+@pytest.mark.parametrize("stripes", [0, 1, 16])
+def test_batch_counts_only_changed_prices(stripes):
+    state = SharedState(lock_stripes=stripes)
+    assert state.upsert_ticks("futures", [("AAAUSDT", 1.0), ("BBBUSDT", 2.0)], ts=1.0) == 2
+    assert state.upsert_ticks("futures", [("AAAUSDT", 1.0), ("BBBUSDT", 2.5)], ts=2.0) == 1
+    assert state.ticks[("futures", "AAAUSDT")] == {"price": 1.0, "ts": 2.0}
+    assert state.ticks[("futures", "BBBUSDT")] == {"price": 2.5, "ts": 2.0}
+
+
+def test_concurrent_writers_on_different_stripes():
+    state = SharedState(lock_stripes=16)
+    symbols = [f"S{i}USDT" for i in range(400)]
+    rounds = 50
+
+    def writer(offset):
+        mine = symbols[offset::8]
+        for r in range(rounds):
+            state.upsert_ticks("futures", [(s, float(r)) for s in mine], ts=float(r))
+
+    threads = [threading.Thread(target=writer, args=(k,)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(state.ticks) == len(symbols)
+    assert all(state.ticks[("futures", s)] == {"price": rounds - 1.0, "ts": rounds - 1.0} for s in symbols)
+    snap = state.publish()
+    assert len(snap.data["ticks"]) == len(symbols)
+
+
+def test_wait_for_version_without_publisher_blocks_until_newer():
+    state = SharedState()
+    version = state.publish().version
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(state.wait_for_version(version)), daemon=True)
+    waiter.start()
+    waiter.join(0.3)
+    assert waiter.is_alive() and not result  # timeout=None: kein sofortiger Rückgabewert mit altem Snapshot
+    state.upsert_tick("futures", "AAAUSDT", 1.0, 1.0)
+    waiter.join(2.0)
+    assert result and result[0].version > version
+    assert state.wait_for_version(result[0].version, timeout=0.05).version == result[0].version
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+pytest.importorskip("dash")
+
+import dashboard.webapp as webapp
+from core.shared_state import shared_state
+
+
+@pytest.fixture
+def client():
+    webapp._resp_cache.clear()
+    yield webapp.server.test_client()
+    webapp._resp_cache.clear()
+
+
+def test_cache_keeps_one_version_and_is_bounded(client):
+    version = shared_state.published().version
+    for since in range(3 * webapp.RESP_CACHE_MAX_KEYS):
+        assert client.get(f"/api/snapshot?since={since}").status_code == 200
+    assert len(webapp._resp_cache) <= webapp.RESP_CACHE_MAX_KEYS
+    assert {k[0] for k in webapp._resp_cache} == {version}
+
+
+def test_etag_roundtrip(client):
+    r = client.get("/api/snapshot")
+    assert r.status_code == 200
+    assert client.get("/api/snapshot", headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+
+
+def test_concurrent_requests_never_fail(client):
+    errors = []
+
+    def worker(offset):
+        c = webapp.server.test_client()
+        for i in range(100):
+            if i % 10 == 0:
+                shared_state.publish()  # neue Version → Cache wird geleert
+            r = c.get(f"/api/snapshot?since={offset + i}&fields=version,open_trades")
+            if r.status_code != 200:
+                errors.append(r.get_data(as_text=True))
+
+    threads = [threading.Thread(target=worker, args=(k * 1000,)) for k in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(webapp._resp_cache) <= webapp.RESP_CACHE_MAX_KEYS